@@ -1,14 +1,19 @@
-from fastapi import FastAPI, HTTPException, Depends, Request, status, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
-from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional, Dict, Any, List, Literal, Union
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from sse_starlette.sse import EventSourceResponse
+from cachetools import TLRUCache
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
+from typing import Optional, Dict, Any, List, Literal, Tuple, Union
 import logging
 import os
 import uuid
-import json
+import re
+import time
 import asyncio
 import aiohttp
+import httpx
+import orjson
 from datetime import datetime, timezone
 from pathlib import Path
 from dotenv import load_dotenv
@@ -16,7 +21,7 @@ from dotenv import load_dotenv
 # Import internal modules
 from src.utils.config import settings
 from src.utils.logger import setup_logger
-from src.rag.rag_pipeline import get_rag_pipeline
+from src.utils.cache import redis_client
 from src.simulation.tenderly_new import (
     TenderlyClient, 
     TenderlyError, 
@@ -32,7 +37,8 @@ logger = setup_logger(__name__)
 app = FastAPI(
     title="Web3 Guardian API",
     description="Backend service for Web3 Guardian extension",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware configuration
@@ -44,12 +50,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load environment variables
-load_dotenv()
+# Shared connection pool for outbound API calls (HTTP/2, keep-alive)
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    timeout=httpx.Timeout(30.0, connect=5.0)
+)
 
 # Global Tenderly client instance
 try:
-    tenderly_client = TenderlyClient()
+    tenderly_client = TenderlyClient(http_client=http_client)
     logger.info("Tenderly client initialized successfully")
 except Exception as e:
     logger.error(f"Failed to initialize Tenderly client: {str(e)}")
@@ -59,6 +69,8 @@ except Exception as e:
 # Models
 class ContractAnalysisRequest(BaseModel):
     """Request model for contract analysis."""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
     contract_address: str = Field(..., description="The smart contract address to analyze")
     network: str = Field("mainnet", description="The blockchain network (e.g., mainnet, goerli, polygon)")
     analysis_types: List[Literal['static', 'dynamic']] = Field(
@@ -72,6 +84,8 @@ class ContractAnalysisRequest(BaseModel):
 
 class AnalysisResult(BaseModel):
     """Base model for analysis results."""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
     success: bool = Field(..., description="Whether the analysis was successful")
     analysis_id: str = Field(..., description="Unique ID for this analysis")
     timestamp: str = Field(..., description="ISO timestamp of when the analysis was performed")
@@ -116,6 +130,8 @@ class DynamicAnalysisResult(AnalysisResult):
 
 class AnalysisResponse(BaseModel):
     """Response model for analysis requests."""
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
     analysis_id: str = Field(..., description="Unique ID for this analysis")
     status: str = Field(..., description="Current status of the analysis")
     results: Dict[str, Any] = Field(
@@ -127,8 +143,216 @@ class AnalysisResponse(BaseModel):
         description="Error message if the analysis failed"
     )
 
-# In-memory storage for analysis results (in production, use a database)
-analysis_results = {}
+# Keyword findings used by the basic static analysis fallback
+FALLBACK_VULNERABILITIES = {
+    "selfdestruct": {
+        "title": "Self-Destruct Function",
+        "description": "Contract contains selfdestruct which can lead to fund loss",
+        "severity": "high",
+        "recommendation": "Avoid using selfdestruct unless absolutely necessary"
+    },
+    "delegatecall": {
+        "title": "DelegateCall Usage", 
+        "description": "Contract uses delegatecall which can be dangerous if not used carefully",
+        "severity": "high",
+        "recommendation": "Review delegatecall usage and ensure proper access controls"
+    },
+}
+
+# All fallback keywords compiled once into a single case-insensitive pattern
+FALLBACK_VULNERABILITY_PATTERN = re.compile(
+    "|".join(re.escape(keyword) for keyword in FALLBACK_VULNERABILITIES),
+    re.IGNORECASE
+)
+
+# ERC-20 function selectors: transfer(address,uint256) and balanceOf(address)
+ERC20_TRANSFER_SELECTOR = "a9059cbb"
+ERC20_BALANCE_OF_SELECTOR = "70a08231"
+
+# Function dispatchers push each selector with PUSH4 (0x63) before comparing it to
+# the calldata, so match the instruction rather than the bare bytes. Matching on the
+# decoded bytecode keeps matches on byte boundaries.
+PUSH4_OPCODE = b"\x63"
+ERC20_DISPATCH_PATTERNS = (
+    PUSH4_OPCODE + bytes.fromhex(ERC20_TRANSFER_SELECTOR),
+    PUSH4_OPCODE + bytes.fromhex(ERC20_BALANCE_OF_SELECTOR),
+)
+
+# Calldata for transfer(0x0...1, 1), encoded once
+ERC20_TRANSFER_CALLDATA = f"0x{ERC20_TRANSFER_SELECTOR}{1:064x}{1:064x}"
+
+def iter_source_texts(source: Any):
+    """Yield the individual source strings contained in a contract source payload.
+    
+    Handles plain source strings as well as multi-file payloads such as
+    ``{"contracts": {"Foo.sol": {"content": "..."}}}`` without serializing them.
+    """
+    if isinstance(source, str):
+        yield source
+    elif isinstance(source, dict):
+        for value in source.values():
+            yield from iter_source_texts(value)
+    elif isinstance(source, (list, tuple)):
+        for item in source:
+            yield from iter_source_texts(item)
+
+async def get_rag_pipeline():
+    """Get the shared RAG pipeline.
+    
+    The pipeline pulls in LangChain, the vector store and the embedding
+    model, so it is imported on first use rather than when a worker boots.
+    """
+    from src.rag.rag_pipeline import get_rag_pipeline as load_rag_pipeline
+    
+    return await load_rag_pipeline()
+
+# Random bytes for analysis IDs are drawn from a pool refilled in bulk,
+# so generating an ID does not cost an os.urandom() syscall each time
+_ID_RANDOM_BYTES = 10
+_id_pool = b""
+_id_pool_offset = 0
+
+def new_analysis_id() -> str:
+    """Generate a time-ordered UUIDv7 for a new analysis.
+    
+    Returns:
+        The UUID as a string
+    """
+    global _id_pool, _id_pool_offset
+    
+    if _id_pool_offset + _ID_RANDOM_BYTES > len(_id_pool):
+        _id_pool = os.urandom(_ID_RANDOM_BYTES * 4096)
+        _id_pool_offset = 0
+    
+    random_bits = int.from_bytes(
+        _id_pool[_id_pool_offset:_id_pool_offset + _ID_RANDOM_BYTES], "big"
+    )
+    _id_pool_offset += _ID_RANDOM_BYTES
+    
+    # 48-bit millisecond timestamp followed by 80 random bits, with the
+    # version (7) and RFC 4122 variant bits set on top
+    value = (time.time_ns() // 1_000_000) << 80 | random_bits
+    value = (value & ~(0xF << 76)) | (0x7 << 76)
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)
+    return str(uuid.UUID(int=value))
+
+# Analysis state lives in the shared Redis store so every worker sees the same analyses
+def _analysis_key(analysis_id: str) -> str:
+    """Build the Redis key for an analysis."""
+    return f"analysis:{analysis_id}"
+
+async def save_analysis(analysis_id: str, data: Dict[str, Any]) -> None:
+    """Persist the state of an analysis to Redis.
+    
+    Args:
+        analysis_id: Unique ID of the analysis
+        data: Analysis state (status, results, error, ...)
+    """
+    await redis_client.set(
+        _analysis_key(analysis_id),
+        orjson.dumps(data, default=str),
+        ex=settings.CACHE_TTL
+    )
+
+async def load_analysis(analysis_id: str) -> Optional[Dict[str, Any]]:
+    """Load the state of an analysis from Redis.
+    
+    Args:
+        analysis_id: Unique ID of the analysis
+        
+    Returns:
+        The stored analysis state, or None if it does not exist or has expired
+    """
+    raw = await redis_client.get(_analysis_key(analysis_id))
+    return orjson.loads(raw) if raw else None
+
+def _channel_key(analysis_id: str) -> str:
+    """Build the Redis pub/sub channel for progress updates of an analysis."""
+    return f"channel:analysis:{analysis_id}"
+
+async def save_and_publish_analysis(analysis_id: str, data: Dict[str, Any]) -> None:
+    """Persist the state of an analysis and publish it to its progress channel
+    in one atomic round trip.
+    
+    Args:
+        analysis_id: Unique ID of the analysis
+        data: Analysis state (status, results, error, ...)
+    """
+    payload = orjson.dumps(data, default=str)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(_analysis_key(analysis_id), payload, ex=settings.CACHE_TTL)
+        pipe.publish(_channel_key(analysis_id), payload)
+        await pipe.execute()
+
+def _response_key(analysis_id: str) -> str:
+    """Build the Redis key for the serialized response of a completed analysis."""
+    return f"analysis:response:{analysis_id}"
+
+# Per-worker cache of serialized responses in front of Redis for heavily polled
+# analyses. Entries are (content, completed) tuples; completed responses never
+# change and are kept longer than ones that are still in flight.
+HOT_COMPLETED_TTL = 2.0
+HOT_IN_PROGRESS_TTL = 0.2
+
+hot_analyses = TLRUCache(
+    maxsize=1024,
+    ttu=lambda _key, value, now: now + (HOT_COMPLETED_TTL if value[1] else HOT_IN_PROGRESS_TTL)
+)
+
+def _inflight_key(request: ContractAnalysisRequest) -> str:
+    """Build the Redis key identifying identical analysis requests."""
+    analysis_types = ",".join(sorted(request.analysis_types))
+    return f"analysis:inflight:{request.network}:{request.contract_address.lower()}:{analysis_types}"
+
+# Replace the in-flight analysis ID only if it still is the expected one
+CLAIM_TAKEOVER_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return false
+"""
+CLAIM_ATTEMPTS = 3
+
+async def claim_analysis(
+    request: ContractAnalysisRequest,
+    analysis_id: str
+) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Register an analysis as in flight unless an identical one already is.
+    
+    A slot left behind by an expired analysis is taken over with a
+    compare-and-set, so of several requests racing for it only one wins and
+    the others join its analysis.
+    
+    Args:
+        request: The analysis request
+        analysis_id: ID to register for the request
+        
+    Returns:
+        The ID and stored state of the identical in-flight (or just completed)
+        analysis, or None if this request claimed the slot
+    """
+    key = _inflight_key(request)
+    ttl = settings.ANALYSIS_INFLIGHT_TTL
+    for _ in range(CLAIM_ATTEMPTS):
+        if await redis_client.set(key, analysis_id, nx=True, ex=ttl):
+            return None
+        
+        existing_id = await redis_client.get(key)
+        if not existing_id:
+            # The slot was released in the meantime; try to claim it again
+            continue
+        
+        existing = await load_analysis(existing_id)
+        if existing:
+            return existing_id, existing
+        
+        # The previous analysis has expired; take over the slot unless
+        # another request already has
+        if await redis_client.eval(CLAIM_TAKEOVER_SCRIPT, 1, key, existing_id, analysis_id, ttl):
+            return None
+    
+    # The slot keeps changing hands; run this analysis without coalescing
+    return None
 
 # Utility functions
 async def fetch_contract_details(contract_address: str, network: str) -> Dict[str, Any]:
@@ -175,17 +399,50 @@ async def fetch_contract_details(contract_address: str, network: str) -> Dict[st
         return {"is_verified": False, "source": "", "metadata": {}}
 
 
-async def perform_static_analysis(contract_address: str, network: str) -> Dict[str, Any]:
+async def is_erc20_contract(contract_address: str, network: str) -> bool:
+    """Check whether a contract exposes the ERC-20 transfer and balanceOf functions.
+    
+    Looks for the function selectors as PUSH4 operands in the deployed bytecode, falling back to
+    the verified contract name when the bytecode is unavailable.
+    
+    Args:
+        contract_address: The address of the smart contract
+        network: The network the contract is deployed on
+        
+    Returns:
+        True if the contract looks like an ERC-20 token
+    """
+    try:
+        bytecode = await tenderly_client.get_contract_bytecode(contract_address, network)
+        code = bytecode.get("deployed_bytecode") or bytecode.get("bytecode") or ""
+        code = bytes.fromhex(code.removeprefix("0x"))
+        if code:
+            return all(pattern in code for pattern in ERC20_DISPATCH_PATTERNS)
+    except ValueError:
+        logger.warning(f"Malformed bytecode for {contract_address}")
+    except TenderlyError as e:
+        logger.warning(f"Failed to fetch bytecode for {contract_address}: {str(e)}")
+    
+    metadata = await tenderly_client.get_contract_metadata(contract_address, network)
+    return "ERC20" in metadata.get("contract_name", "")
+
+async def perform_static_analysis(
+    contract_address: str,
+    network: str,
+    timestamp: Optional[str] = None
+) -> Dict[str, Any]:
     """Perform static analysis on a smart contract using RAG pipeline.
     
     Args:
         contract_address: The address of the smart contract
         network: The network the contract is deployed on
+        timestamp: ISO timestamp to record on the result (defaults to now)
         
     Returns:
         Dict containing static analysis results
     """
     logger.info(f"Performing static analysis on {contract_address} on {network}")
+    timestamp = timestamp or datetime.utcnow().isoformat()
     
     try:
         contract_details = await fetch_contract_details(contract_address, network)
@@ -197,7 +454,7 @@ async def perform_static_analysis(contract_address: str, network: str) -> Dict[s
             "is_verified": contract_details["is_verified"],
             "contract_type": contract_details.get("contract_name", "Unknown"),
             "compiler_version": contract_details.get("compiler_version", "Unknown"),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": timestamp
         }
 
         if not contract_details["is_verified"]:
@@ -220,24 +477,19 @@ async def perform_static_analysis(contract_address: str, network: str) -> Dict[s
 
             except Exception as rag_error:
                 logger.error(f"RAG analysis failed, falling back to basic analysis: {str(rag_error)}")
-                # Fallback to basic analysis if RAG fails
-                source_text = str(source_code).lower()
-                
-                if 'selfdestruct' in source_text:
-                    analysis_results["vulnerabilities"].append({
-                        "title": "Self-Destruct Function",
-                        "description": "Contract contains selfdestruct which can lead to fund loss",
-                        "severity": "high",
-                        "recommendation": "Avoid using selfdestruct unless absolutely necessary"
-                    })
+                # Fallback to basic analysis if RAG fails: one pass over each source file
+                found = set()
+                for source_text in iter_source_texts(source_code):
+                    found.update(
+                        match.group(0).lower()
+                        for match in FALLBACK_VULNERABILITY_PATTERN.finditer(source_text)
+                    )
+                    if len(found) == len(FALLBACK_VULNERABILITIES):
+                        break
                 
-                if 'delegatecall' in source_text:
-                    analysis_results["vulnerabilities"].append({
-                        "title": "DelegateCall Usage", 
-                        "description": "Contract uses delegatecall which can be dangerous if not used carefully",
-                        "severity": "high",
-                        "recommendation": "Review delegatecall usage and ensure proper access controls"
-                    })
+                for keyword, vulnerability in FALLBACK_VULNERABILITIES.items():
+                    if keyword in found:
+                        analysis_results["vulnerabilities"].append(dict(vulnerability))
 
                 # Calculate basic security score
                 if analysis_results["vulnerabilities"]:
@@ -257,29 +509,32 @@ async def perform_static_analysis(contract_address: str, network: str) -> Dict[s
             "error": str(e)
         }
 
-async def perform_dynamic_analysis(contract_address: str, network: str) -> Dict[str, Any]:
+async def perform_dynamic_analysis(
+    contract_address: str,
+    network: str,
+    timestamp: Optional[str] = None
+) -> Dict[str, Any]:
     """Perform dynamic analysis using Tenderly.
     
     Args:
         contract_address: The address of the smart contract
         network: The network the contract is deployed on
+        timestamp: ISO timestamp to record on the result (defaults to now)
         
     Returns:
         Dict containing dynamic analysis results
     """
     logger.info(f"Performing dynamic analysis on {contract_address} on {network}")
+    timestamp = timestamp or datetime.utcnow().isoformat()
     
     try:
-        # Get contract metadata to check if it's a token contract
-        metadata = await tenderly_client.get_contract_metadata(contract_address, network)
-        
         # Prepare simulation parameters based on contract type
-        if "ERC20" in metadata.get("contract_name", ""):
+        if await is_erc20_contract(contract_address, network):
             # Simulate a token transfer
             tx_params = {
                 "from": "0x0000000000000000000000000000000000000000",  # Zero address for minting
                 "to": contract_address,
-                "data": "0xa9059cbb00000000000000000000000000000000000000000000000000000000000000010000000000000000000000000000000000000000000000000000000000000001",  # transfer(0x0...1, 1)
+                "data": ERC20_TRANSFER_CALLDATA,
                 "value": "0x0"
             }
         else:
@@ -307,7 +562,7 @@ async def perform_dynamic_analysis(contract_address: str, network: str) -> Dict[
             "execution_trace": simulation.get("trace", {}),
             "logs": simulation.get("logs", []),
             "error": None,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": timestamp
         }
         
     except SimulationFailedError as e:
@@ -319,7 +574,7 @@ async def perform_dynamic_analysis(contract_address: str, network: str) -> Dict[
             "execution_trace": {},
             "logs": [],
             "error": str(e),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": timestamp
         }
     except Exception as e:
         logger.error(f"Dynamic analysis failed: {str(e)}")
@@ -330,49 +585,114 @@ async def perform_dynamic_analysis(contract_address: str, network: str) -> Dict[
             "execution_trace": {},
             "logs": [],
             "error": f"Unexpected error: {str(e)}",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": timestamp
         }
 
 async def run_analysis(analysis_id: str, request: ContractAnalysisRequest):
-    """Run the full analysis pipeline."""
+    """Run the full analysis pipeline.
+    
+    Every state transition (started, each finished step, completed or failed)
+    is written to the stored record and published on the analysis channel in
+    one MULTI/EXEC pipeline. Transitions are merged into the record created by the
+    request, so its address, network and timestamp are kept.
+    """
+    started_at = datetime.utcnow().isoformat()
+    record = {
+        "contract_address": request.contract_address,
+        "network": request.network,
+        "timestamp": started_at
+    }
+    
+    async def transition(**fields):
+        record.update(fields)
+        await save_and_publish_analysis(analysis_id, record)
+    
     try:
-        results = {}
-        
-        # Update status to in-progress
-        analysis_results[analysis_id] = {
-            "status": "in_progress",
-            "results": {}
-        }
+        record.update(await load_analysis(analysis_id) or {})
+        await transition(status="in_progress", results={})
         
-        # Run requested analyses
-        if 'static' in request.analysis_types:
-            static_result = await perform_static_analysis(
+        async def run_step(name, analysis_fn):
+            step_result = await analysis_fn(
                 request.contract_address,
-                request.network
+                request.network,
+                timestamp=started_at
             )
-            results['static'] = static_result
-            analysis_results[analysis_id]['results']['static'] = static_result
+            record['results'][name] = step_result
+            await transition()
+            return step_result
         
-        if 'dynamic' in request.analysis_types:
-            dynamic_result = await perform_dynamic_analysis(
-                request.contract_address,
-                request.network
-            )
-            results['dynamic'] = dynamic_result
-            analysis_results[analysis_id]['results']['dynamic'] = dynamic_result
+        # Run requested analyses concurrently
+        analysis_steps = {
+            'static': perform_static_analysis,
+            'dynamic': perform_dynamic_analysis,
+        }
+        names = [name for name in analysis_steps if name in request.analysis_types]
+        outputs = await asyncio.gather(
+            *(run_step(name, analysis_steps[name]) for name in names),
+            return_exceptions=True
+        )
         
-        # Update status to completed
-        analysis_results[analysis_id].update({
-            "status": "completed",
-            "results": results
-        })
+        # Anything raised, including CancelledError, fails the analysis
+        for output in outputs:
+            if isinstance(output, BaseException):
+                if not isinstance(output, Exception):
+                    raise RuntimeError(f"Analysis step aborted: {output!r}") from output
+                raise output
+        
+        await transition(status="completed")
+        
+        # Keep serving duplicates from this analysis for a short while
+        await redis_client.expire(_inflight_key(request), settings.ANALYSIS_DEDUP_TTL)
         
     except Exception as e:
         logger.exception(f"Analysis failed: {str(e)}")
-        analysis_results[analysis_id] = {
-            "status": "failed",
-            "error": str(e)
-        }
+        await transition(status="failed", error=str(e))
+        await redis_client.delete(_inflight_key(request))
+
+# Bounded queue of pending analyses drained by a fixed pool of workers
+analysis_queue: Optional[asyncio.Queue] = None
+analysis_workers: List[asyncio.Task] = []
+
+async def analysis_worker():
+    """Run queued analyses one at a time.
+    
+    A failure of a single analysis, including one while recording that it
+    failed, is logged and never stops the worker.
+    """
+    while True:
+        analysis_id, request = await analysis_queue.get()
+        try:
+            await run_analysis(analysis_id, request)
+        except Exception:
+            logger.exception(f"Analysis worker failed on analysis {analysis_id}")
+        finally:
+            analysis_queue.task_done()
+
+@app.on_event("startup")
+async def startup():
+    """Start the analysis workers and expose shared clients on the application state."""
+    global analysis_queue
+    analysis_queue = asyncio.Queue(maxsize=settings.ANALYSIS_QUEUE_SIZE)
+    analysis_workers.extend(
+        asyncio.create_task(analysis_worker())
+        for _ in range(settings.CONCURRENT_ANALYSES)
+    )
+    
+    app.state.analysis_queue = analysis_queue
+    app.state.redis = redis_client
+    app.state.http = http_client
+    app.state.tenderly = tenderly_client
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the analysis workers and release shared clients."""
+    for worker in analysis_workers:
+        worker.cancel()
+    await asyncio.gather(*analysis_workers, return_exceptions=True)
+    analysis_workers.clear()
+    
+    await http_client.aclose()
+    await redis_client.aclose()
 
 # API Routes
 @app.get("/health")
@@ -380,11 +700,12 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
-@app.post("/api/analyze/contract", response_model=AnalysisResponse)
-async def analyze_contract(
-    request: ContractAnalysisRequest,
-    background_tasks: BackgroundTasks
-):
+@app.post(
+    "/api/analyze/contract",
+    response_model=None,
+    responses={200: {"model": AnalysisResponse}}
+)
+async def analyze_contract(request: ContractAnalysisRequest):
     """
     Analyze a smart contract.
     
@@ -392,42 +713,148 @@ async def analyze_contract(
     It returns immediately with an analysis ID that can be used to check the status.
     """
     # Generate a unique ID for this analysis
-    analysis_id = str(uuid.uuid4())
+    analysis_id = new_analysis_id()
+    
+    # Join an identical analysis that is already running
+    claimed = await claim_analysis(request, analysis_id)
+    if claimed:
+        existing_id, existing = claimed
+        return ORJSONResponse(content={
+            "analysis_id": existing_id,
+            "status": existing["status"],
+            "results": existing.get("results", {}),
+            "error": existing.get("error")
+        })
     
     # Initialize the analysis result
-    analysis_results[analysis_id] = {
+    await save_analysis(analysis_id, {
         "status": "pending",
         "results": {},
         "contract_address": request.contract_address,
         "network": request.network,
         "timestamp": datetime.utcnow().isoformat()
-    }
+    })
     
-    # Start the analysis in the background
-    background_tasks.add_task(run_analysis, analysis_id, request)
+    # Hand the analysis to the worker pool
+    try:
+        analysis_queue.put_nowait((analysis_id, request))
+    except asyncio.QueueFull:
+        await save_analysis(analysis_id, {
+            "status": "failed",
+            "results": {},
+            "error": "Analysis queue is full",
+            "contract_address": request.contract_address,
+            "network": request.network,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        await redis_client.delete(_inflight_key(request))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many pending analyses, please retry later"
+        )
     
-    return {
+    return ORJSONResponse(content={
         "analysis_id": analysis_id,
         "status": "pending",
-        "results": {}
-    }
+        "results": {},
+        "error": None
+    })
 
-@app.get("/api/analysis/{analysis_id}", response_model=AnalysisResponse)
+@app.get(
+    "/api/analysis/{analysis_id}",
+    response_model=None,
+    responses={200: {"model": AnalysisResponse}}
+)
 async def get_analysis(analysis_id: str):
-    """Get the status and results of an analysis."""
-    result = analysis_results.get(analysis_id)
-    if not result:
+    """Get the status and results of an analysis.
+    
+    Completed analyses no longer change, so their serialized response is
+    cached in Redis and returned as-is on subsequent polls. On top of that,
+    each worker briefly keeps recent responses in memory so a burst of polls
+    for the same analysis costs a single Redis round trip.
+    """
+    hot = hot_analyses.get(analysis_id)
+    if hot is not None:
+        return Response(content=hot[0], media_type="application/json")
+    
+    cached, raw = await redis_client.mget(
+        _response_key(analysis_id),
+        _analysis_key(analysis_id)
+    )
+    if cached:
+        hot_analyses[analysis_id] = (cached, True)
+        return Response(content=cached, media_type="application/json")
+    
+    if not raw:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Analysis with ID {analysis_id} not found"
         )
     
-    return {
+    result = orjson.loads(raw)
+    content = orjson.dumps({
         "analysis_id": analysis_id,
         "status": result["status"],
         "results": result.get("results", {}),
         "error": result.get("error")
-    }
+    })
+    
+    completed = result["status"] == "completed"
+    if completed:
+        await redis_client.set(_response_key(analysis_id), content, ex=settings.CACHE_TTL)
+    hot_analyses[analysis_id] = (content, completed)
+    
+    return Response(content=content, media_type="application/json")
+
+@app.get("/api/analysis/{analysis_id}/stream")
+async def stream_analysis(analysis_id: str):
+    """Stream the status transitions of an analysis as Server-Sent Events.
+    
+    Each event carries the same payload as ``GET /api/analysis/{analysis_id}``
+    and is named after the analysis status. The stream closes once the
+    analysis has completed or failed.
+    """
+    pubsub = redis_client.pubsub()
+    # Subscribe before reading the stored state so no transition is missed
+    await pubsub.subscribe(_channel_key(analysis_id))
+    
+    result = await load_analysis(analysis_id)
+    if not result:
+        await pubsub.aclose()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Analysis with ID {analysis_id} not found"
+        )
+    
+    def to_event(state: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "event": state["status"],
+            "data": orjson.dumps({
+                "analysis_id": analysis_id,
+                "status": state["status"],
+                "results": state.get("results", {}),
+                "error": state.get("error")
+            }, default=str).decode()
+        }
+    
+    async def events():
+        try:
+            yield to_event(result)
+            if result["status"] in ("completed", "failed"):
+                return
+            
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                
+                state = orjson.loads(message["data"])
+                yield to_event(state)
+                if state["status"] in ("completed", "failed"):
+                    return
+        finally:
+            await pubsub.aclose()
+    
+    return EventSourceResponse(events())
 
 @app.post("/api/analyze/transaction")
 async def analyze_transaction(tx_request: Dict[str, Any]):
@@ -444,5 +871,19 @@ async def analyze_transaction(tx_request: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    
+    # Auto-reload is for development only and requires a single worker
+    reload = settings.RELOAD or os.getenv("DEV", "").lower() in ("1", "true", "yes")
+    workers = 1 if reload else int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    
+    uvicorn.run(
+        "main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        reload=reload,
+        workers=workers,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop has no Windows support
+        http="httptools"
+    )
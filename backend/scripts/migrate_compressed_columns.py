@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Upgrade databases created by init_db() before the current models.
+
+Converts JSONB analysis columns to compressed msgpack BYTEA in place and
+adds the columns and indexes that Base.metadata.create_all only creates
+with new tables.
+Every step is idempotent, so the script can be run again safely.
+"""
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.database.config import close_db, get_pool
+from src.database.models import pack_document
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Columns stored as CompressedMsgpack in the models
+COLUMNS = [
+    ("contract_analyses", "static_analysis"),
+    ("contract_analyses", "dynamic_analysis"),
+    ("analysis_cache", "data"),
+]
+
+# Columns and indexes added to the models after the first release, as idempotent DDL
+SCHEMA_CHANGES = [
+    "CREATE INDEX IF NOT EXISTS ix_analysis_addr_net_ts "
+    "ON contract_analyses (contract_address, network, timestamp DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_vuln_high_sev "
+    "ON vulnerabilities (analysis_id) WHERE severity = 'high'",
+    "CREATE INDEX IF NOT EXISTS ix_cache_expires_brin "
+    "ON analysis_cache USING brin (expires_at)",
+    # 20-byte address column; its index replaces the one on the text address
+    "ALTER TABLE contract_analyses ADD COLUMN IF NOT EXISTS contract_address_bytes BYTEA "
+    "GENERATED ALWAYS AS (CASE WHEN contract_address ~ '^0x[0-9a-fA-F]{40}$' "
+    "THEN decode(substr(contract_address, 3), 'hex') END) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_contract_analyses_contract_address_bytes "
+    "ON contract_analyses (contract_address_bytes)",
+    "DROP INDEX IF EXISTS ix_contract_analyses_contract_address",
+]
+
+async def migrate_column(conn, table: str, column: str) -> int:
+    """Rewrite one JSONB column as BYTEA, returning the number of rows converted."""
+    info = await conn.fetchrow(
+        "SELECT data_type, is_nullable FROM information_schema.columns "
+        "WHERE table_name = $1 AND column_name = $2",
+        table, column,
+    )
+    if info is None or info["data_type"] != "jsonb":
+        logger.info(f"Skipping {table}.{column} (not a jsonb column)")
+        return 0
+    
+    packed_column = f"{column}_packed"
+    async with conn.transaction():
+        await conn.execute(f"ALTER TABLE {table} ADD COLUMN {packed_column} BYTEA")
+        
+        rows = await conn.fetch(
+            f"SELECT id, {column}::text AS value FROM {table} WHERE {column} IS NOT NULL"
+        )
+        await conn.executemany(
+            f"UPDATE {table} SET {packed_column} = $2 WHERE id = $1",
+            [(row["id"], pack_document(json.loads(row["value"]))) for row in rows],
+        )
+        
+        await conn.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+        await conn.execute(f"ALTER TABLE {table} RENAME COLUMN {packed_column} TO {column}")
+        if info["is_nullable"] == "NO":
+            await conn.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+    
+    logger.info(f"Converted {len(rows)} rows in {table}.{column}")
+    return len(rows)
+
+async def migrate() -> bool:
+    """Convert every compressed column still stored as JSONB and apply SCHEMA_CHANGES."""
+    try:
+        async with (await get_pool()).acquire() as conn:
+            for table, column in COLUMNS:
+                await migrate_column(conn, table, column)
+            for statement in SCHEMA_CHANGES:
+                await conn.execute(statement)
+            logger.info(f"Applied {len(SCHEMA_CHANGES)} schema changes")
+        return True
+    except Exception as e:
+        logger.error(f"Migration failed: {e}", exc_info=True)
+        return False
+    finally:
+        await close_db()
+
+if __name__ == "__main__":
+    logger.info("Starting database migration...")
+    
+    success = asyncio.run(migrate())
+    
+    if success:
+        logger.info("Migration completed successfully!")
+        sys.exit(0)
+    else:
+        logger.error("Migration failed!")
+        sys.exit(1)
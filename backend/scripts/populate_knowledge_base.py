@@ -3,20 +3,28 @@
 SmartBugs Dataset Processing Script
 
 This script processes the SmartBugs dataset to populate the knowledge base for the RAG pipeline.
-It extracts vulnerability information and code snippets from the dataset and creates structured
-text files that can be used by the RAG system for smart contract security analysis.
+It extracts vulnerability information and code snippets from the dataset and writes structured
+documents to a single JSONL file that the RAG system loads for smart contract security analysis.
 
 The SmartBugs dataset includes 143 contracts with 208 labeled vulnerabilities across categories
 like reentrancy, access control, and arithmetic issues.
 """
 
-import json
+import asyncio
 import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import sys
 
+import aiofiles
+import numpy as np
+import orjson
+import xxhash
+
 # Add the backend directory to the Python path
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -25,6 +33,109 @@ from src.utils.logger import setup_logger
 # Setup logging
 logger = setup_logger(__name__, log_level='INFO')
 
+# Maximum number of contracts a worker reads concurrently
+READ_BATCH_SIZE = 32
+
+# Knowledge base file with one JSON document per line
+KNOWLEDGE_BASE_FILE = 'smartbugs.jsonl'
+
+# Fingerprint of each contract's inputs as of the last run, keyed by contract path
+MANIFEST_FILE = 'manifest.json'
+
+class _FilenameCharTable(dict):
+    """
+    str.translate table keeping alphanumerics and '._-' and dropping the rest
+    
+    Entries are filled in on first use, so the table only ever holds the
+    characters that actually occur in names.
+    """
+    
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        char = chr(codepoint)
+        value = codepoint if char.isalnum() or char in "._-" else None
+        self[codepoint] = value
+        return value
+
+_FILENAME_CHARS = _FilenameCharTable()
+
+# Knowledge base document layout, parsed once and filled in per vulnerability
+_DOCUMENT_TEMPLATE = """# Smart Contract Vulnerability Analysis
+
+## Contract Information
+- **Name**: {contract_name}
+- **File**: {path}
+- **Total Vulnerabilities**: {total_vulnerabilities}
+
+## Vulnerability Details
+- **Category**: {category}
+- **Severity**: {severity}
+- **Affected Lines**: {lines}
+- **Description**: {description}
+
+## Code Analysis
+The following code snippet shows the vulnerable code with context:
+
+```solidity
+{code_snippet}
+```
+
+## Security Implications
+Category: {category}
+- This type of vulnerability can lead to various security issues
+- Lines {lines} contain the problematic code patterns
+- Immediate attention required for remediation
+
+## Recommended Mitigations
+Based on the vulnerability category "{category}", consider the following:
+1. Review the highlighted code sections carefully
+2. Apply security best practices for {category} vulnerabilities  
+3. Consider using established security libraries
+4. Implement proper access controls and validation
+
+## Learning Context
+This vulnerability was identified in the SmartBugs curated dataset, which contains
+real-world examples of smart contract security issues. Use this information to
+understand common vulnerability patterns and improve security analysis capabilities.
+
+---
+Generated from SmartBugs dataset for RAG knowledge base
+"""
+
+class ContractLines:
+    """
+    Contract source kept as raw bytes with an index of line offsets
+    
+    Only the lines that are actually accessed get decoded, so building a
+    snippet from a large contract does not decode the whole file.
+    """
+    
+    def __init__(self, data: bytes):
+        self.data = data
+        newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 0x0A)
+        self.starts = np.concatenate(([0], newlines + 1))
+        self.ends = np.concatenate((newlines, [len(data)]))
+        
+        # A trailing newline does not start another line
+        if self.starts[-1] == len(data):
+            self.starts = self.starts[:-1]
+            self.ends = self.ends[:-1]
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def line(self, index: int) -> str:
+        """Decode the line at a zero-based index"""
+        raw = self.data[self.starts[index]:self.ends[index]]
+        try:
+            return raw.decode('utf-8')
+        except UnicodeDecodeError:
+            return raw.decode('latin-1')
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.line(i) for i in range(*key.indices(len(self)))]
+        return self.line(key)
+
 class SmartBugsProcessor:
     """Process SmartBugs dataset for RAG knowledge base"""
     
@@ -47,9 +158,13 @@ class SmartBugsProcessor:
             'processed_contracts': 0,
             'total_vulnerabilities': 0,
             'created_documents': 0,
+            'unchanged_contracts': 0,
             'errors': 0,
-            'categories': {}
+            'categories': Counter()
         }
+        
+        # Vulnerable line numbers, one array per processed contract
+        self.line_numbers: List[np.ndarray] = []
     
     def validate_dataset(self) -> bool:
         """Validate that the SmartBugs dataset exists and has required files"""
@@ -70,8 +185,7 @@ class SmartBugsProcessor:
         vulnerabilities_file = self.smartbugs_path / 'vulnerabilities.json'
         
         try:
-            with open(vulnerabilities_file, 'r', encoding='utf-8') as f:
-                vulnerabilities = json.load(f)
+            vulnerabilities = orjson.loads(vulnerabilities_file.read_bytes())
             
             logger.info(f"Loaded {len(vulnerabilities)} contracts from vulnerabilities.json")
             return vulnerabilities
@@ -80,30 +194,81 @@ class SmartBugsProcessor:
             logger.error(f"Error loading vulnerabilities.json: {e}")
             return []
     
-    def read_contract_code(self, contract_path: Path) -> List[str]:
-        """Read contract code and return as list of lines"""
+    def load_manifest(self) -> Dict[str, str]:
+        """Load the contract fingerprints written by the last run, if any"""
+        manifest_file = self.knowledge_base_path / MANIFEST_FILE
+        
         try:
-            with open(contract_path, 'r', encoding='utf-8') as f:
-                return f.readlines()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            try:
-                with open(contract_path, 'r', encoding='latin-1') as f:
-                    return f.readlines()
-            except Exception as e:
-                logger.error(f"Error reading {contract_path} with latin-1: {e}")
-                return []
+            return orjson.loads(manifest_file.read_bytes())
+        except FileNotFoundError:
+            return {}
         except Exception as e:
-            logger.error(f"Error reading {contract_path}: {e}")
-            return []
+            logger.warning(f"Ignoring unreadable manifest {manifest_file}: {e}")
+            return {}
+    
+    def load_previous_documents(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Load the records written by the last run, grouped by contract path"""
+        kb_file = self.knowledge_base_path / KNOWLEDGE_BASE_FILE
+        documents = defaultdict(list)
+        
+        try:
+            with open(kb_file, 'rb') as kb_fp:
+                for line in kb_fp:
+                    record = orjson.loads(line)
+                    documents[record.get('contract_path')].append(record)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable knowledge base {kb_file}: {e}")
+            return {}
+        
+        return documents
+    
+    def fingerprint_contract(self, contract_info: Dict[str, Any], contract_code: ContractLines) -> str:
+        """
+        Hash everything a contract's records are built from
+        
+        Covers the document template, the contract entry and the contract
+        source, so a change to any of them yields a new fingerprint.
+        """
+        hasher = xxhash.xxh3_64(_DOCUMENT_TEMPLATE.encode('utf-8'))
+        hasher.update(orjson.dumps(contract_info, option=orjson.OPT_SORT_KEYS))
+        hasher.update(contract_code.data)
+        return hasher.hexdigest()
     
-    def extract_code_snippet(self, contract_code: List[str], lines: List[int], 
+    def read_contract_code(self, contract_path: Path) -> ContractLines:
+        """Read contract code and return it indexed by line"""
+        try:
+            return ContractLines(contract_path.read_bytes())
+        except Exception as e:
+            logger.error("Error reading %s: %s", contract_path, e)
+            return ContractLines(b"")
+    
+    async def aread_contract_code(self, contract_path: Path) -> ContractLines:
+        """Asynchronously read contract code and return it indexed by line"""
+        try:
+            async with aiofiles.open(contract_path, 'rb') as f:
+                return ContractLines(await f.read())
+        except Exception as e:
+            logger.error("Error reading %s: %s", contract_path, e)
+            return ContractLines(b"")
+    
+    async def read_contract_codes(self, contracts: List[Dict[str, Any]]) -> List[ContractLines]:
+        """Read the code of several contracts concurrently, skipping ones without vulnerabilities"""
+        async def read(contract_info: Dict[str, Any]) -> ContractLines:
+            if not contract_info.get('vulnerabilities'):
+                return ContractLines(b"")
+            return await self.aread_contract_code(self.smartbugs_path / contract_info.get('path', ''))
+        
+        return await asyncio.gather(*(read(contract_info) for contract_info in contracts))
+    
+    def extract_code_snippet(self, contract_code: ContractLines, lines: List[int], 
                            context_lines: int = 5) -> str:
         """
         Extract code snippet around vulnerability lines with context
         
         Args:
-            contract_code: List of code lines
+            contract_code: Contract code indexed by line
             lines: List of vulnerable line numbers
             context_lines: Number of context lines before and after
         
@@ -116,12 +281,12 @@ class SmartBugsProcessor:
         min_line = max(1, min(lines) - context_lines)
         max_line = min(len(contract_code), max(lines) + context_lines)
         
-        snippet_lines = []
-        for i in range(min_line, max_line + 1):
-            line_marker = ">>> " if i in lines else "    "
-            snippet_lines.append(f"{line_marker}{i:3d}: {contract_code[i-1].rstrip()}")
+        line_set = set(lines)
         
-        return '\n'.join(snippet_lines)
+        return '\n'.join(
+            f"{'>>> ' if line_no in line_set else '    '}{line_no:3d}: {line.rstrip()}"
+            for line_no, line in enumerate(contract_code[min_line - 1:max_line], start=min_line)
+        )
     
     def create_vulnerability_document(self, contract_name: str, vulnerability: Dict[str, Any], 
                                     code_snippet: str, contract_info: Dict[str, Any]) -> str:
@@ -130,77 +295,61 @@ class SmartBugsProcessor:
         lines = vulnerability.get('lines', [])
         description = vulnerability.get('description', f"{category} vulnerability detected")
         
-        # Create comprehensive document
-        document = f"""# Smart Contract Vulnerability Analysis
-
-## Contract Information
-- **Name**: {contract_name}
-- **File**: {contract_info.get('path', 'unknown')}
-- **Total Vulnerabilities**: {len(contract_info.get('vulnerabilities', []))}
-
-## Vulnerability Details
-- **Category**: {category}
-- **Severity**: {vulnerability.get('severity', 'medium')}
-- **Affected Lines**: {lines}
-- **Description**: {description}
-
-## Code Analysis
-The following code snippet shows the vulnerable code with context:
-
-```solidity
-{code_snippet}
-```
-
-## Security Implications
-Category: {category}
-- This type of vulnerability can lead to various security issues
-- Lines {lines} contain the problematic code patterns
-- Immediate attention required for remediation
-
-## Recommended Mitigations
-Based on the vulnerability category "{category}", consider the following:
-1. Review the highlighted code sections carefully
-2. Apply security best practices for {category} vulnerabilities  
-3. Consider using established security libraries
-4. Implement proper access controls and validation
-
-## Learning Context
-This vulnerability was identified in the SmartBugs curated dataset, which contains
-real-world examples of smart contract security issues. Use this information to
-understand common vulnerability patterns and improve security analysis capabilities.
-
----
-Generated from SmartBugs dataset for RAG knowledge base
-"""
-        return document
+        return _DOCUMENT_TEMPLATE.format_map({
+            'contract_name': contract_name,
+            'path': contract_info.get('path', 'unknown'),
+            'total_vulnerabilities': len(contract_info.get('vulnerabilities', [])),
+            'category': category,
+            'severity': vulnerability.get('severity', 'medium'),
+            'lines': lines,
+            'description': description,
+            'code_snippet': code_snippet
+        })
     
-    def process_contract(self, contract_info: Dict[str, Any]) -> int:
-        """Process a single contract and create vulnerability documents"""
+    def record_contract_stats(self, vulnerabilities: List[Dict[str, Any]]):
+        """Update category and line statistics for a whole contract at once"""
+        self.stats['categories'].update(v.get('category', 'unknown') for v in vulnerabilities)
+        self.line_numbers.append(np.concatenate([
+            np.asarray(v.get('lines', []), dtype=np.int32) for v in vulnerabilities
+        ]))
+    
+    def process_contract(self, contract_info: Dict[str, Any],
+                         contract_code: Optional[ContractLines] = None) -> List[Dict[str, Any]]:
+        """
+        Process a single contract and create vulnerability documents
+        
+        Args:
+            contract_info: Contract entry from vulnerabilities.json
+            contract_code: Contract lines if already read (read from disk otherwise)
+        
+        Returns:
+            Knowledge base records, one per vulnerability
+        """
         contract_name = contract_info.get('name', 'unknown')
         contract_path = self.smartbugs_path / contract_info.get('path', '')
         vulnerabilities = contract_info.get('vulnerabilities', [])
         
         if not vulnerabilities:
-            logger.debug(f"No vulnerabilities found for contract: {contract_name}")
-            return 0
+            logger.debug("No vulnerabilities found for contract: %s", contract_name)
+            return []
         
         # Read contract code
-        contract_code = self.read_contract_code(contract_path)
+        if contract_code is None:
+            contract_code = self.read_contract_code(contract_path)
         if not contract_code:
-            logger.error(f"Could not read contract code for: {contract_name}")
+            logger.error("Could not read contract code for: %s", contract_name)
             self.stats['errors'] += 1
-            return 0
+            return []
+        
+        self.record_contract_stats(vulnerabilities)
         
-        documents_created = 0
+        documents = []
         
         for idx, vulnerability in enumerate(vulnerabilities):
             try:
                 category = vulnerability.get('category', 'unknown')
                 lines = vulnerability.get('lines', [])
                 
-                # Update category statistics
-                self.stats['categories'][category] = self.stats['categories'].get(category, 0) + 1
-                
                 # Extract code snippet
                 code_snippet = self.extract_code_snippet(contract_code, lines)
                 
@@ -209,29 +358,46 @@ Generated from SmartBugs dataset for RAG knowledge base
                     contract_name, vulnerability, code_snippet, contract_info
                 )
                 
-                # Create filename
+                # Create record name
                 line_range = f"{min(lines)}_{max(lines)}" if lines else "unknown"
-                filename = f"{contract_name}_{category}_{line_range}_{idx}.txt"
+                name = f"{contract_name}_{category}_{line_range}_{idx}"
                 
                 # Remove any invalid filename characters
-                filename = "".join(c for c in filename if c.isalnum() or c in "._-")
-                
-                # Save document
-                doc_path = self.knowledge_base_path / filename
-                with open(doc_path, 'w', encoding='utf-8') as f:
-                    f.write(document)
+                name = name.translate(_FILENAME_CHARS)
                 
-                documents_created += 1
-                logger.debug(f"Created document: {filename}")
+                documents.append({
+                    'name': name,
+                    'contract_name': contract_name,
+                    'contract_path': contract_info.get('path', ''),
+                    'category': category,
+                    'severity': vulnerability.get('severity', 'medium'),
+                    'lines': lines,
+                    'snippet': code_snippet,
+                    'document': document
+                })
                 
             except Exception as e:
-                logger.error(f"Error processing vulnerability {idx} in {contract_name}: {e}")
+                logger.error("Error processing vulnerability %d in %s: %s", idx, contract_name, e)
                 self.stats['errors'] += 1
         
-        return documents_created
+        # Keep records that share a name prefix (category, line range) adjacent
+        documents.sort(key=itemgetter('name'))
+        
+        return documents
     
-    def process_dataset(self) -> Dict[str, Any]:
-        """Process the entire SmartBugs dataset"""
+    def process_dataset(self, max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Process the entire SmartBugs dataset
+        
+        Contracts are independent, so they are processed in parallel by a pool
+        of worker processes. Their documents and statistics are merged back in
+        this process, which appends every document to a single JSONL file.
+        Contracts whose fingerprint matches the manifest of the last run keep
+        their previous records instead of being rebuilt.
+        
+        Args:
+            max_workers: Number of worker processes (default: CPU count)
+        """
         logger.info("Starting SmartBugs dataset processing...")
         
         if not self.validate_dataset():
@@ -244,25 +410,61 @@ Generated from SmartBugs dataset for RAG knowledge base
         
         self.stats['total_contracts'] = len(vulnerabilities)
         
-        # Process each contract
-        for contract_info in vulnerabilities:
-            try:
-                contract_name = contract_info.get('name', 'unknown')
-                logger.info(f"Processing contract: {contract_name}")
+        # Process contracts in parallel, in batches whose reads overlap
+        max_workers = max_workers or os.cpu_count() or 1
+        batch_size = min(READ_BATCH_SIZE, max(1, len(vulnerabilities) // (max_workers * 4)))
+        batches = [
+            vulnerabilities[i:i + batch_size]
+            for i in range(0, len(vulnerabilities), batch_size)
+        ]
+        
+        # Only contracts whose previous records are still on disk can be reused
+        manifest = self.load_manifest()
+        previous_documents = self.load_previous_documents() if manifest else {}
+        manifest = {
+            path: fingerprint for path, fingerprint in manifest.items()
+            if path in previous_documents
+        }
+        new_manifest = {}
+        
+        kb_file = self.knowledge_base_path / KNOWLEDGE_BASE_FILE
+        
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(str(self.smartbugs_path), str(self.knowledge_base_path), manifest)
+        ) as executor, open(kb_file, 'wb', buffering=1 << 20) as kb_fp:
+            results = (
+                result
+                for batch_results in executor.map(_process_batch_worker, batches)
+                for result in batch_results
+            )
+            
+            for contract_info, (documents, partial_stats) in zip(vulnerabilities, results):
+                logger.info("Processed contract: %s", contract_info.get('name', 'unknown'))
+                
+                contract_path = contract_info.get('path', '')
+                if documents is None:
+                    documents = previous_documents[contract_path]
+                    self.stats['unchanged_contracts'] += 1
+                
+                self.stats['errors'] += partial_stats['errors']
+                self.stats['categories'].update(partial_stats['categories'])
+                self.line_numbers.extend(partial_stats['line_numbers'])
                 
-                # Process vulnerabilities for this contract
-                docs_created = self.process_contract(contract_info)
+                for document in documents:
+                    kb_fp.write(orjson.dumps(document, option=orjson.OPT_APPEND_NEWLINE))
                 
-                if docs_created > 0:
+                if documents:
+                    new_manifest[contract_path] = partial_stats['fingerprint']
                     self.stats['processed_contracts'] += 1
-                    self.stats['created_documents'] += docs_created
+                    self.stats['created_documents'] += len(documents)
                     self.stats['total_vulnerabilities'] += len(contract_info.get('vulnerabilities', []))
-                
-            except Exception as e:
-                logger.error(f"Error processing contract {contract_info.get('name', 'unknown')}: {e}")
-                self.stats['errors'] += 1
+        
+        (self.knowledge_base_path / MANIFEST_FILE).write_bytes(orjson.dumps(new_manifest))
         
         # Log final statistics
+        self.stats['line_statistics'] = self.summarize_line_numbers()
         self.log_statistics()
         
         return {
@@ -270,6 +472,36 @@ Generated from SmartBugs dataset for RAG knowledge base
             "statistics": self.stats
         }
     
+    def summarize_line_numbers(self, bucket_size: int = 100) -> Dict[str, Any]:
+        """
+        Summarize the vulnerable line numbers of all processed contracts
+        
+        Args:
+            bucket_size: Width of the line ranges in the histogram
+        
+        Returns:
+            Minimum, maximum and median line plus a histogram of line ranges
+        """
+        if not self.line_numbers:
+            return {}
+        
+        lines = np.concatenate(self.line_numbers)
+        if lines.size == 0:
+            return {}
+        
+        counts = np.bincount(lines // bucket_size)
+        buckets = np.flatnonzero(counts)
+        
+        return {
+            'min_line': int(lines.min()),
+            'max_line': int(lines.max()),
+            'median_line': float(np.median(lines)),
+            'histogram': {
+                f"{bucket * bucket_size}-{(bucket + 1) * bucket_size - 1}": int(counts[bucket])
+                for bucket in buckets
+            }
+        }
+    
     def log_statistics(self):
         """Log processing statistics"""
         logger.info("=" * 60)
@@ -279,16 +511,88 @@ Generated from SmartBugs dataset for RAG knowledge base
         logger.info(f"Successfully processed contracts: {self.stats['processed_contracts']}")
         logger.info(f"Total vulnerabilities: {self.stats['total_vulnerabilities']}")
         logger.info(f"Documents created: {self.stats['created_documents']}")
+        logger.info(f"Unchanged contracts reused: {self.stats['unchanged_contracts']}")
         logger.info(f"Errors encountered: {self.stats['errors']}")
-        logger.info(f"Knowledge base path: {self.knowledge_base_path.absolute()}")
+        logger.info(f"Knowledge base file: {(self.knowledge_base_path / KNOWLEDGE_BASE_FILE).absolute()}")
         
         if self.stats['categories']:
             logger.info("\nVulnerability Categories:")
             for category, count in sorted(self.stats['categories'].items()):
                 logger.info(f"  - {category}: {count}")
         
+        line_statistics = self.stats.get('line_statistics')
+        if line_statistics:
+            logger.info(
+                f"\nVulnerable lines: min {line_statistics['min_line']}, "
+                f"max {line_statistics['max_line']}, median {line_statistics['median_line']}"
+            )
+            for line_range, count in line_statistics['histogram'].items():
+                logger.info(f"  - lines {line_range}: {count}")
+        
         logger.info("=" * 60)
 
+# Processor owned by each worker process, created once by the pool initializer
+_worker_processor: Optional[SmartBugsProcessor] = None
+
+# Contract fingerprints from the last run, shared with each worker process
+_worker_manifest: Dict[str, str] = {}
+
+def _init_worker(smartbugs_path: str, knowledge_base_path: str, manifest: Dict[str, str]):
+    """Create the processor used by this worker process"""
+    global _worker_processor, _worker_manifest
+    _worker_processor = SmartBugsProcessor(smartbugs_path, knowledge_base_path)
+    _worker_manifest = manifest
+
+def _process_contract_worker(contract_info: Dict[str, Any],
+                             contract_code: Optional[ContractLines] = None) -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, Any]]:
+    """
+    Process a single contract in a worker process
+    
+    Returns:
+        Documents created (None if the contract is unchanged since the last
+        run) and the statistics produced for this contract
+    """
+    processor = _worker_processor
+    processor.stats = {'errors': 0, 'categories': Counter()}
+    processor.line_numbers = []
+    fingerprint = None
+    
+    try:
+        contract_path = contract_info.get('path', '')
+        if contract_code is None:
+            contract_code = processor.read_contract_code(processor.smartbugs_path / contract_path)
+        
+        fingerprint = processor.fingerprint_contract(contract_info, contract_code)
+        if _worker_manifest.get(contract_path) == fingerprint:
+            processor.record_contract_stats(contract_info.get('vulnerabilities', []))
+            documents = None
+        else:
+            documents = processor.process_contract(contract_info, contract_code)
+    except Exception as e:
+        logger.error("Error processing contract %s: %s", contract_info.get('name', 'unknown'), e)
+        processor.stats['errors'] += 1
+        documents = []
+    
+    return documents, {
+        **processor.stats,
+        'line_numbers': processor.line_numbers,
+        'fingerprint': fingerprint,
+    }
+
+def _process_batch_worker(batch: List[Dict[str, Any]]) -> List[Tuple[Optional[List[Dict[str, Any]]], Dict[str, Any]]]:
+    """
+    Process a batch of contracts in a worker process
+    
+    The contract files of the batch are read concurrently before the
+    documents are built, so their disk reads overlap.
+    """
+    contract_codes = asyncio.run(_worker_processor.read_contract_codes(batch))
+    
+    return [
+        _process_contract_worker(contract_info, contract_code)
+        for contract_info, contract_code in zip(batch, contract_codes)
+    ]
+
 def main():
     """Main function to run the SmartBugs processing"""
     import argparse
@@ -298,6 +602,8 @@ def main():
                        help='Path to SmartBugs dataset (default: ./smartbugs-curated)')
     parser.add_argument('--knowledge-base-path', default='./data/knowledge_base',
                        help='Path to knowledge base directory (default: ./data/knowledge_base)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Number of worker processes (default: CPU count)')
     parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
                        help='Logging level (default: INFO)')
     
@@ -312,7 +618,7 @@ def main():
         knowledge_base_path=args.knowledge_base_path
     )
     
-    result = processor.process_dataset()
+    result = processor.process_dataset(max_workers=args.workers)
     
     if result["success"]:
         logger.info("SmartBugs dataset processing completed successfully!")
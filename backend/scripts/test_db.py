@@ -8,8 +8,8 @@ from pathlib import Path
 # Add the project root to the Python path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-from src.database.config import init_db, close_db, get_db
-from src.database.models import ContractAnalysis, Vulnerability
+from src.database.config import init_db, close_db, async_session_factory, get_pool
+from src.database.models import ContractAnalysis, Vulnerability, pack_document
 from src.utils.config import settings
 
 # Configure logging
@@ -19,6 +19,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+INSERT_ANALYSIS_SQL = """
+    INSERT INTO contract_analyses (
+        contract_address, network, timestamp, contract_name, compiler_version,
+        is_verified, security_score, static_analysis, dynamic_analysis
+    )
+    VALUES ($1, $2, now() at time zone 'utc', $3, $4, $5, $6, $7, $8)
+    RETURNING id
+"""
+
 async def test_connection():
     """Test database connection and basic operations."""
     logger.info("Testing database connection...")
@@ -28,6 +37,21 @@ async def test_connection():
         logger.info("Initializing database...")
         await init_db()
         
+        # Test a raw insert through the shared pool with a prepared statement
+        async with (await get_pool()).acquire() as conn:
+            stmt = await conn.prepare(INSERT_ANALYSIS_SQL)
+            raw_id = await stmt.fetchval(
+                "0x" + "2" * 40,
+                "mainnet",
+                "PooledTestContract",
+                "0.8.20",
+                False,
+                7.0,
+                pack_document({"checks": [], "status": "completed"}),
+                pack_document({"simulations": [], "status": "pending"}),
+            )
+            logger.info(f"Created analysis through pool with ID: {raw_id}")
+        
         # Test creating a new analysis
         async with async_session_factory() as session:
             # Create a test analysis
@@ -80,13 +104,16 @@ async def test_connection():
 if __name__ == "__main__":
     logger.info("Starting database test...")
     
-    # Create event loop and run the test
-    loop = asyncio.get_event_loop()
-    success = loop.run_until_complete(test_connection())
+    # Use uvloop's event loop where it is available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
+    success = asyncio.run(test_connection())
     
     if success:
         logger.info("Database test completed successfully!")
     else:
         logger.error("Database test failed!")
-    
-    loop.close()
@@ -9,9 +9,11 @@ from external sources like CVE databases, security blogs, and optimization patte
 import asyncio
 import json
 import os
+import time
+from collections import deque
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import aiohttp
 import feedparser
 import sys
@@ -21,9 +23,186 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from src.utils.logger import setup_logger
 from src.utils.config import settings
+from src.database.config import get_db, purge_expired_cache
+from src.utils.knowledge_base import UPDATES_KB_FILE, UPDATES_INDEX_FILE, append_records, read_index
 
 logger = setup_logger(__name__, log_level='INFO')
 
+# NVD's maximum page size, so most keywords fit in a single request
+CVE_RESULTS_PER_PAGE = 2000
+
+# NVD's public rate limits: requests per rolling window, without and with an API key
+CVE_RATE_LIMIT_WINDOW = 30.0
+CVE_RATE_LIMIT = 5
+CVE_RATE_LIMIT_WITH_KEY = 50
+
+# Knowledge base document layouts, parsed once and filled in per document
+_CVE_DOCUMENT_TEMPLATE = """# CVE Vulnerability Analysis: {cve_id}
+
+## Vulnerability Information
+- **CVE ID**: {cve_id}
+- **Severity**: {severity}
+- **Published**: {published}
+- **Last Modified**: {last_modified}
+
+## Description
+{description}
+
+## Security Implications
+This CVE represents a documented vulnerability that has been reported and analyzed by security researchers. Smart contracts should be evaluated against similar patterns to prevent similar vulnerabilities.
+
+## References
+- **CVE Database**: https://nvd.nist.gov/vuln/detail/{cve_id}
+- **MITRE**: https://cve.mitre.org/cgi-bin/cvename.cgi?name={cve_id}
+
+## Recommended Actions
+1. Review your smart contracts for similar vulnerability patterns
+2. Implement proper input validation and access controls
+3. Follow security best practices for smart contract development
+4. Consider professional security audits for critical contracts
+
+## Learning Context
+This vulnerability information comes from the National Vulnerability Database (NVD) and represents real-world security issues that have been identified and documented by the security community.
+
+---
+Generated from CVE database for Web3 Guardian knowledge base
+Last updated: {updated_at}
+"""
+
+_BLOG_DOCUMENT_TEMPLATE = """# Security Blog Analysis: {title}
+
+## Article Information
+- **Title**: {title}
+- **Published**: {published}
+- **Source**: ConsenSys Diligence Blog
+- **URL**: {link}
+
+## Content Summary
+{content}
+
+## Security Learning
+This content comes from security experts and represents current thinking on smart contract security practices. Use this information to stay updated on emerging threats and best practices.
+
+## Application to Smart Contracts
+Review the discussed concepts and consider how they apply to your smart contract development and security analysis processes.
+
+---
+Generated from security blog for Web3 Guardian knowledge base
+Last updated: {updated_at}
+"""
+
+_OPTIMIZATION_DOCUMENT_TEMPLATE = """# Gas Optimization Pattern: {title}
+
+## Optimization Details
+- **Pattern**: {title}
+- **Description**: {description}
+- **Estimated Savings**: {gas_savings}
+
+## Implementation Example
+```solidity
+{example}
+```
+
+## When to Apply
+This optimization should be considered when:
+1. Gas costs are a primary concern
+2. The pattern fits naturally into your contract design
+3. Security is not compromised by the optimization
+
+## Security Considerations
+Always ensure that optimizations do not introduce security vulnerabilities. Security should never be compromised for gas savings.
+
+## Learning Context
+This optimization pattern is derived from best practices in the Ethereum community and OpenZeppelin contracts. Regular application of these patterns can significantly reduce gas costs.
+
+---
+Generated from optimization patterns for Web3 Guardian knowledge base
+Last updated: {updated_at}
+"""
+
+# The patterns are constant, so their documents are rendered once at import
+_OPTIMIZATION_PATTERNS = [
+    {
+        "title": "Storage Packing",
+        "description": "Pack struct variables to minimize storage slots",
+        "example": "struct User { uint128 balance; uint128 timestamp; address wallet; }",
+        "gas_savings": "Up to 20,000 gas per storage slot saved"
+    },
+    {
+        "title": "Unchecked Arithmetic",
+        "description": "Use unchecked blocks for safe arithmetic operations",
+        "example": "unchecked { counter += 1; }",
+        "gas_savings": "~20 gas per operation"
+    },
+    {
+        "title": "Function Visibility",
+        "description": "Use external instead of public for functions only called externally",
+        "example": "function withdraw() external { ... }",
+        "gas_savings": "~20 gas per call"
+    },
+    {
+        "title": "Short-circuit Evaluation",
+        "description": "Order conditional checks by gas costs",
+        "example": "require(cheapCheck && expensiveCheck, 'Invalid');",
+        "gas_savings": "Variable, depends on check complexity"
+    }
+]
+
+def _render_optimization_document(pattern: Dict, updated_at: str) -> Tuple[str, str]:
+    """Render an optimization pattern as a (document name, document) pair"""
+    title = pattern['title']
+    doc_name = f"optimization_{title.lower().replace(' ', '_')}"
+    document = _OPTIMIZATION_DOCUMENT_TEMPLATE.format_map({
+        'title': title,
+        'description': pattern['description'],
+        'gas_savings': pattern['gas_savings'],
+        'example': pattern['example'],
+        'updated_at': updated_at
+    })
+    return doc_name, document
+
+_OPTIMIZATION_DOCS = tuple(
+    _render_optimization_document(pattern, datetime.utcnow().isoformat())
+    for pattern in _OPTIMIZATION_PATTERNS
+)
+
+class _TitleCharTable(dict):
+    """
+    str.translate table keeping alphanumerics, spaces, '-' and '_' and dropping the rest
+    
+    Entries are filled in on first use, so the table only ever holds the
+    characters that actually occur in titles.
+    """
+    
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        char = chr(codepoint)
+        value = codepoint if char.isalnum() or char in " -_" else None
+        self[codepoint] = value
+        return value
+
+_TITLE_CHARS = _TitleCharTable()
+
+class RateLimiter:
+    """Allows at most ``limit`` requests to start in any ``window`` seconds"""
+    
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._starts = deque()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until another request may start, then record its start"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._starts and self._starts[0] <= now - self.window:
+                    self._starts.popleft()
+                if len(self._starts) < self.limit:
+                    break
+                await asyncio.sleep(self._starts[0] + self.window - now)
+            self._starts.append(now)
+
 class KnowledgeBaseUpdater:
     """Automated knowledge base updater for Web3 Guardian"""
     
@@ -31,6 +210,19 @@ class KnowledgeBaseUpdater:
         self.knowledge_base_path = Path(knowledge_base_path or settings.KNOWLEDGE_BASE_PATH)
         self.knowledge_base_path.mkdir(parents=True, exist_ok=True)
         
+        # Names of documents already in the knowledge base, as .txt files or in the updates file
+        with os.scandir(self.knowledge_base_path) as entries:
+            self._existing_names = {
+                entry.name[:-len('.txt')] for entry in entries
+                if entry.is_file() and entry.name.endswith('.txt')
+            }
+        self._existing_names.update(
+            name for name, _, _ in read_index(self.knowledge_base_path / UPDATES_INDEX_FILE)
+        )
+        
+        # Documents created by this run, appended to the updates file by flush_documents()
+        self._doc_buffer: List[Dict[str, str]] = []
+        
         # External data sources
         self.cve_api_url = "https://services.nvd.nist.gov/rest/json/cves/2.0"
         self.consensys_rss = "https://consensys.net/diligence/blog/feed/"
@@ -40,9 +232,54 @@ class KnowledgeBaseUpdater:
             'cve_updates': 0,
             'blog_updates': 0,
             'pattern_updates': 0,
+            'cache_purged': 0,
             'total_documents': 0,
             'errors': 0
         }
+        
+        # Timestamp stamped on every document written by this run
+        self.updated_at = datetime.utcnow().isoformat()
+        
+        # Shared HTTP session, opened by ``async with``
+        self._session = None
+    
+    async def __aenter__(self):
+        """Open the HTTP session shared by all source fetches"""
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        """Write out this run's documents and close the shared HTTP session"""
+        await self.flush_documents()
+        
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def flush_documents(self):
+        """Append the documents created by this run to the updates file in one write"""
+        if not self._doc_buffer:
+            return
+        documents, self._doc_buffer = self._doc_buffer, []
+        
+        # Skip documents another run has appended since this one started
+        kb_file = self.knowledge_base_path / UPDATES_KB_FILE
+        index_file = self.knowledge_base_path / UPDATES_INDEX_FILE
+        existing = {name for name, _, _ in await asyncio.to_thread(read_index, index_file)}
+        documents = [document for document in documents if document['name'] not in existing]
+        
+        written = await asyncio.to_thread(append_records, kb_file, index_file, documents)
+        logger.info(f"Appended {written} documents to {kb_file}")
+    
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session; only available inside ``async with``"""
+        if self._session is None:
+            raise RuntimeError("KnowledgeBaseUpdater must be used as an async context manager")
+        return self._session
     
     async def update_all_sources(self) -> Dict[str, Any]:
         """Update knowledge base from all external sources"""
@@ -50,12 +287,18 @@ class KnowledgeBaseUpdater:
         
         try:
             # Run all updates concurrently
-            await asyncio.gather(
-                self.update_cve_data(),
-                self.update_security_blogs(),
-                self.update_optimization_patterns(),
-                return_exceptions=True
-            )
+            tasks = {
+                'cve': asyncio.create_task(self.update_cve_data()),
+                'blogs': asyncio.create_task(self.update_security_blogs()),
+                'patterns': asyncio.create_task(self.update_optimization_patterns()),
+                'cache': asyncio.create_task(self.purge_analysis_cache()),
+            }
+            results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+            
+            for source, result in zip(tasks, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"Update of {source} failed: {result}")
+                    self.stats['errors'] += 1
             
             self.log_update_statistics()
             
@@ -81,32 +324,68 @@ class KnowledgeBaseUpdater:
             # Search for smart contract related CVEs
             keywords = ["smart contract", "ethereum", "solidity", "defi", "blockchain"]
             
-            for keyword in keywords:
-                await self._fetch_cve_by_keyword(keyword)
+            # Fetch all keywords concurrently on the shared session, within NVD's rate limit
+            rate_limiter = RateLimiter(
+                CVE_RATE_LIMIT_WITH_KEY if settings.NVD_API_KEY else CVE_RATE_LIMIT,
+                CVE_RATE_LIMIT_WINDOW
+            )
+            results = await asyncio.gather(
+                *(self._fetch_cve_by_keyword(self.session, keyword, rate_limiter) for keyword in keywords),
+                return_exceptions=True
+            )
+            
+            for keyword, result in zip(keywords, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to fetch CVE data for keyword '{keyword}': {result}")
+                    self.stats['errors'] += 1
                 
         except Exception as e:
             logger.error(f"CVE update failed: {e}")
             self.stats['errors'] += 1
     
-    async def _fetch_cve_by_keyword(self, keyword: str):
-        """Fetch CVEs by keyword and create knowledge base documents"""
-        try:
-            async with aiohttp.ClientSession() as session:
-                params = {
-                    'keywordSearch': keyword,
-                    'resultsPerPage': 20,
-                    'startIndex': 0
-                }
-                
-                async with session.get(self.cve_api_url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        for cve in data.get('vulnerabilities', []):
-                            await self._process_cve(cve)
-                            
-        except Exception as e:
-            logger.error(f"Failed to fetch CVE data for keyword '{keyword}': {e}")
+    async def _fetch_cve_page(self, session: aiohttp.ClientSession, keyword: str,
+                              start_index: int, rate_limiter: RateLimiter) -> Dict:
+        """Fetch one page of CVEs matching a keyword
+        
+        Raises:
+            aiohttp.ClientResponseError: If NVD does not answer with 200, e.g. 403 when rate limited
+        """
+        params = {
+            'keywordSearch': keyword,
+            'resultsPerPage': CVE_RESULTS_PER_PAGE,
+            'startIndex': start_index
+        }
+        headers = {'apiKey': settings.NVD_API_KEY} if settings.NVD_API_KEY else None
+        
+        await rate_limiter.acquire()
+        async with session.get(self.cve_api_url, params=params, headers=headers) as response:
+            response.raise_for_status()
+            return await response.json()
+    
+    async def _fetch_cve_by_keyword(self, session: aiohttp.ClientSession, keyword: str,
+                                    rate_limiter: RateLimiter):
+        """Fetch all pages of CVEs for a keyword and create knowledge base documents"""
+        # The first page reports the total, then the remaining pages are fetched together
+        first_page = await self._fetch_cve_page(session, keyword, 0, rate_limiter)
+        total_results = first_page.get('totalResults', 0)
+        
+        pages = [first_page]
+        results = await asyncio.gather(*(
+            self._fetch_cve_page(session, keyword, start_index, rate_limiter)
+            for start_index in range(CVE_RESULTS_PER_PAGE, total_results, CVE_RESULTS_PER_PAGE)
+        ), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Failed to fetch a CVE page for keyword '{keyword}': {result}")
+                self.stats['errors'] += 1
+            else:
+                pages.append(result)
+        
+        await asyncio.gather(*(
+            self._process_cve(cve)
+            for page in pages
+            for cve in page.get('vulnerabilities', [])
+        ))
     
     async def _process_cve(self, cve_data: Dict):
         """Process a single CVE and create knowledge base document"""
@@ -115,11 +394,12 @@ class KnowledgeBaseUpdater:
             cve_id = cve_info.get('id', 'unknown')
             
             # Skip if document already exists
-            doc_filename = f"cve_{cve_id.lower().replace('-', '_')}.txt"
-            doc_path = self.knowledge_base_path / doc_filename
+            doc_name = f"cve_{cve_id.lower().replace('-', '_')}"
             
-            if doc_path.exists():
+            # Claim the name before any await so concurrent duplicates are skipped
+            if doc_name in self._existing_names:
                 return
+            self._existing_names.add(doc_name)
             
             # Extract vulnerability information
             descriptions = cve_info.get('descriptions', [])
@@ -140,44 +420,20 @@ class KnowledgeBaseUpdater:
                     severity = 'low'
             
             # Create structured document
-            document = f"""# CVE Vulnerability Analysis: {cve_id}
-
-## Vulnerability Information
-- **CVE ID**: {cve_id}
-- **Severity**: {severity}
-- **Published**: {cve_info.get('published', 'Unknown')}
-- **Last Modified**: {cve_info.get('lastModified', 'Unknown')}
-
-## Description
-{description}
-
-## Security Implications
-This CVE represents a documented vulnerability that has been reported and analyzed by security researchers. Smart contracts should be evaluated against similar patterns to prevent similar vulnerabilities.
-
-## References
-- **CVE Database**: https://nvd.nist.gov/vuln/detail/{cve_id}
-- **MITRE**: https://cve.mitre.org/cgi-bin/cvename.cgi?name={cve_id}
-
-## Recommended Actions
-1. Review your smart contracts for similar vulnerability patterns
-2. Implement proper input validation and access controls
-3. Follow security best practices for smart contract development
-4. Consider professional security audits for critical contracts
-
-## Learning Context
-This vulnerability information comes from the National Vulnerability Database (NVD) and represents real-world security issues that have been identified and documented by the security community.
-
----
-Generated from CVE database for Web3 Guardian knowledge base
-Last updated: {datetime.utcnow().isoformat()}
-"""
+            document = _CVE_DOCUMENT_TEMPLATE.format_map({
+                'cve_id': cve_id,
+                'severity': severity,
+                'published': cve_info.get('published', 'Unknown'),
+                'last_modified': cve_info.get('lastModified', 'Unknown'),
+                'description': description,
+                'updated_at': self.updated_at
+            })
             
-            # Save document
-            with open(doc_path, 'w', encoding='utf-8') as f:
-                f.write(document)
+            # Queue the document; it is written with the rest of the run
+            self._doc_buffer.append({'name': doc_name, 'source': 'cve_database', 'document': document})
             
             self.stats['cve_updates'] += 1
-            logger.debug(f"Created CVE document: {doc_filename}")
+            logger.debug(f"Created CVE document: {doc_name}")
             
         except Exception as e:
             logger.error(f"Failed to process CVE: {e}")
@@ -188,11 +444,19 @@ Last updated: {datetime.utcnow().isoformat()}
         logger.info("Updating security blog data...")
         
         try:
-            # Parse ConsenSys Diligence blog RSS
-            feed = feedparser.parse(self.consensys_rss)
+            # Fetch ConsenSys Diligence blog RSS on the shared session
+            async with self.session.get(
+                self.consensys_rss, timeout=aiohttp.ClientTimeout(total=15)
+            ) as response:
+                response.raise_for_status()
+                body = await response.read()
+            
+            # Parsing the feed is CPU work, so keep it off the event loop
+            feed = await asyncio.to_thread(feedparser.parse, body)
             
-            for entry in feed.entries[:10]:  # Latest 10 posts
-                await self._process_blog_post(entry)
+            await asyncio.gather(
+                *(self._process_blog_post(entry) for entry in feed.entries[:10])  # Latest 10 posts
+            )
                 
         except Exception as e:
             logger.error(f"Security blog update failed: {e}")
@@ -204,46 +468,31 @@ Last updated: {datetime.utcnow().isoformat()}
             title = entry.title
             content = entry.summary
             link = entry.link
-            published = getattr(entry, 'published', datetime.utcnow().isoformat())
+            published = getattr(entry, 'published', self.updated_at)
             
-            # Create filename from title
-            safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            filename = f"blog_{safe_title[:50].replace(' ', '_').lower()}.txt"
-            doc_path = self.knowledge_base_path / filename
+            # Create document name from title
+            safe_title = title.translate(_TITLE_CHARS).rstrip()
+            doc_name = f"blog_{safe_title[:50].replace(' ', '_').lower()}"
             
             # Skip if document already exists
-            if doc_path.exists():
+            if doc_name in self._existing_names:
                 return
+            self._existing_names.add(doc_name)
             
             # Create structured document
-            document = f"""# Security Blog Analysis: {title}
-
-## Article Information
-- **Title**: {title}
-- **Published**: {published}
-- **Source**: ConsenSys Diligence Blog
-- **URL**: {link}
-
-## Content Summary
-{content}
-
-## Security Learning
-This content comes from security experts and represents current thinking on smart contract security practices. Use this information to stay updated on emerging threats and best practices.
-
-## Application to Smart Contracts
-Review the discussed concepts and consider how they apply to your smart contract development and security analysis processes.
-
----
-Generated from security blog for Web3 Guardian knowledge base
-Last updated: {datetime.utcnow().isoformat()}
-"""
+            document = _BLOG_DOCUMENT_TEMPLATE.format_map({
+                'title': title,
+                'published': published,
+                'link': link,
+                'content': content,
+                'updated_at': self.updated_at
+            })
             
-            # Save document
-            with open(doc_path, 'w', encoding='utf-8') as f:
-                f.write(document)
+            # Queue the document; it is written with the rest of the run
+            self._doc_buffer.append({'name': doc_name, 'source': 'security_blog', 'document': document})
             
             self.stats['blog_updates'] += 1
-            logger.debug(f"Created blog document: {filename}")
+            logger.debug(f"Created blog document: {doc_name}")
             
         except Exception as e:
             logger.error(f"Failed to process blog post: {e}")
@@ -254,89 +503,31 @@ Last updated: {datetime.utcnow().isoformat()}
         logger.info("Updating optimization patterns...")
         
         try:
-            optimization_patterns = [
-                {
-                    "title": "Storage Packing",
-                    "description": "Pack struct variables to minimize storage slots",
-                    "example": "struct User { uint128 balance; uint128 timestamp; address wallet; }",
-                    "gas_savings": "Up to 20,000 gas per storage slot saved"
-                },
-                {
-                    "title": "Unchecked Arithmetic",
-                    "description": "Use unchecked blocks for safe arithmetic operations",
-                    "example": "unchecked { counter += 1; }",
-                    "gas_savings": "~20 gas per operation"
-                },
-                {
-                    "title": "Function Visibility",
-                    "description": "Use external instead of public for functions only called externally",
-                    "example": "function withdraw() external { ... }",
-                    "gas_savings": "~20 gas per call"
-                },
-                {
-                    "title": "Short-circuit Evaluation",
-                    "description": "Order conditional checks by gas costs",
-                    "example": "require(cheapCheck && expensiveCheck, 'Invalid');",
-                    "gas_savings": "Variable, depends on check complexity"
-                }
-            ]
-            
-            for pattern in optimization_patterns:
-                await self._create_optimization_document(pattern)
+            for doc_name, document in _OPTIMIZATION_DOCS:
+                # Skip if document already exists
+                if doc_name in self._existing_names:
+                    continue
+                self._existing_names.add(doc_name)
+                
+                # Queue the document; it is written with the rest of the run
+                self._doc_buffer.append({'name': doc_name, 'source': 'optimization_pattern', 'document': document})
+                
+                self.stats['pattern_updates'] += 1
+                logger.debug(f"Queued optimization document: {doc_name}")
                 
         except Exception as e:
             logger.error(f"Optimization patterns update failed: {e}")
             self.stats['errors'] += 1
     
-    async def _create_optimization_document(self, pattern: Dict):
-        """Create an optimization pattern document"""
+    async def purge_analysis_cache(self):
+        """Delete expired analysis cache rows"""
+        logger.info("Purging expired analysis cache...")
+        
         try:
-            title = pattern['title']
-            filename = f"optimization_{title.lower().replace(' ', '_')}.txt"
-            doc_path = self.knowledge_base_path / filename
-            
-            # Skip if document already exists
-            if doc_path.exists():
-                return
-            
-            document = f"""# Gas Optimization Pattern: {title}
-
-## Optimization Details
-- **Pattern**: {title}
-- **Description**: {pattern['description']}
-- **Estimated Savings**: {pattern['gas_savings']}
-
-## Implementation Example
-```solidity
-{pattern['example']}
-```
-
-## When to Apply
-This optimization should be considered when:
-1. Gas costs are a primary concern
-2. The pattern fits naturally into your contract design
-3. Security is not compromised by the optimization
-
-## Security Considerations
-Always ensure that optimizations do not introduce security vulnerabilities. Security should never be compromised for gas savings.
-
-## Learning Context
-This optimization pattern is derived from best practices in the Ethereum community and OpenZeppelin contracts. Regular application of these patterns can significantly reduce gas costs.
-
----
-Generated from optimization patterns for Web3 Guardian knowledge base
-Last updated: {datetime.utcnow().isoformat()}
-"""
-            
-            # Save document
-            with open(doc_path, 'w', encoding='utf-8') as f:
-                f.write(document)
-            
-            self.stats['pattern_updates'] += 1
-            logger.debug(f"Created optimization document: {filename}")
-            
+            async with get_db() as session:
+                self.stats['cache_purged'] = await purge_expired_cache(session)
         except Exception as e:
-            logger.error(f"Failed to create optimization document: {e}")
+            logger.error(f"Analysis cache purge failed: {e}")
             self.stats['errors'] += 1
     
     def log_update_statistics(self):
@@ -347,6 +538,7 @@ Last updated: {datetime.utcnow().isoformat()}
         logger.info(f"CVE updates: {self.stats['cve_updates']}")
         logger.info(f"Blog updates: {self.stats['blog_updates']}")
         logger.info(f"Pattern updates: {self.stats['pattern_updates']}")
+        logger.info(f"Expired cache entries purged: {self.stats['cache_purged']}")
         logger.info(f"Total new documents: {sum([self.stats['cve_updates'], self.stats['blog_updates'], self.stats['pattern_updates']])}")
         logger.info(f"Errors encountered: {self.stats['errors']}")
         logger.info(f"Knowledge base path: {self.knowledge_base_path.absolute()}")
@@ -361,25 +553,27 @@ async def main():
                        default=None,
                        help='Path to knowledge base directory')
     parser.add_argument('--source', 
-                       choices=['all', 'cve', 'blogs', 'patterns'],
+                       choices=['all', 'cve', 'blogs', 'patterns', 'cache'],
                        default='all',
                        help='Which sources to update')
     
     args = parser.parse_args()
     
-    updater = KnowledgeBaseUpdater(args.knowledge_base_path)
-    
-    if args.source == 'all':
-        result = await updater.update_all_sources()
-    elif args.source == 'cve':
-        await updater.update_cve_data()
-        result = {"success": True, "statistics": updater.stats}
-    elif args.source == 'blogs':
-        await updater.update_security_blogs()
-        result = {"success": True, "statistics": updater.stats}
-    elif args.source == 'patterns':
-        await updater.update_optimization_patterns()
-        result = {"success": True, "statistics": updater.stats}
+    async with KnowledgeBaseUpdater(args.knowledge_base_path) as updater:
+        if args.source == 'all':
+            result = await updater.update_all_sources()
+        elif args.source == 'cve':
+            await updater.update_cve_data()
+            result = {"success": True, "statistics": updater.stats}
+        elif args.source == 'blogs':
+            await updater.update_security_blogs()
+            result = {"success": True, "statistics": updater.stats}
+        elif args.source == 'patterns':
+            await updater.update_optimization_patterns()
+            result = {"success": True, "statistics": updater.stats}
+        elif args.source == 'cache':
+            await updater.purge_analysis_cache()
+            result = {"success": True, "statistics": updater.stats}
     
     if result["success"]:
         logger.info("Knowledge base update completed successfully!")
@@ -1,13 +1,25 @@
+# Import database configuration first; it registers the models on Base
+from .config import (  # noqa
+    Base,
+    engine,
+    async_session_factory,
+    get_db,
+    get_pool,
+    get_analysis_cache,
+    purge_expired_cache,
+)
+
 # Import models to make them available when importing from .models
 from .models import ContractAnalysis, Vulnerability, AnalysisCache  # noqa
 
-# Import database configuration
-from .config import Base, engine, get_db  # noqa
-
 __all__ = [
     'Base',
     'engine',
+    'async_session_factory',
     'get_db',
+    'get_pool',
+    'get_analysis_cache',
+    'purge_expired_cache',
     'ContractAnalysis',
     'Vulnerability',
     'AnalysisCache',
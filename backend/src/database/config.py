@@ -1,10 +1,13 @@
 import logging
-from typing import AsyncGenerator, TypeVar, Type, Any
+from datetime import datetime
+from typing import AsyncGenerator, TypeVar, Type, Any, Optional, Dict
+import asyncpg
+from cachetools import TTLCache
 from contextlib import asynccontextmanager
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from sqlalchemy.pool import NullPool
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
 from ..utils.config import settings
 
 # Configure logging
@@ -17,12 +20,18 @@ engine = create_async_engine(
     DATABASE_URL,
     echo=settings.DEBUG,
     future=True,
-    pool_pre_ping=True,
+    pool_pre_ping=False,  # Avoid a SELECT 1 round trip on every checkout
     pool_recycle=300,  # Recycle connections after 5 minutes
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
+    pool_size=20,
+    max_overflow=0,  # No burst connections, so every connection keeps a warm statement cache
+    pool_timeout=10,  # Fail fast when the pool is exhausted
     pool_use_lifo=True,  # Use LIFO queue for better performance
+    connect_args={
+        # Keep each connection's prepared statements so repeated queries skip PREPARE
+        "prepared_statement_cache_size": 512,
+        # Let TCP keepalives detect dead connections instead of pre-ping
+        "server_settings": {"tcp_keepalives_idle": "60"},
+    },
 )
 
 # Create async session factory with improved configuration
@@ -35,6 +44,12 @@ async_session_factory = async_sessionmaker(
     future=True,
 )
 
+# Shared asyncpg pool for raw queries that don't need the ORM (created on first use)
+_pool: Optional[asyncpg.Pool] = None
+
+# Recently read AnalysisCache entries as (data, expires_at), keyed by cache_key
+_analysis_cache_hot: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
 # Base class for models
 Base = declarative_base()
 
@@ -53,6 +68,9 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
         await session.commit()
     except SQLAlchemyError as e:
+        if isinstance(e, DBAPIError) and e.connection_invalidated:
+            # The pool has already discarded the connection; the next session gets a fresh one
+            logger.warning("Database connection was lost and has been invalidated")
         logger.error(f"Database error occurred: {e}")
         await session.rollback()
         raise
@@ -60,6 +78,47 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         await session.close()
         logger.debug("Database session closed")
 
+async def get_pool() -> asyncpg.Pool:
+    """Get the shared asyncpg connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            settings.SYNC_DATABASE_URL,
+            min_size=1,
+            max_size=5,
+            max_inactive_connection_lifetime=300,
+        )
+        logger.info("Database connection pool created")
+    return _pool
+
+async def get_analysis_cache(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Get unexpired cached analysis data, serving hot keys from memory."""
+    hot = _analysis_cache_hot.get(cache_key)
+    if hot is None:
+        async with async_session_factory() as session:
+            result = await session.execute(
+                select(AnalysisCache.data, AnalysisCache.expires_at)
+                .where(AnalysisCache.cache_key == cache_key)
+            )
+            row = result.first()
+        if row is None:
+            return None
+        hot = _analysis_cache_hot[cache_key] = (row.data, row.expires_at)
+    
+    data, expires_at = hot
+    if expires_at is not None and expires_at <= datetime.utcnow():
+        _analysis_cache_hot.pop(cache_key, None)
+        return None
+    return data
+
+async def purge_expired_cache(session: AsyncSession) -> int:
+    """Delete expired AnalysisCache rows in one statement, returning how many were removed."""
+    result = await session.execute(text(
+        "DELETE FROM analysis_cache "
+        "WHERE expires_at IS NOT NULL AND expires_at < (now() AT TIME ZONE 'utc')"
+    ))
+    return result.rowcount
+
 async def init_db() -> None:
     """Initialize database tables."""
     async with engine.begin() as conn:
@@ -68,6 +127,10 @@ async def init_db() -> None:
 
 async def close_db() -> None:
     """Close database connections."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
     if engine is not None:
         await engine.dispose()
         logger.info("Database connections closed")
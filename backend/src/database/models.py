@@ -1,23 +1,61 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from sqlalchemy import Column, String, Text, JSON, DateTime, Integer, ForeignKey
+import msgpack
+import zstandard
+from sqlalchemy import Column, String, Text, JSON, DateTime, Integer, ForeignKey, Index, LargeBinary, Computed, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
 
 from .config import Base
 
+_compressor = zstandard.ZstdCompressor()
+_decompressor = zstandard.ZstdDecompressor()
+
+def pack_document(value: Any) -> bytes:
+    """Serialize a JSON-like value as zstd-compressed msgpack."""
+    return _compressor.compress(msgpack.packb(value, default=str))
+
+def unpack_document(data: bytes) -> Any:
+    """Deserialize a value written by pack_document."""
+    return msgpack.unpackb(_decompressor.decompress(data), strict_map_key=False)
+
+class CompressedMsgpack(TypeDecorator):
+    """Opaque JSON-like document stored as zstd-compressed msgpack in a BYTEA column."""
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        return None if value is None else pack_document(value)
+    
+    def process_result_value(self, value: Optional[bytes], dialect) -> Any:
+        return None if value is None else unpack_document(value)
+
 class ContractAnalysis(Base):
     """Model for storing smart contract analysis results."""
     __tablename__ = "contract_analyses"
+    __table_args__ = (
+        # Latest analysis of an address on a network, without a sort
+        Index("ix_analysis_addr_net_ts", "contract_address", "network", text("timestamp DESC")),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    contract_address: Mapped[str] = mapped_column(String(42), index=True, nullable=False)
+    contract_address: Mapped[str] = mapped_column(String(42), nullable=False)
+    # 20-byte form of the address for compact equality lookups (NULL if not 0x + 40 hex digits)
+    contract_address_bytes: Mapped[Optional[bytes]] = mapped_column(
+        LargeBinary(20),
+        Computed(
+            "CASE WHEN contract_address ~ '^0x[0-9a-fA-F]{40}$' "
+            "THEN decode(substr(contract_address, 3), 'hex') END",
+            persisted=True,
+        ),
+        index=True,
+    )
     network: Mapped[str] = mapped_column(String(50), default="mainnet")
     timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     
     # Analysis results
-    static_analysis: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
-    dynamic_analysis: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
+    static_analysis: Mapped[Optional[Dict[str, Any]]] = mapped_column(CompressedMsgpack, nullable=True)
+    dynamic_analysis: Mapped[Optional[Dict[str, Any]]] = mapped_column(CompressedMsgpack, nullable=True)
     security_score: Mapped[Optional[float]] = mapped_column(nullable=True)
     
     # Additional metadata
@@ -30,6 +68,11 @@ class ContractAnalysis(Base):
         "Vulnerability", back_populates="analysis", cascade="all, delete-orphan"
     )
     
+    @classmethod
+    def address_matches(cls, address: str):
+        """Filter on an 0x-prefixed address using the indexed 20-byte column."""
+        return cls.contract_address_bytes == bytes.fromhex(address[2:])
+    
     def __repr__(self) -> str:
         return f"<ContractAnalysis {self.contract_address} on {self.network}>"
 
@@ -37,6 +80,10 @@ class ContractAnalysis(Base):
 class Vulnerability(Base):
     """Model for storing individual vulnerabilities found in contracts."""
     __tablename__ = "vulnerabilities"
+    __table_args__ = (
+        # High severity findings per analysis; the partial index only holds those rows
+        Index("ix_vuln_high_sev", "analysis_id", postgresql_where=text("severity = 'high'")),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     analysis_id: Mapped[int] = mapped_column(
@@ -67,10 +114,14 @@ class Vulnerability(Base):
 class AnalysisCache(Base):
     """Model for caching analysis results to avoid redundant processing."""
     __tablename__ = "analysis_cache"
+    __table_args__ = (
+        # Rows are written in expiry order, so a BRIN index stays tiny and serves purges
+        Index("ix_cache_expires_brin", "expires_at", postgresql_using="brin"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     cache_key: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
-    data: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    data: Mapped[Dict[str, Any]] = mapped_column(CompressedMsgpack, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
@@ -1,21 +1,285 @@
+import asyncio
+import time
 from typing import Dict, Any, Optional, List, Tuple
+import httpx
 from web3 import Web3
 import logging
 
 logger = logging.getLogger(__name__)
 
+# How long fetched fees are reused; well below the ~12s block time
+FEE_CACHE_TTL = 3.0
+
+# Priority fee is the median over recent blocks of this reward percentile
+FEE_HISTORY_BLOCKS = 5
+FEE_HISTORY_PERCENTILE = 50
+
+# After a failed batch request, single calls are used for this long before batching again
+BATCH_RETRY_COOLDOWN = 300.0
+
 class GasOptimizer:
     """Handles gas optimization for transactions."""
     
-    def __init__(self, web3: Web3, max_priority_fee_per_gas: int = 2 * 10**9):
+    def __init__(
+        self,
+        web3: Web3,
+        max_priority_fee_per_gas: int = 2 * 10**9,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
         """Initialize the gas optimizer.
         
         Args:
             web3: Web3 instance
-            max_priority_fee_per_gas: Default max priority fee per gas in wei
+            max_priority_fee_per_gas: Max priority fee per gas in wei, used when
+                the network's fee history is unavailable
+            http_client: Shared async HTTP client for batched JSON-RPC calls. If not
+                provided, a client owned by this instance is created.
         """
         self.web3 = web3
         self.max_priority_fee_per_gas = max_priority_fee_per_gas
+        self._owns_http_client = http_client is None
+        # Keep-alive pool sized for bursts of concurrent RPC batches; retry failed connects
+        self.http_client = http_client or httpx.AsyncClient(
+            timeout=10.0,
+            transport=httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=16),
+                retries=2
+            )
+        )
+        # Set when a batch request fails, so later calls skip straight to single calls for a while
+        self._batch_disabled_until = 0.0
+        
+        # (expires_at, gas_price, base_fee, priority_fee) of the last fee fetch, shared by concurrent calls
+        self._fee_cache: Optional[Tuple[float, int, int, int]] = None
+        self._fee_lock = asyncio.Lock()
+    
+    @property
+    def _batch_supported(self) -> bool:
+        """Whether to try a batch request; False during the cooldown after a failed batch."""
+        return time.monotonic() >= self._batch_disabled_until
+    
+    async def close(self):
+        """Close the HTTP client if this instance owns it."""
+        if self._owns_http_client:
+            await self.http_client.aclose()
+    
+    @staticmethod
+    def _to_rpc_tx(tx_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Encode integer transaction fields as hex quantities for JSON-RPC."""
+        return {
+            key: hex(value) if isinstance(value, int) else value
+            for key, value in tx_params.items()
+        }
+    
+    def _provider_request_kwargs(self) -> Dict[str, Any]:
+        """Headers, auth and timeout configured on the web3 HTTP provider, as httpx arguments.
+        
+        HTTPProvider takes requests-style ``request_kwargs``; the ones httpx
+        accepts per request are forwarded so the batch reaches the endpoint
+        with the same credentials as single calls.
+        """
+        get_request_kwargs = getattr(self.web3.provider, 'get_request_kwargs', None)
+        if get_request_kwargs is None:
+            return {}
+        
+        provider_kwargs = dict(get_request_kwargs())
+        kwargs = {key: provider_kwargs[key] for key in ('headers', 'cookies') if key in provider_kwargs}
+        if isinstance(provider_kwargs.get('auth'), tuple):
+            kwargs['auth'] = provider_kwargs['auth']
+        
+        timeout = provider_kwargs.get('timeout')
+        if isinstance(timeout, tuple):
+            # requests' (connect, read) pair
+            kwargs['timeout'] = httpx.Timeout(timeout[1], connect=timeout[0])
+        elif timeout is not None:
+            kwargs['timeout'] = timeout
+        return kwargs
+    
+    async def _batch_request(self, calls: List[Tuple[str, List[Any]]]) -> List[Dict[str, Any]]:
+        """Send JSON-RPC calls to the provider as a single batch.
+        
+        Any failure starts BATCH_RETRY_COOLDOWN, during which callers use single calls.
+        
+        Args:
+            calls: (method, params) pairs
+            
+        Returns:
+            The response object of each call, in call order
+            
+        Raises:
+            ValueError: If the provider has no HTTP endpoint or rejects the batch
+            httpx.HTTPError: If the request fails
+        """
+        try:
+            endpoint = getattr(self.web3.provider, 'endpoint_uri', None)
+            if not endpoint:
+                raise ValueError("Provider does not expose an HTTP endpoint")
+            
+            payload = [
+                {"jsonrpc": "2.0", "id": call_id, "method": method, "params": params}
+                for call_id, (method, params) in enumerate(calls)
+            ]
+            response = await self.http_client.post(
+                str(endpoint), json=payload, **self._provider_request_kwargs()
+            )
+            response.raise_for_status()
+            
+            replies = response.json()
+            if not isinstance(replies, list):
+                raise ValueError(f"Batch request rejected: {replies}")
+        except (httpx.HTTPError, ValueError):
+            self._batch_disabled_until = time.monotonic() + BATCH_RETRY_COOLDOWN
+            raise
+        
+        by_id = {reply.get('id'): reply for reply in replies}
+        return [by_id.get(call_id, {'error': 'missing response'}) for call_id in range(len(calls))]
+    
+    def _fetch_network_gas_legacy(
+        self,
+        tx_params: Dict[str, Any],
+        estimate: bool
+    ) -> Tuple[int, int, int, Optional[int]]:
+        """Fetch gas price, base fee, priority fee and gas estimate with one call each."""
+        gas_price = self.web3.eth.gas_price
+        latest_block = self.web3.eth.get_block('latest')
+        base_fee = latest_block.get('baseFeePerGas', gas_price)
+        
+        try:
+            fee_history = self.web3.eth.fee_history(FEE_HISTORY_BLOCKS, 'latest', [FEE_HISTORY_PERCENTILE])
+            priority_fee = self._median_priority_fee(fee_history.get('reward'))
+        except Exception as e:
+            logger.debug(f"Failed to fetch fee history: {str(e)}")
+            priority_fee = self.max_priority_fee_per_gas
+        
+        gas = None
+        if estimate:
+            try:
+                gas = self.web3.eth.estimate_gas(tx_params)
+            except Exception as e:
+                logger.warning(f"Failed to estimate gas: {str(e)}")
+        
+        return gas_price, base_fee, priority_fee, gas
+    
+    def _median_priority_fee(self, rewards: Optional[List[List[Any]]]) -> int:
+        """Median of the per-block priority fee percentiles from eth_feeHistory.
+        
+        Falls back to max_priority_fee_per_gas when the history has no rewards.
+        """
+        fees = sorted(
+            int(block_rewards[0], 16) if isinstance(block_rewards[0], str) else int(block_rewards[0])
+            for block_rewards in rewards or []
+            if block_rewards
+        )
+        if not fees:
+            return self.max_priority_fee_per_gas
+        return fees[len(fees) // 2]
+    
+    async def _request_network_gas(
+        self,
+        tx_params: Dict[str, Any],
+        estimate: bool
+    ) -> Tuple[int, int, int, Optional[int]]:
+        """Request gas price, base fee, priority fee and, if requested, a gas estimate.
+        
+        The calls go out as one JSON-RPC batch, so they cost a single round trip.
+        Providers that cannot take a batch are queried one call at a time.
+        
+        Args:
+            tx_params: Transaction parameters to estimate gas for
+            estimate: Whether to estimate gas
+            
+        Returns:
+            Tuple of (gas price, base fee, priority fee, gas estimate or None if it failed)
+        """
+        calls = [
+            ("eth_gasPrice", []),
+            ("eth_getBlockByNumber", ["latest", False]),
+            ("eth_feeHistory", [hex(FEE_HISTORY_BLOCKS), "latest", [FEE_HISTORY_PERCENTILE]]),
+        ]
+        if estimate:
+            calls.append(("eth_estimateGas", [self._to_rpc_tx(tx_params)]))
+        
+        if not self._batch_supported:
+            return await asyncio.to_thread(self._fetch_network_gas_legacy, tx_params, estimate)
+        
+        try:
+            replies = await self._batch_request(calls)
+            gas_price = int(replies[0]['result'], 16)
+            latest_block = replies[1]['result']
+        except Exception as e:
+            logger.debug(f"Batch JSON-RPC request failed, using single calls: {str(e)}")
+            return await asyncio.to_thread(self._fetch_network_gas_legacy, tx_params, estimate)
+        
+        base_fee = int(latest_block['baseFeePerGas'], 16) if latest_block.get('baseFeePerGas') else gas_price
+        
+        # Providers without eth_feeHistory fall back to the configured priority fee
+        fee_history = replies[2].get('result') or {}
+        priority_fee = self._median_priority_fee(fee_history.get('reward'))
+        
+        gas = None
+        if estimate:
+            if 'result' in replies[3]:
+                gas = int(replies[3]['result'], 16)
+            else:
+                logger.warning(f"Failed to estimate gas: {replies[3].get('error')}")
+        
+        return gas_price, base_fee, priority_fee, gas
+    
+    async def _estimate_gas(self, tx_params: Dict[str, Any]) -> Optional[int]:
+        """Estimate gas for a transaction, returning None if estimation fails."""
+        if self._batch_supported:
+            try:
+                reply = (await self._batch_request([("eth_estimateGas", [self._to_rpc_tx(tx_params)])]))[0]
+                if 'result' in reply:
+                    return int(reply['result'], 16)
+                logger.warning(f"Failed to estimate gas: {reply.get('error')}")
+                return None
+            except Exception as e:
+                logger.debug(f"Batch JSON-RPC request failed, using single calls: {str(e)}")
+        
+        try:
+            return await asyncio.to_thread(self.web3.eth.estimate_gas, tx_params)
+        except Exception as e:
+            logger.warning(f"Failed to estimate gas: {str(e)}")
+            return None
+    
+    def _cached_fees(self) -> Optional[Tuple[int, int, int]]:
+        """Return the cached (gas price, base fee, priority fee) if it has not expired."""
+        if self._fee_cache is None:
+            return None
+        expires_at, *fees = self._fee_cache
+        if time.monotonic() >= expires_at:
+            return None
+        return tuple(fees)
+    
+    async def _fetch_network_gas(
+        self,
+        tx_params: Dict[str, Any],
+        estimate: bool
+    ) -> Tuple[int, int, int, Optional[int]]:
+        """Get gas price, base fee, priority fee and, if requested, a gas estimate.
+        
+        Fees are reused for FEE_CACHE_TTL seconds, so bursts of transactions in the
+        same block only fetch them once. Concurrent callers wait on a single refresh.
+        
+        Args:
+            tx_params: Transaction parameters to estimate gas for
+            estimate: Whether to estimate gas
+            
+        Returns:
+            Tuple of (gas price, base fee, priority fee, gas estimate or None if it failed)
+        """
+        fees = self._cached_fees()
+        if fees is None:
+            async with self._fee_lock:
+                fees = self._cached_fees()
+                if fees is None:
+                    gas_price, base_fee, priority_fee, gas = await self._request_network_gas(tx_params, estimate)
+                    self._fee_cache = (time.monotonic() + FEE_CACHE_TTL, gas_price, base_fee, priority_fee)
+                    return gas_price, base_fee, priority_fee, gas
+        
+        gas = await self._estimate_gas(tx_params) if estimate else None
+        return fees[0], fees[1], fees[2], gas
     
     async def optimize_gas(self, tx_params: Dict[str, Any]) -> Dict[str, Any]:
         """Optimize gas parameters for a transaction.
@@ -30,32 +294,25 @@ class GasOptimizer:
             # Make a copy of the original parameters
             optimized = tx_params.copy()
             
-            # Get current gas price from the network
-            current_gas_price = self.web3.eth.gas_price
-            
-            # Get base fee from the latest block
-            latest_block = self.web3.eth.get_block('latest')
-            base_fee = latest_block.get('baseFeePerGas', current_gas_price)
+            # Get gas price, base fee and gas estimate, reusing recent fees
+            estimate = 'gas' not in tx_params
+            current_gas_price, base_fee, priority_fee, estimated_gas = await self._fetch_network_gas(tx_params, estimate)
             
             # Set maxFeePerGas (base fee + priority fee)
-            max_fee_per_gas = base_fee + self.max_priority_fee_per_gas
+            max_fee_per_gas = base_fee + priority_fee
             
             # Update transaction parameters
             optimized['maxFeePerGas'] = max_fee_per_gas
-            optimized['maxPriorityFeePerGas'] = self.max_priority_fee_per_gas
+            optimized['maxPriorityFeePerGas'] = priority_fee
             
             # For legacy transactions, set gasPrice
             if 'gasPrice' not in tx_params:
                 optimized['gasPrice'] = max_fee_per_gas
             
-            # Estimate gas if not provided
-            if 'gas' not in tx_params:
-                try:
-                    optimized['gas'] = self.web3.eth.estimate_gas(tx_params)
-                except Exception as e:
-                    logger.warning(f"Failed to estimate gas: {str(e)}")
-                    # Use a default gas limit if estimation fails
-                    optimized['gas'] = 200000
+            # Use the estimate if gas was not provided
+            if estimate:
+                # Use a default gas limit if estimation fails
+                optimized['gas'] = estimated_gas if estimated_gas is not None else 200000
             
             return optimized
             
@@ -0,0 +1,38 @@
+"""
+Maximal marginal relevance reranking of retrieved embeddings
+"""
+
+from typing import List
+
+import numpy as np
+
+
+def mmr_select(query: np.ndarray, candidates: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """Pick k candidate rows by maximal marginal relevance
+    
+    Rows and query must be L2-normalized. All pairwise similarities come from
+    one matrix product, and each step updates the redundancy of every candidate
+    with a single vectorized maximum.
+    """
+    k = min(k, len(candidates))
+    if k == 0:
+        return []
+    
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    
+    best = int(np.argmax(relevance))
+    selected = [best]
+    available = np.ones(len(candidates), dtype=bool)
+    available[best] = False
+    redundancy = similarity[:, best].copy()
+    
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[:, best], out=redundancy)
+    
+    return selected
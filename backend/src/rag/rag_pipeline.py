@@ -7,27 +7,35 @@ import asyncio
 import json
 import logging
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import re
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from pathlib import Path
 import hashlib
-from datetime import datetime, timedelta
+from statistics import fmean
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from cachetools import LRUCache, TTLCache
 
 # LangChain imports
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.vectorstores import Chroma
 from langchain.docstore.document import Document
-from langchain.chains import RetrievalQA
 from langchain_google_genai import GoogleGenerativeAI, ChatGoogleGenerativeAI
 from langchain.prompts import PromptTemplate
 from langchain.schema import BaseRetriever
-from langchain_community.vectorstores import Chroma as CommunityChroma
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.embeddings import HuggingFaceEmbeddings as CommunityHuggingFaceEmbeddings
 from langchain_community.document_loaders import TextLoader
 
 # Google Gemini
 import google.generativeai as genai
 
+# Vector search
+import faiss
+import torch
+
 # Web3 and analysis tools
 from web3 import Web3
 import requests
@@ -37,10 +45,52 @@ import numpy as np
 # Internal imports
 from ..utils.config import settings
 from ..utils.logger import setup_logger
-from ..simulation.tenderly import TenderlySimulator
+from ..utils.embedding_cache import EmbeddingCache
+from ..utils.single_flight import SingleFlight
+from .semantic_cache import SemanticCache
+from .mmr import mmr_select
+from ..utils.knowledge_base import UPDATES_INDEX_FILE, UPDATES_KB_FILE, iter_indexed_records
+from ..simulation.tenderly_new import TenderlySimulator
 
 logger = setup_logger(__name__)
 
+# Knowledge base file written by scripts/populate_knowledge_base.py
+SMARTBUGS_KB_FILE = "smartbugs.jsonl"
+
+# String literals (kept as-is), or runs of whitespace and comments
+_SOLIDITY_TRIVIA_RE = re.compile(
+    r'("(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')|(?:\s+|//[^\n]*|/\*.*?\*/)+',
+    re.DOTALL
+)
+
+def _normalize_solidity(code: str) -> str:
+    """Strip comments and collapse whitespace outside string literals"""
+    return _SOLIDITY_TRIVIA_RE.sub(lambda match: match.group(1) or " ", code).strip()
+
+# Below this many documents, process start-up costs more than splitting saves
+PARALLEL_SPLIT_MIN_DOCUMENTS = 500
+
+def _split_shard(documents: List[Document]) -> List[Document]:
+    """Split documents into chunks (runs in worker processes)"""
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=settings.CHUNK_SIZE,
+        chunk_overlap=settings.CHUNK_OVERLAP,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""]
+    )
+    return text_splitter.split_documents(documents)
+
+def load_kb_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """Iterate over the records of a JSONL knowledge base file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error(f"Invalid knowledge base record at {path}:{line_no}: {e}")
+
 class SmartContractRAGPipeline:
     """
     Comprehensive RAG pipeline for smart contract security analysis
@@ -53,7 +103,26 @@ class SmartContractRAGPipeline:
         self.setup_llm_chain()
         self.tenderly_simulator = TenderlySimulator()
         self.knowledge_base_path = Path(settings.KNOWLEDGE_BASE_PATH)
-        self.cache = {}
+        # Analysis results by cache key; bounded, entries expire after an hour
+        self.cache = TTLCache(maxsize=1024, ttl=3600)
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._query_embeddings = LRUCache(maxsize=256)
+        # In-flight analyses and Gemini prompts by key
+        self._inflight = SingleFlight()
+        self._gemini_semaphore = asyncio.Semaphore(settings.GEMINI_CONCURRENCY)
+        self.semantic_cache = SemanticCache(
+            self.embedding_dimension,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            ttl=settings.SEMANTIC_CACHE_TTL
+        )
+        # Recent (normalized code embedding -> cache key) pairs for near matches
+        self.code_cache = SemanticCache(
+            self.embedding_dimension,
+            threshold=settings.ANALYSIS_NEAR_MATCH_THRESHOLD,
+            ttl=3600,
+            max_entries=32
+        )
         
     def setup_gemini(self):
         """Initialize Google Gemini AI"""
@@ -73,23 +142,66 @@ class SmartContractRAGPipeline:
         )
         
     def setup_embeddings(self):
-        """Initialize embedding model"""
+        """Initialize embedding model on the GPU when one is available"""
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
         self.embeddings = HuggingFaceEmbeddings(
             model_name=settings.EMBEDDING_MODEL,
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
+            model_kwargs={'device': device},
+            encode_kwargs={
+                'batch_size': settings.EMBEDDING_BATCH_SIZE,
+                'normalize_embeddings': True
+            }
         )
+        if device == 'cuda':
+            # Half precision runs the encoder on tensor cores
+            self.embeddings.client.half()
+        logger.info(f"Embedding model loaded on {device}")
+        self.embedding_dimension = self.embeddings.client.get_sentence_embedding_dimension()
+        self.embedding_cache = EmbeddingCache(Path(settings.EMBEDDING_CACHE_PATH), settings.EMBEDDING_MODEL)
         
     def setup_vector_store(self):
-        """Initialize ChromaDB vector store"""
-        self.vector_store = Chroma(
-            persist_directory=settings.CHROMA_PERSIST_DIRECTORY,
+        """Initialize FAISS vector store
+        
+        Embeddings are L2-normalized, so a flat inner-product index ranks by
+        cosine similarity with one dense matrix product per query. With
+        EMBEDDING_QUANT="i8" the index stores 8-bit scalar-quantized vectors
+        instead, a quarter of the float32 size. A saved index keeps the type it
+        was built with, so delete FAISS_INDEX_PATH after changing the setting.
+        
+        A saved index serves queries until load_knowledge_base() replaces it.
+        """
+        index_path = Path(settings.FAISS_INDEX_PATH)
+        if (index_path / "index.faiss").exists():
+            self.vector_store = FAISS.load_local(
+                str(index_path),
+                self.embeddings,
+                distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+                allow_dangerous_deserialization=True  # Written by this pipeline
+            )
+            return
+        
+        self.vector_store = self._create_vector_store()
+        
+    def _create_vector_store(self) -> FAISS:
+        """Create an empty FAISS vector store of the configured index type"""
+        dimension = self.embedding_dimension
+        if settings.EMBEDDING_QUANT == "i8":
+            index = faiss.IndexScalarQuantizer(
+                dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            index = faiss.IndexFlatIP(dimension)
+        
+        return FAISS(
             embedding_function=self.embeddings,
-            collection_name="smart_contracts_knowledge"
+            index=index,
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
         )
         
     def setup_llm_chain(self):
-        """Setup the LangChain retrieval QA chain"""
+        """Setup the RAG prompt and retriever"""
         
         # Custom prompt template for smart contract analysis
         prompt_template = """
@@ -124,19 +236,19 @@ class SmartContractRAGPipeline:
             input_variables=["context", "question"]
         )
         
-        # Create retrieval QA chain
-        self.qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=self.vector_store.as_retriever(
-                search_type="similarity",
-                search_kwargs={"k": 5}
-            ),
-            chain_type_kwargs={"prompt": self.prompt}
+        # Retriever for the RAG analysis; the prompt is filled and sent directly
+        self.retriever = self.vector_store.as_retriever(
+            search_type="similarity",
+            search_kwargs={"k": 5}
         )
         
     async def load_knowledge_base(self):
-        """Load and index security knowledge base"""
+        """Load and index security knowledge base
+        
+        The index is rebuilt from scratch and then replaces the current one, so
+        a saved index is never indexed twice. Unchanged chunks are served from
+        the embedding cache, which keeps the rebuild cheap.
+        """
         logger.info("Loading smart contract security knowledge base...")
         
         # Define knowledge sources
@@ -146,7 +258,8 @@ class SmartContractRAGPipeline:
             self._load_best_practices(),
             self._load_exploit_examples(),
             await self._fetch_latest_security_data(),
-            self._load_smartbugs_documents()  # Add SmartBugs documents
+            self._load_smartbugs_documents(),  # Add SmartBugs documents
+            self._load_update_documents()  # Add CVE, blog and pattern documents
         ]
         
         documents = []
@@ -165,21 +278,68 @@ class SmartContractRAGPipeline:
         
         if documents:
             # Split documents into chunks
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=settings.CHUNK_SIZE,
-                chunk_overlap=settings.CHUNK_OVERLAP,
-                length_function=len,
-                separators=["\n\n", "\n", " ", ""]
+            split_docs = await self._split_documents(documents)
+            
+            # Build a new vector store off the event loop and swap it in
+            vector_store = self._create_vector_store()
+            await asyncio.to_thread(self._index_documents, vector_store, split_docs)
+            await asyncio.to_thread(vector_store.save_local, settings.FAISS_INDEX_PATH)
+            self.vector_store = vector_store
+            self.retriever = vector_store.as_retriever(
+                search_type="similarity",
+                search_kwargs={"k": 5}
             )
             
-            split_docs = text_splitter.split_documents(documents)
-            
-            # Add to vector store
-            self.vector_store.add_documents(split_docs)
-            self.vector_store.persist()
-            
             logger.info(f"Loaded {len(split_docs)} document chunks into knowledge base")
     
+    async def _split_documents(self, documents: List[Document]) -> List[Document]:
+        """Split documents into chunks, sharding large sets across processes"""
+        workers = os.cpu_count() or 1
+        if workers == 1 or len(documents) < PARALLEL_SPLIT_MIN_DOCUMENTS:
+            return _split_shard(documents)
+        
+        shard_size = -(-len(documents) // workers)
+        shards = [documents[start:start + shard_size] for start in range(0, len(documents), shard_size)]
+        
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = await asyncio.gather(*[
+                loop.run_in_executor(executor, _split_shard, shard) for shard in shards
+            ])
+        
+        return [chunk for shard_chunks in chunks for chunk in shard_chunks]
+    
+    def _index_documents(self, vector_store: FAISS, documents: List[Document]):
+        """Embed documents in one batched pass and add them to vector_store
+        
+        Embeddings are looked up by content hash first, so only new or changed
+        chunks go through the model.
+        """
+        texts = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        hashes = [hashlib.sha256(text.encode('utf-8')).digest() for text in texts]
+        
+        cached = self.embedding_cache.get_many(hashes)
+        missing = {digest: text for digest, text in zip(hashes, texts) if digest not in cached}
+        if missing:
+            # SentenceTransformer encodes the whole list in EMBEDDING_BATCH_SIZE batches
+            fresh = self.embeddings.embed_documents(list(missing.values()))
+            new_entries = list(zip(missing.keys(), fresh))
+            self.embedding_cache.put_many(new_entries)
+            cached.update(new_entries)
+        
+        logger.info(f"Embedded {len(missing)} chunks, {len(texts) - len(missing)} served from the embedding cache")
+        embeddings = [cached[digest] for digest in hashes]
+        
+        # Quantized indexes learn their value ranges from the first batch
+        if not vector_store.index.is_trained:
+            vector_store.index.train(np.asarray(embeddings, dtype=np.float32))
+        
+        vector_store.add_embeddings(
+            text_embeddings=list(zip(texts, embeddings)),
+            metadatas=metadatas
+        )
+    
     def _load_smartbugs_documents(self) -> List[Document]:
         """Load SmartBugs vulnerability documents from knowledge base directory"""
         documents = []
@@ -188,19 +348,48 @@ class SmartContractRAGPipeline:
             logger.warning(f"Knowledge base directory not found: {self.knowledge_base_path}")
             return documents
         
+        # Load documents from the JSONL knowledge base file
+        kb_file = self.knowledge_base_path / SMARTBUGS_KB_FILE
+        if kb_file.exists():
+            for record in load_kb_jsonl(kb_file):
+                lines = record.get("lines") or []
+                metadata = {
+                    "source": "smartbugs_dataset",
+                    "file_path": str(kb_file),
+                    "filename": record.get("name", ""),
+                    "contract_name": record.get("contract_name", "unknown"),
+                    "vulnerability_category": record.get("category", "unknown"),
+                    "severity": record.get("severity", "medium"),
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+                if lines:
+                    metadata["line_start"] = str(min(lines))
+                    metadata["line_end"] = str(max(lines))
+                
+                documents.append(Document(
+                    page_content=record.get("document", ""),
+                    metadata=metadata
+                ))
+            
+            logger.info(f"Loaded {len(documents)} SmartBugs documents from {kb_file}")
+        
         # Find all .txt files in the knowledge base directory
         txt_files = list(self.knowledge_base_path.glob("*.txt"))
         
         if not txt_files:
-            logger.info("No SmartBugs documents found in knowledge base directory")
+            if not documents:
+                logger.info("No SmartBugs documents found in knowledge base directory")
             return documents
         
         logger.info(f"Loading {len(txt_files)} SmartBugs documents from {self.knowledge_base_path}")
         
-        for file_path in txt_files:
+        # Reads are I/O-bound, so overlap them in threads and build documents here
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            reads = [executor.submit(file_path.read_text, encoding='utf-8') for file_path in txt_files]
+        
+        for file_path, read in zip(txt_files, reads):
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = read.result()
                 
                 # Extract metadata from filename
                 filename = file_path.stem
@@ -234,6 +423,35 @@ class SmartContractRAGPipeline:
         logger.info(f"Successfully loaded {len(documents)} SmartBugs documents")
         return documents
     
+    def _load_update_documents(self) -> List[Document]:
+        """Load documents written by scripts/update_knowledge_base.py"""
+        kb_file = self.knowledge_base_path / UPDATES_KB_FILE
+        if not kb_file.exists():
+            return []
+        
+        # Read through the offset index when there is one
+        index_file = self.knowledge_base_path / UPDATES_INDEX_FILE
+        if index_file.exists():
+            records = iter_indexed_records(kb_file, index_file)
+        else:
+            records = load_kb_jsonl(kb_file)
+        
+        documents = [
+            Document(
+                page_content=record.get("document", ""),
+                metadata={
+                    "source": record.get("source", "knowledge_base_update"),
+                    "file_path": str(kb_file),
+                    "filename": record.get("name", ""),
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+            )
+            for record in records
+        ]
+        
+        logger.info(f"Loaded {len(documents)} update documents from {kb_file}")
+        return documents
+    
     def _load_vulnerability_patterns(self) -> List[Dict]:
         """Load common smart contract vulnerability patterns"""
         return [
@@ -332,12 +550,14 @@ class SmartContractRAGPipeline:
         documents = []
         
         for item in data:
-            content = json.dumps(item, indent=2)
+            # Plain "key: value" lines embed without JSON punctuation and indentation
+            content = "\n".join(f"{key}: {value}" for key, value in item.items())
             doc = Document(
                 page_content=content,
                 metadata={
                     "source": "knowledge_base",
                     "type": type(item.get("title", item.get("category", "general"))).__name__,
+                    "raw": json.dumps(item, separators=(",", ":")),
                     "timestamp": datetime.utcnow().isoformat()
                 }
             )
@@ -359,38 +579,18 @@ class SmartContractRAGPipeline:
             cache_key = self._generate_cache_key(contract_address, contract_code)
             
             # Check cache first
-            if cache_key in self.cache:
-                cached_result = self.cache[cache_key]
-                if self._is_cache_valid(cached_result):
-                    logger.info("Returning cached analysis result")
-                    return cached_result["data"]
-            
-            # Perform multi-stage analysis
-            analysis_results = await asyncio.gather(
-                self._static_analysis(contract_code),
-                self._dynamic_analysis(contract_address, transaction_data),
-                self._rag_analysis(contract_code, contract_address),
-                self._gas_analysis(contract_code),
-                return_exceptions=True
-            )
-            
-            static_result, dynamic_result, rag_result, gas_result = analysis_results
-            
-            # Combine results
-            comprehensive_result = self._combine_analysis_results(
-                static_result, dynamic_result, rag_result, gas_result
+            cached_result = self.cache.get(cache_key)
+            if cached_result is not None:
+                self._cache_hits += 1
+                logger.info("Returning cached analysis result")
+                return cached_result
+            
+            # Concurrent requests for the same contract share one analysis
+            return await self._inflight.run(
+                cache_key,
+                lambda: self._analyze_uncached(cache_key, contract_address, contract_code, transaction_data)
             )
             
-            # Cache the result
-            self.cache[cache_key] = {
-                "data": comprehensive_result,
-                "timestamp": datetime.utcnow(),
-                "ttl": timedelta(hours=1)
-            }
-            
-            logger.info("Comprehensive analysis completed successfully")
-            return comprehensive_result
-            
         except Exception as e:
             logger.error(f"Error in contract analysis: {str(e)}")
             return {
@@ -399,6 +599,51 @@ class SmartContractRAGPipeline:
                 "analysis_type": "comprehensive_rag_analysis"
             }
             
+    async def _analyze_uncached(self,
+                                cache_key: str,
+                                contract_address: str,
+                                contract_code: str,
+                                transaction_data: Optional[Dict]) -> Dict[str, Any]:
+        """Run the full analysis after an exact cache miss and cache its result"""
+        # Fall back to a near-identical version of this contract
+        code_embedding = None
+        if settings.ANALYSIS_NEAR_MATCH:
+            code_embedding = await asyncio.to_thread(
+                self.embeddings.embed_query, _normalize_solidity(contract_code)
+            )
+            similar_key = self.code_cache.get(code_embedding, namespace=contract_address)
+            cached_result = self.cache.get(similar_key) if similar_key else None
+            if cached_result is not None:
+                self._cache_hits += 1
+                logger.info("Returning cached analysis of a near-identical contract")
+                return cached_result
+        
+        self._cache_misses += 1
+        
+        # Perform multi-stage analysis
+        analysis_results = await asyncio.gather(
+            self._static_analysis(contract_code),
+            self._dynamic_analysis(contract_address, transaction_data),
+            self._rag_analysis(contract_code, contract_address),
+            self._gas_analysis(contract_code),
+            return_exceptions=True
+        )
+        
+        static_result, dynamic_result, rag_result, gas_result = analysis_results
+        
+        # Combine results
+        comprehensive_result = self._combine_analysis_results(
+            static_result, dynamic_result, rag_result, gas_result
+        )
+        
+        # Cache the result
+        self.cache[cache_key] = comprehensive_result
+        if code_embedding is not None:
+            self.code_cache.put(code_embedding, cache_key, namespace=contract_address)
+        
+        logger.info("Comprehensive analysis completed successfully")
+        return comprehensive_result
+            
     async def _static_analysis(self, contract_code: str) -> Dict[str, Any]:
         """Perform static code analysis"""
         try:
@@ -437,8 +682,8 @@ class SmartContractRAGPipeline:
                 return {"type": "dynamic_analysis", "status": "skipped", "reason": "No transaction data provided"}
                 
             # Simulate transaction using Tenderly
-            simulation_result = await self.tenderly_simulator.simulate_transaction(
-                contract_address, transaction_data
+            simulation_result = await self.tenderly_simulator.simulate_tx(
+                {"to": contract_address, **transaction_data}
             )
             
             return {
@@ -464,19 +709,66 @@ class SmartContractRAGPipeline:
             What are the potential security issues and how can they be mitigated?
             """
             
-            # Query the RAG chain
-            response = self.qa_chain.run(query)
+            # Reuse the answer to a near-identical query for this contract
+            query_embedding = await self._get_query_embedding(query)
+            if settings.SEMANTIC_CACHE_ENABLED:
+                cached_result = self.semantic_cache.get(query_embedding, namespace=contract_address)
+                if cached_result is not None:
+                    logger.info("Returning semantically cached RAG analysis")
+                    return cached_result
+            
+            # Retrieve context with the same embedding and make a single LLM call
+            docs = self._retrieve(query_embedding, k=5)
+            prompt = self.prompt.format(
+                context="\n\n".join(doc.page_content for doc in docs),
+                question=query
+            )
+            async with self._gemini_semaphore:
+                response = (await self.llm.ainvoke(prompt)).content
             
-            return {
+            result = {
                 "type": "rag_analysis", 
                 "analysis": response,
                 "confidence": 0.8
             }
+            if settings.SEMANTIC_CACHE_ENABLED:
+                self.semantic_cache.put(query_embedding, result, namespace=contract_address)
+            return result
             
         except Exception as e:
             logger.error(f"RAG analysis failed: {e}")
             return {"type": "rag_analysis", "error": str(e)}
             
+    def _retrieve(self, query_embedding: List[float], k: int) -> List[Document]:
+        """Retrieve k documents for an embedded query using RAG_SEARCH_TYPE"""
+        if settings.RAG_SEARCH_TYPE == "mmr":
+            return self._mmr_search(query_embedding, k=k)
+        return self.vector_store.similarity_search_by_vector(query_embedding, k=k)
+    
+    def _mmr_search(self, query_embedding: List[float], k: int) -> List[Document]:
+        """Search the vector store and rerank the top RAG_MMR_FETCH_K hits by MMR"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        _, rows = self.vector_store.index.search(query.reshape(1, -1), settings.RAG_MMR_FETCH_K)
+        rows = rows[0][rows[0] >= 0]
+        if len(rows) == 0:
+            return []
+        
+        candidates = self.vector_store.index.reconstruct_batch(rows)
+        selected = mmr_select(query, candidates, k, settings.RAG_MMR_LAMBDA)
+        return [
+            self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[int(rows[i])])
+            for i in selected
+        ]
+    
+    async def _get_query_embedding(self, query: str) -> List[float]:
+        """Embed a query, reusing the embedding of a recently seen identical query"""
+        key = hashlib.blake2b(query.encode(), digest_size=16).digest()
+        embedding = self._query_embeddings.get(key)
+        if embedding is None:
+            embedding = await asyncio.to_thread(self.embeddings.embed_query, query)
+            self._query_embeddings[key] = embedding
+        return embedding
+    
     async def _gas_analysis(self, contract_code: str) -> Dict[str, Any]:
         """Analyze gas optimization opportunities"""
         try:
@@ -508,16 +800,20 @@ class SmartContractRAGPipeline:
             return {"type": "gas_analysis", "error": str(e)}
             
     async def _query_gemini(self, prompt: str) -> str:
-        """Query Gemini AI model"""
+        """Query Gemini AI model; identical concurrent prompts share one request"""
         try:
-            response = await asyncio.to_thread(
-                self.gemini_model.generate_content, prompt
-            )
-            return response.text
+            key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+            return await self._inflight.run(f"gemini:{key}", lambda: self._generate_content(prompt))
         except Exception as e:
             logger.error(f"Gemini query failed: {e}")
             raise
             
+    async def _generate_content(self, prompt: str) -> str:
+        """Send a prompt to Gemini within the concurrency limit"""
+        async with self._gemini_semaphore:
+            response = await self.gemini_model.generate_content_async(prompt)
+        return response.text
+    
     def _parse_gemini_response(self, response: str) -> Dict[str, Any]:
         """Parse and structure Gemini response"""
         try:
@@ -556,40 +852,41 @@ class SmartContractRAGPipeline:
         
         valid_results = [r for r in results if isinstance(r, dict) and "error" not in r]
         
-        for result in valid_results:
-            if isinstance(result, dict):
-                combined["analyses"].append(result)
+        combined["analyses"].extend(valid_results)
                 
-        # Calculate overall metrics
-        combined["confidence_score"] = np.mean([
+        # Calculate overall metrics; a handful of floats needs no array
+        combined["confidence_score"] = fmean(
             r.get("confidence", 0) for r in valid_results
-        ]) if valid_results else 0
+        ) if valid_results else 0
         
         return combined
         
     def _generate_cache_key(self, address: str, code: str) -> str:
-        """Generate cache key for analysis results"""
-        content = f"{address}:{hashlib.md5(code.encode()).hexdigest()}"
-        return hashlib.sha256(content.encode()).hexdigest()
+        """Generate cache key for analysis results
         
-    def _is_cache_valid(self, cached_item: Dict) -> bool:
-        """Check if cached analysis is still valid"""
-        if "timestamp" not in cached_item or "ttl" not in cached_item:
-            return False
-            
-        expiry_time = cached_item["timestamp"] + cached_item["ttl"]
-        return datetime.utcnow() < expiry_time
+        The code is normalized first, so edits to comments or formatting
+        still hit the cache.
+        """
+        content = f"{address}:{_normalize_solidity(code)}"
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+        
+    def cache_stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the size of the analysis cache"""
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "size": len(self.cache),
+            "maxsize": self.cache.maxsize
+        }
 
     async def analyze_contract_enhanced(self, contract_address: str, contract_code: str, network: str = "mainnet") -> Dict[str, Any]:
         """
         Enhanced contract analysis using RAG pipeline with structured JSON output
         """
         try:
-            # Retrieve relevant vulnerability patterns
-            retrieved_docs = self.vector_store.similarity_search(
-                contract_code,
-                k=getattr(settings, 'MAX_RETRIEVAL_DOCS', 5)
-            )
+            # Retrieve relevant vulnerability patterns once; they are stuffed into the prompt
+            code_embedding = await self._get_query_embedding(contract_code)
+            retrieved_docs = self._retrieve(code_embedding, k=settings.MAX_RETRIEVAL_DOCS)
             retrieved_texts = "\n".join([doc.page_content for doc in retrieved_docs])
 
             # Enhanced prompt template for structured analysis
@@ -612,41 +909,28 @@ Please provide a structured JSON response with the following fields:
                 template=enhanced_prompt_template,
                 input_variables=["context", "retrieved_docs"]
             )
+            prompt = enhanced_prompt.format(context=contract_code, retrieved_docs=retrieved_texts)
 
-            # Create temporary chain for this analysis
-            enhanced_chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=self.vector_store.as_retriever(
-                    search_type="similarity",
-                    search_kwargs={"k": getattr(settings, 'MAX_RETRIEVAL_DOCS', 5)}
-                ),
-                return_source_documents=True,
-                chain_type_kwargs={"prompt": enhanced_prompt}
-            )
-
-            # Run enhanced RAG analysis
-            result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: enhanced_chain({"query": contract_code, "retrieved_docs": retrieved_texts})
-            )
+            # Run enhanced RAG analysis with a single LLM call
+            async with self._gemini_semaphore:
+                response = (await self.llm.ainvoke(prompt)).content
 
             # Parse result
             try:
-                analysis_result = json.loads(result['result'])
+                analysis_result = json.loads(response)
             except json.JSONDecodeError:
                 # Fallback if JSON parsing fails
                 analysis_result = {
                     "vulnerabilities": [],
                     "optimizations": [],
                     "security_score": 5.0,
-                    "raw_analysis": result['result']
+                    "raw_analysis": response
                 }
 
             # Add source documents
             analysis_result['source_documents'] = [
                 {"content": doc.page_content, "metadata": doc.metadata}
-                for doc in result.get('source_documents', [])
+                for doc in retrieved_docs
             ]
 
             # Add analysis metadata
@@ -674,13 +958,20 @@ Please provide a structured JSON response with the following fields:
 
 # Global RAG pipeline instance
 rag_pipeline = None
+_rag_pipeline_flight = SingleFlight()
+
+async def _create_rag_pipeline() -> SmartContractRAGPipeline:
+    """Build a pipeline and load its knowledge base without blocking the event loop"""
+    # Loading the embedding model and the saved index is synchronous
+    pipeline = await asyncio.to_thread(SmartContractRAGPipeline)
+    await pipeline.load_knowledge_base()
+    return pipeline
 
 async def get_rag_pipeline() -> SmartContractRAGPipeline:
-    """Get or create RAG pipeline instance"""
+    """Get or create RAG pipeline instance; concurrent first calls share one build"""
     global rag_pipeline
     
     if rag_pipeline is None:
-        rag_pipeline = SmartContractRAGPipeline()
-        await rag_pipeline.load_knowledge_base()
+        rag_pipeline = await _rag_pipeline_flight.run("rag_pipeline", _create_rag_pipeline)
         
     return rag_pipeline
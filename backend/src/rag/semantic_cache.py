@@ -0,0 +1,111 @@
+"""
+Similarity-keyed response cache for LLM queries
+"""
+
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from cachetools import LRUCache
+
+
+class SemanticCache:
+    """Cache of responses looked up by the nearest previously seen query embedding.
+
+    Embeddings must be L2-normalized so the inner product is the cosine
+    similarity. Entries live in separate namespaces (e.g. one per contract
+    address), each holding at most ``max_entries`` responses in a flat
+    inner-product index. At most ``max_namespaces`` namespaces are kept; the
+    least recently used one is evicted first.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        threshold: float,
+        ttl: float,
+        max_entries: int = 256,
+        max_namespaces: int = 1024
+    ):
+        """Create an empty cache.
+
+        Args:
+            dimension: Embedding dimension
+            threshold: Minimum cosine similarity for a hit
+            ttl: Time to live of an entry in seconds
+            max_entries: Maximum number of entries per namespace
+            max_namespaces: Maximum number of namespaces
+        """
+        self.dimension = dimension
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # namespace -> (index, [(expires_at, vector, response)]) with rows in index order
+        self._namespaces: LRUCache = LRUCache(maxsize=max_namespaces)
+
+    def __len__(self) -> int:
+        return len(self._namespaces)
+
+    def get(self, embedding: Sequence[float], namespace: str = "") -> Optional[Any]:
+        """Return the cached response of the most similar fresh query, if close enough.
+
+        Expired entries of the namespace are dropped before searching, so they
+        cannot shadow a fresher match.
+
+        Args:
+            embedding: Normalized query embedding
+            namespace: Namespace to search
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        cached = self._namespaces.get(namespace)
+        if cached is None:
+            return None
+        index, entries = cached
+
+        now = time.monotonic()
+        if entries[0][0] <= now:
+            # Entries are in insertion order, so the oldest expires first
+            live = [entry for entry in entries if entry[0] > now]
+            if not live:
+                del self._namespaces[namespace]
+                return None
+            index, entries = self._store(namespace, live)
+
+        query = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        scores, rows = index.search(query, 1)
+        row = int(rows[0][0])
+        if row < 0 or scores[0][0] < self.threshold:
+            return None
+        return entries[row][2]
+
+    def put(self, embedding: Sequence[float], response: Any, namespace: str = ""):
+        """Store a response under its query embedding.
+
+        Expired entries are dropped first; if the namespace is still full the
+        oldest entry is evicted.
+
+        Args:
+            embedding: Normalized query embedding
+            response: Response to cache
+            namespace: Namespace to store the entry in
+        """
+        now = time.monotonic()
+        _, entries = self._namespaces.get(namespace, (None, []))
+        live = [entry for entry in entries if entry[0] > now]
+        if len(live) >= self.max_entries:
+            live = live[len(live) - self.max_entries + 1:]
+        live.append((now + self.ttl, np.asarray(embedding, dtype=np.float32), response))
+        self._store(namespace, live)
+
+    def _store(
+        self, namespace: str, entries: List[Tuple[float, np.ndarray, Any]]
+    ) -> Tuple[faiss.IndexFlatIP, List[Tuple[float, np.ndarray, Any]]]:
+        """Index entries and store them as the namespace's contents."""
+        # Rebuilding keeps index rows aligned with entries; namespaces are small
+        index = faiss.IndexFlatIP(self.dimension)
+        index.add(np.stack([vector for _, vector, _ in entries]))
+        self._namespaces[namespace] = (index, entries)
+        return index, entries
@@ -1,23 +1,186 @@
 """
 Tenderly API client for smart contract simulation and analysis.
 """
+import asyncio
+import copy
+import hashlib
 import json
 import logging
+import random
 import time
-from typing import Any, Dict, List, Optional, Union
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Union
 from pathlib import Path
 from urllib.parse import urljoin
 
-import requests
+import httpx
+import orjson
+from cachetools import TTLCache
 from web3 import Web3
 from web3.types import TxParams, Wei
 
+from ..utils.cache import contract_cache
 from ..utils.config import settings
 from ..utils.logger import setup_logger
+from ..utils.single_flight import SingleFlight
 
 # Set up logger
 logger = setup_logger(__name__)
 
+# Chain IDs mapped to Tenderly network names with additional metadata
+NETWORK_MAP: Mapping[int, Dict[str, str]] = MappingProxyType({
+    1: {"name": "mainnet", "explorer": "https://etherscan.io"},
+    5: {"name": "goerli", "explorer": "https://goerli.etherscan.io"},
+    137: {"name": "polygon", "explorer": "https://polygonscan.com"},
+    42161: {"name": "arbitrum", "explorer": "https://arbiscan.io"},
+    10: {"name": "optimism", "explorer": "https://optimistic.etherscan.io"},
+    56: {"name": "bsc", "explorer": "https://bscscan.com"},
+    43114: {"name": "avalanche", "explorer": "https://snowtrace.io"},
+    250: {"name": "fantom", "explorer": "https://ftmscan.com"},
+    100: {"name": "gnosis", "explorer": "https://gnosisscan.io"},
+    42170: {"name": "arbitrum-nova", "explorer": "https://nova.arbiscan.io"},
+})
+
+# Network ID by lower-case name or decimal string, for constant-time lookups
+_NETWORK_IDS: Mapping[str, int] = MappingProxyType({
+    **{info["name"].lower(): net_id for net_id, info in NETWORK_MAP.items()},
+    **{str(net_id): net_id for net_id in NETWORK_MAP},
+})
+
+# Simulation results are deterministic at a pinned block; at "latest" they are
+# only reused for about a block, and only when the simulation is not saved
+SIMULATION_CACHE_SIZE = 1024
+PINNED_SIMULATION_TTL = 300
+LATEST_SIMULATION_TTL = 12
+
+# Largest number of transactions Tenderly accepts in one simulate-bundle request
+MAX_BUNDLE_SIZE = 100
+
+
+def _coerce_int(value: Union[int, str, None], default: int = 0) -> int:
+    """Convert an int, hex ("0x5208") or decimal ("21000") string quantity to an int.
+    
+    Only 0x-prefixed strings are read as hex, so decimal strings with leading
+    zeros ("010") stay decimal. Empty strings and None become ``default``.
+    """
+    if isinstance(value, int):
+        return value
+    if not value:
+        return default
+    return int(value, 16) if value[:2].lower() == "0x" else int(value)
+
+
+def _to_int_str(value: Union[int, str, None]) -> str:
+    """Convert a quantity to a decimal string."""
+    return str(_coerce_int(value))
+
+
+def _lower_address(value: Optional[str]) -> Optional[str]:
+    """Lowercase an address; None (contract creation has no ``to``) passes through."""
+    return value.lower() if value is not None else None
+
+
+# web3 transaction field -> Tenderly simulation field, and how to convert the value
+_TX_FIELD_MAP = (
+    ("from", "from", _lower_address),
+    ("to", "to", _lower_address),
+    ("value", "value", lambda value: hex(_coerce_int(value))),
+    ("data", "data", None),
+    ("input", "data", None),
+    ("gas", "gas", _coerce_int),
+    ("gasPrice", "gas_price", _to_int_str),
+    ("maxFeePerGas", "max_fee_per_gas", _to_int_str),
+    ("maxPriorityFeePerGas", "max_priority_fee_per_gas", _to_int_str),
+    ("nonce", "nonce", _coerce_int),
+    ("accessList", "access_list", None),
+)
+
+
+# Responses worth retrying, and the full-jitter backoff bounds in seconds
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRY_BACKOFF_BASE = 0.25
+RETRY_BACKOFF_CAP = 8.0
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the delay in seconds requested by a Retry-After header, if any."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream host.
+    
+    CLOSED lets every request through. After ``failure_threshold`` consecutive
+    failures the circuit OPENs and requests are rejected without being sent.
+    Once ``recovery_timeout`` has passed it is HALF_OPEN: one trial request is
+    let through per recovery period, and its outcome closes or reopens the circuit.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+    
+    def allow_request(self) -> bool:
+        """Return whether a request may be sent now."""
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at < self.recovery_timeout:
+            return False
+        # Let one trial through and hold back the rest for another recovery period
+        self.state = self.HALF_OPEN
+        self._opened_at = now
+        return True
+    
+    def record_success(self) -> None:
+        """Close the circuit after a request reached the host."""
+        self.state = self.CLOSED
+        self._failures = 0
+    
+    def record_failure(self) -> None:
+        """Count a failed request, opening the circuit at the threshold or on a failed trial."""
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state == self.CLOSED:
+                logger.warning(f"Opening circuit after {self._failures} consecutive failures")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+# Circuit breakers shared by all clients in the process, keyed by host
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def _get_circuit_breaker(host: str) -> CircuitBreaker:
+    """Return the circuit breaker of a host, creating it on first use."""
+    if host not in _circuit_breakers:
+        _circuit_breakers[host] = CircuitBreaker(
+            failure_threshold=settings.TENDERLY_CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=settings.TENDERLY_CIRCUIT_RECOVERY_TIMEOUT
+        )
+    return _circuit_breakers[host]
+
 class TenderlyError(Exception):
     """Base exception for Tenderly-related errors."""
     pass
@@ -33,13 +196,21 @@ class ContractVerificationError(TenderlyError):
 class TenderlyClient:
     """Handles all interactions with Tenderly's API for simulation and analysis."""
     
-    def __init__(self, api_key: str = None, project_slug: str = None, account_slug: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        project_slug: str = None,
+        account_slug: str = None,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
         """Initialize the Tenderly client.
         
         Args:
             api_key: Tenderly API key. If not provided, will use from settings.
             project_slug: Tenderly project slug. If not provided, will use from settings.
             account_slug: Tenderly account/team slug. If not provided, will use from settings.
+            http_client: Shared async HTTP client. If not provided, a pooled HTTP/2
+                client owned by this instance is created.
         """
         self.api_key = api_key or settings.TENDERLY_TOKEN
         self.project_slug = project_slug or settings.TENDERLY_PROJECT_SLUG
@@ -51,19 +222,30 @@ class TenderlyClient:
         }
         self.timeout = settings.ANALYSIS_TIMEOUT / 1000  # Convert to seconds
         
-        # Map chain IDs to Tenderly network names with additional metadata
-        self.network_map = {
-            1: {"name": "mainnet", "explorer": "https://etherscan.io"},
-            5: {"name": "goerli", "explorer": "https://goerli.etherscan.io"},
-            137: {"name": "polygon", "explorer": "https://polygonscan.com"},
-            42161: {"name": "arbitrum", "explorer": "https://arbiscan.io"},
-            10: {"name": "optimism", "explorer": "https://optimistic.etherscan.io"},
-            56: {"name": "bsc", "explorer": "https://bscscan.com"},
-            43114: {"name": "avalanche", "explorer": "https://snowtrace.io"},
-            250: {"name": "fantom", "explorer": "https://ftmscan.com"},
-            100: {"name": "gnosis", "explorer": "https://gnosisscan.io"},
-            42170: {"name": "arbitrum-nova", "explorer": "https://nova.arbiscan.io"},
-        }
+        # Per-request constants, resolved once instead of on every call
+        self._base_url = f"{self.base_url}/"
+        self._circuit_breaker = _get_circuit_breaker(httpx.URL(self._base_url).host)
+        project_path = f"account/{self.account_slug}/project/{self.project_slug}"
+        self._simulate_endpoint = f"{project_path}/simulate"
+        self._simulate_bundle_endpoint = f"{project_path}/simulate-bundle"
+        
+        # Reuse pooled keep-alive connections instead of a new TLS handshake per call
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+        # Bulkhead: cap concurrent Tenderly requests so an outage cannot tie up every worker
+        self._bulkhead = asyncio.Semaphore(settings.TENDERLY_MAX_INFLIGHT)
+        
+        # Successful simulation results keyed by a hash of the normalized request
+        self._pinned_simulations = TTLCache(maxsize=SIMULATION_CACHE_SIZE, ttl=PINNED_SIMULATION_TTL)
+        self._latest_simulations = TTLCache(maxsize=SIMULATION_CACHE_SIZE, ttl=LATEST_SIMULATION_TTL)
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._inflight = SingleFlight(cancelled_error=TenderlyError)
+        
+        self.network_map = NETWORK_MAP
     
     async def _make_api_request(
         self, 
@@ -72,68 +254,114 @@ class TenderlyClient:
         params: Optional[Dict] = None,
         data: Optional[Dict] = None,
         retries: int = 3,
-        backoff_factor: float = 2.0,
+        backoff_base: float = RETRY_BACKOFF_BASE,
+        backoff_cap: float = RETRY_BACKOFF_CAP,
         **kwargs
     ) -> Dict[str, Any]:
         """Make an authenticated request to the Tenderly API with retries and error handling.
         
+        Only rate limiting (429), server errors, timeouts and connection errors
+        are retried, with exponential backoff and full jitter; a ``Retry-After``
+        header takes precedence. Other 4xx responses fail immediately.
+        
+        Requests to a host whose circuit breaker is open fail immediately
+        without being sent.
+        
         Args:
             method: HTTP method (get, post, etc.)
             endpoint: API endpoint (without base URL)
             params: Query parameters
             data: Request body data
-            retries: Number of retry attempts
-            backoff_factor: Multiplier for exponential backoff
-            **kwargs: Additional arguments to pass to requests.request
+            retries: Number of attempts
+            backoff_base: Upper bound of the first backoff in seconds
+            backoff_cap: Maximum backoff in seconds
+            **kwargs: Additional arguments to pass to httpx.AsyncClient.request
             
         Returns:
             Dict containing the parsed JSON response
             
         Raises:
-            TenderlyError: If the request fails after all retries
+            TenderlyError: If the circuit is open or the request fails after all retries
         """
-        url = urljoin(f"{self.base_url}/", endpoint.lstrip('/'))
-        headers = {**self.headers, **kwargs.pop('headers', {})}
+        method = method.upper()
+        url = urljoin(self._base_url, endpoint.lstrip('/'))
+        extra_headers = kwargs.pop('headers', None)
+        headers = {**self.headers, **extra_headers} if extra_headers else self.headers
+        content = orjson.dumps(data) if data is not None else None
+        
+        breaker = self._circuit_breaker
+        if not breaker.allow_request():
+            raise TenderlyError(f"Tenderly circuit open, not sending {method} {url}")
+        
         last_exception = None
         
         for attempt in range(retries):
+            retry_after = None
             try:
-                response = requests.request(
-                    method=method.upper(),
-                    url=url,
-                    params=params,
-                    json=data,
-                    headers=headers,
-                    timeout=self.timeout,
-                    **kwargs
-                )
+                async with self._bulkhead:
+                    response = await self.http_client.request(
+                        method=method,
+                        url=url,
+                        params=params,
+                        content=content,
+                        headers=headers,
+                        timeout=self.timeout,
+                        **kwargs
+                    )
                 
                 response.raise_for_status()
+                breaker.record_success()
                 
                 # Handle empty responses
                 if not response.content:
                     return {}
-                    
-                return response.json()
                 
-            except requests.exceptions.RequestException as e:
+                # Simulation responses run to several MB; orjson decodes them much faster
+                return orjson.loads(response.content)
+                
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in RETRY_STATUS_CODES:
+                    # The API answered, so this does not count against the circuit
+                    breaker.record_success()
+                    error_msg = f"{method} {url} failed: {str(e)}"
+                    logger.error(error_msg)
+                    raise TenderlyError(error_msg) from e
+                last_exception = e
+                retry_after = _parse_retry_after(e.response.headers.get("Retry-After"))
+            except httpx.TransportError as e:
                 last_exception = e
-                logger.warning(
-                    f"Attempt {attempt + 1}/{retries} failed for {method.upper()} {url}: {str(e)}"
-                )
-                if attempt < retries - 1:
-                    wait_time = backoff_factor ** attempt
-                    logger.debug(f"Retrying in {wait_time:.1f} seconds...")
-                    time.sleep(wait_time)
+            
+            logger.warning(
+                f"Attempt {attempt + 1}/{retries} failed for {method} {url}: {str(last_exception)}"
+            )
+            if attempt < retries - 1:
+                if retry_after is not None:
+                    wait_time = min(retry_after, backoff_cap)
+                else:
+                    wait_time = random.uniform(0, min(backoff_cap, backoff_base * 2 ** attempt))
+                logger.debug(f"Retrying in {wait_time:.2f} seconds...")
+                await asyncio.sleep(wait_time)
         
         # If we get here, all retries failed
-        error_msg = f"Failed to execute {method.upper()} {url} after {retries} attempts"
+        breaker.record_failure()
+        error_msg = f"Failed to execute {method} {url} after {retries} attempts"
         if last_exception:
             error_msg += f": {str(last_exception)}"
         
         logger.error(error_msg)
         raise TenderlyError(error_msg) from last_exception
     
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client if it is owned by this instance."""
+        if self._owns_http_client:
+            await self.http_client.aclose()
+    
+    async def __aenter__(self) -> "TenderlyClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+    
     async def simulate_transaction(
         self,
         from_address: str,
@@ -143,7 +371,9 @@ class TenderlyClient:
         network: str = "mainnet",
         block_number: Optional[int] = None,
         save: bool = True,
-        save_if_fails: bool = True
+        save_if_fails: bool = True,
+        simulation_type: str = "full",
+        include_raw: bool = False
     ) -> Dict[str, Any]:
         """Simulate a transaction using Tenderly.
         
@@ -156,6 +386,10 @@ class TenderlyClient:
             block_number: Block number to simulate at (latest if None)
             save: Whether to save the simulation
             save_if_fails: Whether to save the simulation if it fails
+            simulation_type: "full" for a decoded call trace, "quick" when only
+                the outcome and gas are needed
+            include_raw: Also return the full Tenderly response under
+                ``raw_response``; it can be several MB, so only use it for debugging
             
         Returns:
             Dict containing simulation results
@@ -164,46 +398,280 @@ class TenderlyClient:
             SimulationFailedError: If the simulation fails
         """
         network_id = self._get_network_id(network)
+        payload = self._build_simulation_payload(
+            from_address, to_address, value, data, block_number, save, save_if_fails,
+            simulation_type
+        )
+        
+        return await self._run_simulation(network_id, payload, include_raw)
+    
+    async def simulate_tx(
+        self,
+        tx: TxParams,
+        network: str = "mainnet",
+        block_number: Optional[int] = None,
+        save: bool = True,
+        save_if_fails: bool = True,
+        simulation_type: str = "full",
+        include_raw: bool = False
+    ) -> Dict[str, Any]:
+        """Simulate a transaction given as web3 transaction parameters.
         
+        Besides from/to/value/data, gas limit, fee fields, nonce and access
+        list are passed on to Tenderly when present.
+        
+        Args:
+            tx: Transaction parameters; numbers may be ints or hex strings
+            network: Network name or ID
+            block_number: Block number to simulate at (latest if None)
+            save: Whether to save the simulation
+            save_if_fails: Whether to save the simulation if it fails
+            simulation_type: "full" or "quick"
+            include_raw: Also return the full Tenderly response under ``raw_response``
+            
+        Returns:
+            Dict containing simulation results
+            
+        Raises:
+            SimulationFailedError: If the simulation fails
+        """
+        network_id = self._get_network_id(network)
         payload = {
-            "from": from_address.lower(),
-            "to": to_address.lower(),
-            "value": hex(value),
-            "data": data,
-            "save": save,
-            "save_if_fails": save_if_fails,
-            "simulation_type": "full"
+            dst: tx[src] if coerce is None else coerce(tx[src])
+            for src, dst, coerce in _TX_FIELD_MAP
+            if src in tx
         }
-        
+        payload.setdefault("value", "0x0")
+        payload.setdefault("data", "0x")
+        payload["save"] = save
+        payload["save_if_fails"] = save_if_fails
+        payload["simulation_type"] = simulation_type
         if block_number is not None:
             payload["block_number"] = block_number
         
+        return await self._run_simulation(network_id, payload, include_raw)
+    
+    async def _run_simulation(
+        self,
+        network_id: int,
+        payload: Dict[str, Any],
+        include_raw: bool
+    ) -> Dict[str, Any]:
+        """Send a simulation request, going through the result cache when it applies.
+        
+        Concurrent identical cacheable simulations share a single request.
+        """
+        if "block_number" in payload:
+            cache = self._pinned_simulations
+        elif not payload["save"]:
+            cache = self._latest_simulations
+        else:
+            return await self._request_simulation(network_id, payload, include_raw)
+        
+        cache_key = self._simulation_cache_key(network_id, payload)
+        cached = None if include_raw else cache.get(cache_key)
+        if cached is not None:
+            self._cache_hits += 1
+            return copy.deepcopy(cached)
+        self._cache_misses += 1
+        
+        async def fetch() -> Dict[str, Any]:
+            result = await self._request_simulation(network_id, payload, include_raw)
+            cache[cache_key] = copy.deepcopy(
+                {key: value for key, value in result.items() if key != "raw_response"}
+            )
+            return result
+        
+        flight_key = f"{cache_key}:raw" if include_raw else cache_key
+        return copy.deepcopy(await self._inflight.run(flight_key, fetch))
+    
+    async def _request_simulation(
+        self,
+        network_id: int,
+        payload: Dict[str, Any],
+        include_raw: bool
+    ) -> Dict[str, Any]:
+        """POST one simulation to Tenderly and parse the result."""
         try:
-            endpoint = f"account/{self.account_slug}/project/{self.project_slug}/simulate"
             result = await self._make_api_request(
                 "POST",
-                endpoint,
+                self._simulate_endpoint,
                 data=payload,
                 params={"network_id": str(network_id)}
             )
             
-            if not result.get("transaction", {}).get("status", False):
-                error = result.get("error", {}).get("message", "Unknown error")
-                raise SimulationFailedError(f"Transaction simulation failed: {error}")
-                
-            return {
-                "id": result.get("id"),
-                "gas_used": int(result.get("transaction", {}).get("gas_used", 0)),
-                "status": result.get("transaction", {}).get("status", False),
-                "logs": result.get("transaction", {}).get("logs", []),
-                "trace": result.get("transaction", {}).get("transaction_info", {}).get("call_trace", {})
-            }
+            parsed = self._parse_simulation_result(result)
+            if include_raw:
+                parsed["raw_response"] = result
+            return parsed
             
         except Exception as e:
             if not isinstance(e, SimulationFailedError):
                 raise SimulationFailedError(f"Failed to simulate transaction: {str(e)}") from e
             raise
     
+    async def simulate_batch(
+        self,
+        simulations: List[Dict[str, Any]]
+    ) -> List[Union[Dict[str, Any], SimulationFailedError]]:
+        """Simulate several independent transactions concurrently.
+        
+        Unlike simulate_bundle, each transaction is simulated on its own
+        against the chain state, with one request per transaction sent in parallel.
+        
+        Args:
+            simulations: Keyword arguments for simulate_transaction, one dict per transaction
+            
+        Returns:
+            One entry per transaction, in order: the simulation result, or a
+            SimulationFailedError if that transaction failed
+        """
+        outcomes = await asyncio.gather(
+            *(self.simulate_transaction(**params) for params in simulations),
+            return_exceptions=True
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException) and not isinstance(outcome, SimulationFailedError):
+                raise outcome
+        return outcomes
+    
+    async def simulate_bundle(
+        self,
+        simulations: List[Dict[str, Any]],
+        network: str = "mainnet",
+        block_number: Optional[int] = None
+    ) -> List[Union[Dict[str, Any], SimulationFailedError]]:
+        """Simulate several transactions with a single simulate-bundle request.
+        
+        Note that Tenderly executes bundled transactions sequentially, so each
+        transaction sees the state changes of the ones before it.
+        
+        Args:
+            simulations: Keyword arguments for simulate_transaction, one dict per transaction
+            network: Network for transactions that do not set one
+            block_number: Block for transactions that do not set one (latest if None)
+            
+        Returns:
+            One entry per transaction, in order: the simulation result, or a
+            SimulationFailedError if that transaction failed
+            
+        Raises:
+            ValueError: If the bundle has more than MAX_BUNDLE_SIZE transactions
+            SimulationFailedError: If the bundle request itself fails
+        """
+        if len(simulations) > MAX_BUNDLE_SIZE:
+            raise ValueError(
+                f"A bundle holds at most {MAX_BUNDLE_SIZE} transactions, got {len(simulations)}"
+            )
+        
+        payloads = []
+        include_raw = []
+        for params in simulations:
+            params = dict(params)
+            network_id = self._get_network_id(params.pop("network", network))
+            include_raw.append(params.pop("include_raw", False))
+            params.setdefault("block_number", block_number)
+            payload = self._build_simulation_payload(**params)
+            payload["network_id"] = str(network_id)
+            payloads.append(payload)
+        
+        try:
+            result = await self._make_api_request(
+                "POST",
+                self._simulate_bundle_endpoint,
+                data={"simulations": payloads}
+            )
+        except Exception as e:
+            raise SimulationFailedError(f"Failed to simulate bundle: {str(e)}") from e
+        
+        items = result.get("simulation_results", [])
+        if len(items) != len(payloads):
+            raise SimulationFailedError(
+                f"Bundle returned {len(items)} results for {len(payloads)} transactions"
+            )
+        
+        outcomes = []
+        for item, raw in zip(items, include_raw):
+            try:
+                parsed = self._parse_simulation_result(item)
+            except SimulationFailedError as e:
+                outcomes.append(e)
+                continue
+            if raw:
+                parsed["raw_response"] = item
+            outcomes.append(parsed)
+        return outcomes
+    
+    def _build_simulation_payload(
+        self,
+        from_address: str,
+        to_address: str,
+        value: int = 0,
+        data: str = "0x",
+        block_number: Optional[int] = None,
+        save: bool = True,
+        save_if_fails: bool = True,
+        simulation_type: str = "full"
+    ) -> Dict[str, Any]:
+        """Build the request body for a single simulation."""
+        payload = {
+            "from": from_address.lower(),
+            "to": to_address.lower(),
+            "value": hex(value),
+            "data": data,
+            "save": save,
+            "save_if_fails": save_if_fails,
+            "simulation_type": simulation_type
+        }
+        
+        if block_number is not None:
+            payload["block_number"] = block_number
+        
+        return payload
+    
+    def _simulation_cache_key(self, network_id: int, payload: Dict[str, Any]) -> str:
+        """Hash a simulation request; the save flags do not change the result."""
+        normalized = {
+            key: value for key, value in payload.items()
+            if key not in ("save", "save_if_fails")
+        }
+        normalized["data"] = normalized["data"].lower()
+        encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(f"{network_id}:{encoded}".encode(), digest_size=16).hexdigest()
+    
+    def clear_cache(self) -> None:
+        """Drop all cached simulation results."""
+        self._pinned_simulations.clear()
+        self._latest_simulations.clear()
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the size of the simulation caches."""
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "size": len(self._pinned_simulations) + len(self._latest_simulations),
+            "maxsize": SIMULATION_CACHE_SIZE * 2
+        }
+    
+    def _parse_simulation_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the fields we use from a Tenderly simulation response.
+        
+        Raises:
+            SimulationFailedError: If the simulated transaction failed
+        """
+        transaction = result.get("transaction", {})
+        if not transaction.get("status", False):
+            error = result.get("error", {}).get("message", "Unknown error")
+            raise SimulationFailedError(f"Transaction simulation failed: {error}")
+        
+        return {
+            "id": result.get("id"),
+            "gas_used": int(transaction.get("gas_used", 0)),
+            "status": transaction.get("status", False),
+            "logs": transaction.get("logs", []),
+            "trace": transaction.get("transaction_info", {}).get("call_trace", {})
+        }
+    
     async def verify_contract(
         self,
         contract_name: str,
@@ -294,17 +762,15 @@ class TenderlyClient:
         Raises:
             ValueError: If the network is not supported
         """
-        if isinstance(network, int) or (isinstance(network, str) and network.isdigit()):
-            network_id = int(network)
-            if network_id in self.network_map:
+        if isinstance(network, int):
+            if network in NETWORK_MAP:
+                return network
+        else:
+            network_id = _NETWORK_IDS.get(str(network).lower())
+            if network_id is not None:
                 return network_id
-            
-        network_lower = str(network).lower()
-        for net_id, net_info in self.network_map.items():
-            if net_info["name"].lower() == network_lower:
-                return net_id
         
-        supported_networks = ", ".join(f"{k} ({v['name']})" for k, v in self.network_map.items())
+        supported_networks = ", ".join(f"{k} ({v['name']})" for k, v in NETWORK_MAP.items())
         raise ValueError(
             f"Unsupported network: {network}. "
             f"Supported networks: {supported_networks}"
@@ -321,9 +787,10 @@ class TenderlyClient:
             URL to view the address on the appropriate explorer
         """
         network_id = self._get_network_id(network)
-        base_url = self.network_map[network_id]["explorer"]
+        base_url = NETWORK_MAP[network_id]["explorer"]
         return f"{base_url}/address/{address}"
         
+    @contract_cache("source", ttl=settings.CONTRACT_CODE_CACHE_TTL)
     async def get_contract_source(self, contract_address: str, network: str = "mainnet") -> Dict[str, Any]:
         """Fetch verified source code for a contract.
         
@@ -349,6 +816,7 @@ class TenderlyClient:
         except Exception as e:
             raise TenderlyError(f"Failed to fetch contract source: {str(e)}") from e
     
+    @contract_cache("bytecode", ttl=settings.CONTRACT_CODE_CACHE_TTL)
     async def get_contract_bytecode(self, contract_address: str, network: str = "mainnet") -> Dict[str, Any]:
         """Fetch bytecode and deployed bytecode for a contract.
         
@@ -374,6 +842,7 @@ class TenderlyClient:
         except Exception as e:
             raise TenderlyError(f"Failed to fetch contract bytecode: {str(e)}") from e
     
+    @contract_cache("metadata", ttl=settings.CONTRACT_METADATA_CACHE_TTL)
     async def get_contract_metadata(self, contract_address: str, network: str = "mainnet") -> Dict[str, Any]:
         """Fetch metadata for a verified contract.
         
@@ -398,3 +867,7 @@ class TenderlyClient:
             )
         except Exception as e:
             raise TenderlyError(f"Failed to fetch contract metadata: {str(e)}") from e
+
+
+# Name used by older callers such as the RAG pipeline
+TenderlySimulator = TenderlyClient
@@ -0,0 +1,77 @@
+"""
+Caching helpers for Web3 Guardian backend
+"""
+
+import inspect
+import json
+from functools import wraps
+from typing import Any, Awaitable, Callable
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from async_lru import alru_cache
+
+from .config import settings
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Shared Redis client (connections are opened lazily on first command)
+redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+def contract_cache(kind: str, ttl: int, maxsize: int = 4096):
+    """Two-tier cache for async lookups keyed on (network, contract_address).
+
+    Results are kept in an in-process LRU and in Redis under
+    ``cache:{kind}:{network}:{contract_address}``. Redis is checked first on an
+    LRU miss; the wrapped coroutine is only awaited when both layers miss.
+    Values are stored serialized so callers always receive a fresh copy.
+    Set ``CACHE_DISABLED`` to bypass both layers.
+
+    Args:
+        kind: Cache namespace (e.g. "metadata", "source", "bytecode")
+        ttl: Time to live in seconds for both layers
+        maxsize: Maximum number of entries in the in-process LRU
+
+    The decorated coroutine must accept ``contract_address`` and ``network``
+    arguments. The underlying LRU exposes ``cache_clear()`` on the wrapper.
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        signature = inspect.signature(func)
+
+        @alru_cache(maxsize=maxsize, ttl=ttl)
+        async def cached_call(key: str, *args) -> str:
+            try:
+                cached = await redis_client.get(key)
+                if cached is not None:
+                    return cached
+            except RedisError as e:
+                logger.warning(f"Redis cache read failed for {key}: {e}")
+
+            serialized = json.dumps(await func(*args), default=str)
+
+            try:
+                await redis_client.set(key, serialized, ex=ttl)
+            except RedisError as e:
+                logger.warning(f"Redis cache write failed for {key}: {e}")
+
+            return serialized
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if settings.CACHE_DISABLED:
+                return await func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            network = str(bound.arguments["network"]).lower()
+            contract_address = bound.arguments["contract_address"].lower()
+            key = f"cache:{kind}:{network}:{contract_address}"
+
+            return json.loads(await cached_call(key, *bound.args))
+
+        wrapper.cache_clear = cached_call.cache_clear
+        return wrapper
+
+    return decorator
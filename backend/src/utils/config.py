@@ -3,10 +3,11 @@ Configuration settings for Web3 Guardian backend
 """
 
 import os
+from functools import lru_cache
 from typing import Optional, List
 from pathlib import Path
 from dotenv import load_dotenv
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, field_validator
 
 # Load environment variables from .env file
@@ -14,6 +15,12 @@ env_path = Path(__file__).resolve().parents[3] / '.env'
 load_dotenv(dotenv_path=env_path)
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=True
+    )
+    
     # Basic API settings
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "Web3 Guardian"
@@ -55,16 +62,21 @@ class Settings(BaseSettings):
     # Redis settings for caching
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))  # 1 hour
+    CACHE_DISABLED: bool = os.getenv("CACHE_DISABLED", "false").lower() in ("1", "true", "yes")
+    CONTRACT_METADATA_CACHE_TTL: int = int(os.getenv("CONTRACT_METADATA_CACHE_TTL", "300"))  # 5 minutes
+    CONTRACT_CODE_CACHE_TTL: int = int(os.getenv("CONTRACT_CODE_CACHE_TTL", "86400"))  # 24 hours
     
     # Web3 settings
     WEB3_PROVIDER_URL: str = "https://mainnet.infura.io/v3/your-project-id"
     ETHERSCAN_API_KEY: Optional[str] = None
+    NVD_API_KEY: Optional[str] = None  # Raises the NVD CVE API rate limit for knowledge base updates
     
     # Google Gemini AI settings
     GOOGLE_API_KEY: Optional[str] = Field(default=os.getenv("GEMINI_API_KEY"), description="Google API key for Gemini")
     GEMINI_MODEL: str = "gemini-1.5-pro"
     TEMPERATURE: float = 0.1
     MAX_TOKENS: int = 8192
+    GEMINI_CONCURRENCY: int = 4  # Concurrent Gemini requests per process
     
     # Tenderly settings
     TENDERLY_ACCOUNT_SLUG: str = Field(default=os.getenv("TENDERLY_ACCOUNT_SLUG", "0xProfessor"))
@@ -100,7 +112,19 @@ class Settings(BaseSettings):
     
     # RAG and Vector Database settings
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
-    CHROMA_PERSIST_DIRECTORY: str = "./data/chroma_db"
+    EMBEDDING_BATCH_SIZE: int = 64
+    FAISS_INDEX_PATH: str = "./data/faiss_index"
+    EMBEDDING_CACHE_PATH: str = "./data/embeddings.sqlite"
+    EMBEDDING_QUANT: str = "fp32"  # "fp32" or "i8" (8-bit scalar-quantized index)
+    # Reuse the RAG answer to a near-identical query for the same contract address.
+    # Off by default for the same reason as ANALYSIS_NEAR_MATCH below.
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Cosine similarity for reusing a RAG answer
+    SEMANTIC_CACHE_TTL: int = 3600  # seconds
+    # Reuse the analysis of a near-identical contract version at the same address.
+    # Off by default: the embedding model only sees the first few hundred tokens.
+    ANALYSIS_NEAR_MATCH: bool = False
+    ANALYSIS_NEAR_MATCH_THRESHOLD: float = 0.98
     KNOWLEDGE_BASE_PATH: str = "./data/knowledge_base"
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
@@ -108,6 +132,9 @@ class Settings(BaseSettings):
     # Vector search settings
     SIMILARITY_THRESHOLD: float = 0.7
     MAX_RETRIEVAL_DOCS: int = 5
+    RAG_SEARCH_TYPE: str = "similarity"  # "similarity" or "mmr" (maximal marginal relevance)
+    RAG_MMR_FETCH_K: int = 20  # Candidates reranked by MMR
+    RAG_MMR_LAMBDA: float = 0.5  # 1.0 ranks by relevance only, 0.0 by diversity only
     
     # Tenderly simulation settings
     TENDERLY_ACCESS_KEY: Optional[str] = None
@@ -115,11 +142,17 @@ class Settings(BaseSettings):
     TENDERLY_USERNAME: Optional[str] = None
     TENDERLY_FORK_ID: Optional[str] = None
     TENDERLY_API_URL: str = "https://api.tenderly.co"
+    TENDERLY_MAX_INFLIGHT: int = 16  # Concurrent Tenderly requests per process
+    TENDERLY_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open the circuit
+    TENDERLY_CIRCUIT_RECOVERY_TIMEOUT: float = 30.0  # Seconds before a trial request is let through
     
     # Analysis settings
     MAX_CONTRACT_SIZE: int = 1000000  # 1MB
     ANALYSIS_TIMEOUT: int = 300  # 5 minutes
     CONCURRENT_ANALYSES: int = 5
+    ANALYSIS_QUEUE_SIZE: int = 1000
+    ANALYSIS_INFLIGHT_TTL: int = 600  # Max time an in-flight analysis absorbs duplicates
+    ANALYSIS_DEDUP_TTL: int = 30  # How long a completed analysis is reused for duplicates
     
     # Security tool settings
     SLITHER_TIMEOUT: int = 120
@@ -177,15 +210,15 @@ class Settings(BaseSettings):
     ENABLE_SWAGGER: bool = True
     ENABLE_REDOC: bool = True
     ENABLE_DEBUG_TOOLBAR: bool = False
-    
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = True
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the application settings, parsed from the environment once."""
+    return Settings()
 
 # Create global settings instance
 try:
-    settings = Settings()
+    settings = get_settings()
 except Exception as e:
     print(f"Error loading settings: {e}")
     print(f"Current working directory: {os.getcwd()}")
@@ -0,0 +1,88 @@
+"""
+On-disk cache of document embeddings keyed by content hash
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+
+# SQLite's default limit on host parameters is 999
+_LOOKUP_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    sha256 BLOB NOT NULL,
+    model TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vec BLOB NOT NULL,
+    PRIMARY KEY (sha256, model)
+)
+"""
+
+
+class EmbeddingCache:
+    """SQLite store of float32 embeddings keyed by (SHA-256 of text, model name).
+
+    The model name is part of the key, so switching ``EMBEDDING_MODEL`` never
+    returns vectors from the previous model.
+    """
+
+    def __init__(self, path: Path, model: str):
+        """Open (and create if needed) the cache database.
+
+        Args:
+            path: Path to the SQLite file
+            model: Name of the embedding model the vectors belong to
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.model = model
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def get_many(self, hashes: Iterable[bytes]) -> Dict[bytes, np.ndarray]:
+        """Look up cached embeddings.
+
+        Vectors are returned as float32 arrays over the stored bytes, without
+        converting each component to a Python float.
+
+        Args:
+            hashes: SHA-256 digests of the texts
+
+        Returns:
+            Embeddings of the hashes found in the cache
+        """
+        unique = list(dict.fromkeys(hashes))
+        found = {}
+        for start in range(0, len(unique), _LOOKUP_BATCH):
+            batch = unique[start:start + _LOOKUP_BATCH]
+            placeholders = ", ".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT sha256, vec FROM embeddings WHERE model = ? AND sha256 IN ({placeholders})",
+                [self.model, *batch],
+            )
+            for digest, vec in rows:
+                found[digest] = np.frombuffer(vec, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, Sequence[float]]]):
+        """Store embeddings, replacing any existing entry for the same text and model.
+
+        Args:
+            items: (SHA-256 digest, embedding) pairs
+        """
+        rows = []
+        for digest, embedding in items:
+            vec = np.asarray(embedding, dtype=np.float32)
+            rows.append((digest, self.model, vec.shape[0], vec.tobytes()))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (sha256, model, dim, vec) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
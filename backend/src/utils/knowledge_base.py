@@ -0,0 +1,107 @@
+"""
+Append-only JSONL storage for knowledge base documents
+"""
+
+import mmap
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import orjson
+
+# Documents written by scripts/update_knowledge_base.py, and their index
+UPDATES_KB_FILE = "updates.jsonl"
+UPDATES_INDEX_FILE = "updates.index"
+
+# Index entry: byte offset and length of a JSONL line, then the length of the record name
+_INDEX_ENTRY = struct.Struct("<QIH")
+
+
+def read_index(index_path: Path) -> List[Tuple[str, int, int]]:
+    """Read the (name, offset, length) entries of a JSONL index, in file order.
+
+    Args:
+        index_path: Path to the index file
+
+    Returns:
+        Index entries, or an empty list if the index does not exist
+    """
+    try:
+        data = index_path.read_bytes()
+    except FileNotFoundError:
+        return []
+
+    entries = []
+    position = 0
+    while position + _INDEX_ENTRY.size <= len(data):
+        offset, length, name_length = _INDEX_ENTRY.unpack_from(data, position)
+        position += _INDEX_ENTRY.size
+        name = data[position:position + name_length].decode("utf-8")
+        position += name_length
+        entries.append((name, offset, length))
+
+    return entries
+
+
+def append_records(jsonl_path: Path, index_path: Path, records: List[Dict[str, Any]]) -> int:
+    """Append records to a JSONL file and their offsets to its index.
+
+    Each record must have a unique ``name``. The JSONL lines are flushed before
+    the index is written, so the index never points past the end of the data.
+
+    Args:
+        jsonl_path: Path to the JSONL file
+        index_path: Path to the index file
+        records: Records to append
+
+    Returns:
+        Number of records appended
+    """
+    lines = [orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE) for record in records]
+    if not lines:
+        return 0
+
+    with open(jsonl_path, "ab") as data_fp:
+        offset = data_fp.seek(0, 2)
+        data_fp.writelines(lines)
+
+    index = bytearray()
+    for record, line in zip(records, lines):
+        name = record["name"].encode("utf-8")
+        index += _INDEX_ENTRY.pack(offset, len(line), len(name))
+        index += name
+        offset += len(line)
+
+    with open(index_path, "ab") as index_fp:
+        index_fp.write(index)
+
+    return len(lines)
+
+
+def iter_indexed_records(jsonl_path: Path, index_path: Path) -> Iterator[Dict[str, Any]]:
+    """Iterate over the records of an indexed JSONL file, in index order.
+
+    The JSONL file is memory-mapped and each record is decoded straight from
+    its slice of the map, so only the pages that are touched get read in.
+    Index entries that point past the end of the file are skipped.
+
+    Args:
+        jsonl_path: Path to the JSONL file
+        index_path: Path to the index file
+
+    Returns:
+        Iterator over the decoded records
+    """
+    entries = read_index(index_path)
+    if not entries:
+        return
+
+    with open(jsonl_path, "rb") as data_fp:
+        size = data_fp.seek(0, 2)
+        if size == 0:
+            return
+        with mmap.mmap(data_fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for _, offset, length in entries:
+                if offset + length > size:
+                    continue
+                yield orjson.loads(data[offset:offset + length])
@@ -0,0 +1,61 @@
+"""
+Coalescing of concurrent identical async calls
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Type
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key share its result.
+
+    The first caller (the leader) runs the factory. Callers arriving while it is
+    in flight await the same future, shielded so that cancelling one of them
+    does not affect the others. If the leader itself is cancelled, the waiting
+    callers fail with ``cancelled_error`` rather than a CancelledError they
+    did not ask for.
+    """
+
+    def __init__(self, cancelled_error: Type[Exception] = RuntimeError):
+        """Create an empty group.
+
+        Args:
+            cancelled_error: Exception raised to waiting callers when the leader is cancelled
+        """
+        self.cancelled_error = cancelled_error
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() unless a call with the same key is in flight, then share its result.
+
+        Args:
+            key: Identity of the call
+            factory: Creates the awaitable doing the work
+
+        Returns:
+            The result of the shared call
+        """
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.set_exception(self.cancelled_error(f"Shared call {key} was cancelled"))
+            future.exception()  # Mark retrieved in case nobody else is waiting
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+from src.optimization.gas_optimizer import BATCH_RETRY_COOLDOWN, GasOptimizer
+
+TEST_TX = {
+    "from": "0x9876543210987654321098765432109876543210",
+    "to": "0x1234567890123456789012345678901234567890",
+    "value": 0
+}
+
+
+def make_web3():
+    """Build a Web3 stand-in whose single calls return fixed fees."""
+    web3 = MagicMock()
+    web3.provider.endpoint_uri = "http://rpc.test"
+    web3.provider.get_request_kwargs.return_value = {"headers": {"Content-Type": "application/json"}}
+    web3.eth.gas_price = 30 * 10**9
+    web3.eth.get_block.return_value = {"baseFeePerGas": 20 * 10**9}
+    web3.eth.fee_history.return_value = {"reward": [[10**9], [3 * 10**9], [2 * 10**9]]}
+    web3.eth.estimate_gas.return_value = 21000
+    return web3
+
+
+def rpc_handler(requests, fee_history=None, estimate=None, reverse=False):
+    """Answer JSON-RPC batches with fixed results, recording each batch."""
+    results = {
+        "eth_gasPrice": {"result": hex(30 * 10**9)},
+        "eth_getBlockByNumber": {"result": {"number": "0x10", "baseFeePerGas": hex(10 * 10**9)}},
+        "eth_feeHistory": fee_history or {"result": {"reward": [["0x3b9aca00"], ["0xb2d05e00"], ["0x77359400"]]}},
+        "eth_estimateGas": estimate or {"result": hex(50000)},
+    }
+
+    def handler(request):
+        batch = json.loads(request.content)
+        requests.append(batch)
+        replies = [{"jsonrpc": "2.0", "id": call["id"], **results[call["method"]]} for call in batch]
+        return httpx.Response(200, json=replies[::-1] if reverse else replies)
+
+    return handler
+
+
+def make_optimizer(handler, web3=None):
+    """Build a gas optimizer whose JSON-RPC batches are answered by ``handler``."""
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return GasOptimizer(web3 or make_web3(), http_client=http_client)
+
+
+class TestBatchFallback:
+    """Test falling back from batched JSON-RPC to single calls."""
+
+    async def test_http_error_starts_cooldown(self):
+        """Test a failing batch endpoint is not retried on every call."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(503)
+
+        optimizer = make_optimizer(handler)
+        first = await optimizer.optimize_gas(dict(TEST_TX))
+        optimizer._fee_cache = None
+        second = await optimizer.optimize_gas(dict(TEST_TX))
+
+        assert len(requests) == 1
+        assert first["maxFeePerGas"] == second["maxFeePerGas"] == 22 * 10**9
+        assert first["gas"] == 21000
+
+    async def test_batching_resumes_after_cooldown(self):
+        """Test a batch is tried again once the cooldown has passed."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(503)
+
+        optimizer = make_optimizer(handler)
+        with patch("src.optimization.gas_optimizer.time.monotonic", return_value=1000.0):
+            await optimizer.optimize_gas(dict(TEST_TX))
+        optimizer._fee_cache = None
+        with patch("src.optimization.gas_optimizer.time.monotonic", return_value=1000.0 + BATCH_RETRY_COOLDOWN):
+            await optimizer.optimize_gas(dict(TEST_TX))
+
+        assert len(requests) == 2
+
+
+class TestBatchRequest:
+    """Test fetching fees and the gas estimate in one JSON-RPC batch."""
+
+    async def test_one_batch_for_fees_and_estimate(self):
+        """Test all calls go out in one request and replies are matched by id."""
+        requests = []
+        web3 = make_web3()
+        optimizer = make_optimizer(rpc_handler(requests, reverse=True), web3)
+
+        optimized = await optimizer.optimize_gas(dict(TEST_TX))
+
+        assert len(requests) == 1
+        assert [call["method"] for call in requests[0]] == [
+            "eth_gasPrice", "eth_getBlockByNumber", "eth_feeHistory", "eth_estimateGas"
+        ]
+        assert requests[0][3]["params"][0]["value"] == "0x0"
+        assert optimized["gas"] == 50000
+        assert optimized["maxPriorityFeePerGas"] == 2 * 10**9
+        assert optimized["maxFeePerGas"] == 12 * 10**9
+        web3.eth.estimate_gas.assert_not_called()
+
+    async def test_provider_headers_and_auth_are_forwarded(self):
+        """Test the batch carries the headers, auth and timeout configured on the provider."""
+        requests = []
+        sent = []
+        handler = rpc_handler(requests)
+
+        def recording_handler(request):
+            sent.append(request)
+            return handler(request)
+
+        web3 = make_web3()
+        web3.provider.get_request_kwargs.return_value = {
+            "headers": {"Content-Type": "application/json", "X-Api-Key": "secret"},
+            "auth": ("user", "pass"),
+            "timeout": (3, 20),
+            "verify": False,
+        }
+        optimizer = make_optimizer(recording_handler, web3)
+
+        await optimizer.optimize_gas(dict(TEST_TX))
+
+        assert sent[0].headers["X-Api-Key"] == "secret"
+        assert sent[0].headers["Authorization"] == "Basic dXNlcjpwYXNz"
+        assert sent[0].extensions["timeout"] == {"connect": 3, "read": 20, "write": 20, "pool": 20}
+
+    async def test_given_gas_skips_estimate(self):
+        """Test no eth_estimateGas is sent when the transaction sets gas."""
+        requests = []
+        optimizer = make_optimizer(rpc_handler(requests))
+
+        optimized = await optimizer.optimize_gas({**TEST_TX, "gas": 60000})
+
+        assert [call["method"] for call in requests[0]][-1] == "eth_feeHistory"
+        assert optimized["gas"] == 60000
+
+    async def test_failed_estimate_uses_default_gas(self):
+        """Test an error reply to eth_estimateGas falls back to the default gas limit."""
+        requests = []
+        optimizer = make_optimizer(rpc_handler(
+            requests, estimate={"error": {"code": 3, "message": "execution reverted"}}
+        ))
+
+        optimized = await optimizer.optimize_gas(dict(TEST_TX))
+
+        assert optimized["gas"] == 200000
+
+    async def test_rejected_batch_falls_back_to_single_calls(self):
+        """Test a provider answering a batch with a single error object is queried call by call."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": None, "error": {"message": "batch not supported"}})
+
+        web3 = make_web3()
+        optimizer = make_optimizer(handler, web3)
+        optimized = await optimizer.optimize_gas(dict(TEST_TX))
+
+        assert len(requests) == 1
+        web3.eth.get_block.assert_called_once_with('latest')
+        assert optimized["maxFeePerGas"] == 22 * 10**9
+        assert optimized["gas"] == 21000
+
+
+class TestFeeCache:
+    """Test reuse of fetched fees within FEE_CACHE_TTL."""
+
+    async def test_fees_are_reused_until_they_expire(self):
+        """Test a second call within the TTL only estimates gas, and fees refresh after it."""
+        requests = []
+        optimizer = make_optimizer(rpc_handler(requests))
+
+        first = await optimizer.optimize_gas(dict(TEST_TX))
+        second = await optimizer.optimize_gas(dict(TEST_TX))
+
+        assert len(requests) == 2
+        assert [call["method"] for call in requests[1]] == ["eth_estimateGas"]
+        assert second == first
+
+        # Expire the cached fees
+        _, *fees = optimizer._fee_cache
+        optimizer._fee_cache = (time.monotonic() - 1, *fees)
+        await optimizer.optimize_gas(dict(TEST_TX))
+
+        assert len(requests) == 3
+        assert requests[2][0]["method"] == "eth_gasPrice"
+
+    async def test_concurrent_calls_share_one_fetch(self):
+        """Test callers arriving while fees are fetched wait for that fetch."""
+        requests = []
+        optimizer = make_optimizer(rpc_handler(requests))
+
+        results = await asyncio.gather(*(
+            optimizer.optimize_gas({**TEST_TX, "gas": 21000}) for _ in range(5)
+        ))
+
+        assert len(requests) == 1
+        assert all(result == results[0] for result in results)
+
+
+class TestPriorityFee:
+    """Test the priority fee taken from eth_feeHistory."""
+
+    def test_median_of_block_rewards(self):
+        """Test the median is taken over blocks, from hex or integer rewards."""
+        optimizer = make_optimizer(lambda request: httpx.Response(500))
+
+        assert optimizer._median_priority_fee([["0x5"], ["0x1"], ["0x3"]]) == 3
+        assert optimizer._median_priority_fee([[7], [1], [4], [9]]) == 7
+        assert optimizer._median_priority_fee([["0x2"], [], ["0x4"]]) == 4
+
+    def test_missing_rewards_use_configured_fee(self):
+        """Test an empty history falls back to max_priority_fee_per_gas."""
+        optimizer = make_optimizer(lambda request: httpx.Response(500))
+
+        assert optimizer._median_priority_fee(None) == optimizer.max_priority_fee_per_gas
+        assert optimizer._median_priority_fee([[], []]) == optimizer.max_priority_fee_per_gas
+
+    async def test_provider_without_fee_history(self):
+        """Test an error reply to eth_feeHistory keeps the configured priority fee."""
+        requests = []
+        optimizer = make_optimizer(rpc_handler(
+            requests, fee_history={"error": {"code": -32601, "message": "method not found"}}
+        ))
+
+        optimized = await optimizer.optimize_gas({**TEST_TX, "gas": 21000})
+
+        assert optimized["maxPriorityFeePerGas"] == optimizer.max_priority_fee_per_gas
+        assert optimized["maxFeePerGas"] == 10 * 10**9 + optimizer.max_priority_fee_per_gas
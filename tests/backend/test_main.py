@@ -2,6 +2,7 @@ import pytest
 import asyncio
 import json
 import uuid
+import time
 from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
@@ -11,12 +12,131 @@ from pathlib import Path
 # Add the backend directory to the Python path
 sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
 
-from main import app, analysis_results, tenderly_client
+from main import app, tenderly_client, hot_analyses
 from src.simulation.tenderly_new import TenderlyError, SimulationFailedError
 
 # Create a test client
 client = TestClient(app)
 
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the async Redis client."""
+    
+    def __init__(self):
+        self.store = {}
+        self.published = []
+    
+    async def get(self, key):
+        return self.store.get(key)
+    
+    async def mget(self, *keys):
+        return [self.store.get(key) for key in keys]
+    
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+    
+    async def expire(self, key, seconds):
+        return key in self.store
+    
+    async def delete(self, *keys):
+        return sum(self.store.pop(key, None) is not None for key in keys)
+    
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+    
+    async def eval(self, script, numkeys, key, expected, value, ttl):
+        # Only the compare-and-set used by claim_analysis is supported
+        if self.store.get(key) != expected:
+            return None
+        self.store[key] = value
+        return True
+    
+    def pubsub(self):
+        return FakePubSub(self)
+    
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Buffers commands and applies them together on execute()."""
+    
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.commands.clear()
+    
+    def set(self, *args, **kwargs):
+        self.commands.append((self.redis.set, args, kwargs))
+        return self
+    
+    def publish(self, *args, **kwargs):
+        self.commands.append((self.redis.publish, args, kwargs))
+        return self
+    
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        return [await command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class FakePubSub:
+    """Replays messages already published on the subscribed channels."""
+    
+    def __init__(self, redis):
+        self.redis = redis
+        self.channels = set()
+    
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+    
+    async def listen(self):
+        for channel, message in list(self.redis.published):
+            if channel in self.channels:
+                yield {"type": "message", "channel": channel, "data": message}
+    
+    async def aclose(self):
+        self.channels.clear()
+
+
+fake_redis = FakeRedis()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app_lifespan():
+    """Run the startup/shutdown handlers so the analysis workers are running."""
+    with client:
+        yield
+
+
+@pytest.fixture(autouse=True)
+def use_fake_redis():
+    """Route the analysis store through the in-memory Redis stand-in."""
+    fake_redis.store.clear()
+    fake_redis.published.clear()
+    hot_analyses.clear()
+    with patch('main.redis_client', fake_redis):
+        yield fake_redis
+
+
+def stored_analysis(analysis_id):
+    """Read an analysis straight from the fake Redis store."""
+    raw = fake_redis.store.get(f"analysis:{analysis_id}")
+    return json.loads(raw) if raw else None
+
+
+def store_analysis(analysis_id, data):
+    """Seed an analysis into the fake Redis store."""
+    fake_redis.store[f"analysis:{analysis_id}"] = json.dumps(data)
+
 # Test data constants
 TEST_CONTRACT_ADDRESS = "0x1234567890123456789012345678901234567890"
 TEST_NETWORK = "ethereum"
@@ -66,10 +186,11 @@ class TestContractAnalysis:
         assert data["status"] == "pending"
         assert isinstance(data["results"], dict)
         
-        # Verify the analysis was stored
+        # Verify the analysis was stored; a worker may already have picked it up
         analysis_id = data["analysis_id"]
-        assert analysis_id in analysis_results
-        assert analysis_results[analysis_id]["status"] == "pending"
+        stored = stored_analysis(analysis_id)
+        assert stored["status"] in ("pending", "in_progress", "completed", "failed")
+        assert stored["contract_address"] == TEST_CONTRACT_ADDRESS
     
     def test_analyze_contract_invalid_address(self):
         """Test contract analysis with invalid address."""
@@ -90,7 +211,7 @@ class TestContractAnalysis:
         """Test retrieving analysis results."""
         # First create an analysis
         analysis_id = str(uuid.uuid4())
-        analysis_results[analysis_id] = {
+        store_analysis(analysis_id, {
             "status": "completed",
             "results": {
                 "static": {
@@ -100,7 +221,7 @@ class TestContractAnalysis:
             },
             "contract_address": TEST_CONTRACT_ADDRESS,
             "network": TEST_NETWORK
-        }
+        })
         
         response = client.get(f"/api/analysis/{analysis_id}")
         
@@ -110,6 +231,80 @@ class TestContractAnalysis:
         assert data["status"] == "completed"
         assert "static" in data["results"]
     
+    def test_get_analysis_caches_completed_response(self):
+        """Test that completed analyses are served from the response cache."""
+        analysis_id = str(uuid.uuid4())
+        store_analysis(analysis_id, {"status": "completed", "results": {"static": {}}})
+        
+        first = client.get(f"/api/analysis/{analysis_id}")
+        fake_redis.store.pop(f"analysis:{analysis_id}")
+        second = client.get(f"/api/analysis/{analysis_id}")
+        
+        assert second.status_code == 200
+        assert second.json() == first.json()
+    
+    def test_get_analysis_does_not_cache_pending_response(self):
+        """Test that in-progress analyses are always read fresh."""
+        analysis_id = str(uuid.uuid4())
+        store_analysis(analysis_id, {"status": "in_progress", "results": {}})
+        
+        client.get(f"/api/analysis/{analysis_id}")
+        
+        assert f"analysis:response:{analysis_id}" not in fake_redis.store
+    
+    def test_get_analysis_serves_hot_ids_from_memory(self):
+        """Test that repeated polls within the TTL do not hit Redis."""
+        analysis_id = str(uuid.uuid4())
+        store_analysis(analysis_id, {"status": "in_progress", "results": {}})
+        
+        client.get(f"/api/analysis/{analysis_id}")
+        store_analysis(analysis_id, {"status": "completed", "results": {}})
+        response = client.get(f"/api/analysis/{analysis_id}")
+        
+        assert response.json()["status"] == "in_progress"
+        
+        time.sleep(0.25)
+        response = client.get(f"/api/analysis/{analysis_id}")
+        
+        assert response.json()["status"] == "completed"
+    
+    def test_stream_analysis_until_completed(self):
+        """Test streaming status transitions until the analysis completes."""
+        analysis_id = str(uuid.uuid4())
+        store_analysis(analysis_id, {"status": "pending", "results": {}})
+        fake_redis.published.append((
+            f"channel:analysis:{analysis_id}",
+            json.dumps({"status": "completed", "results": {"static": {}}})
+        ))
+        
+        response = client.get(f"/api/analysis/{analysis_id}/stream")
+        
+        assert response.status_code == 200
+        events = [
+            line.split(":", 1)[1].strip()
+            for line in response.text.splitlines()
+            if line.startswith("event:")
+        ]
+        assert events == ["pending", "completed"]
+    
+    def test_stream_analysis_not_found(self):
+        """Test streaming a non-existent analysis."""
+        response = client.get(f"/api/analysis/{uuid.uuid4()}/stream")
+        
+        assert response.status_code == 404
+    
+    def test_new_analysis_id_is_time_ordered_uuid7(self):
+        """Test that analysis IDs are unique, time-ordered UUIDv7s."""
+        from main import new_analysis_id
+        
+        first = new_analysis_id()
+        time.sleep(0.002)
+        second = new_analysis_id()
+        
+        assert uuid.UUID(first).version == 7
+        assert uuid.UUID(first).variant == uuid.RFC_4122
+        assert first < second
+    
     def test_get_analysis_not_found(self):
         """Test retrieving non-existent analysis."""
         fake_id = str(uuid.uuid4())
@@ -118,6 +313,48 @@ class TestContractAnalysis:
         assert response.status_code == 404
         assert "not found" in response.json()["detail"]
     
+    @patch('main.perform_static_analysis')
+    @patch('main.perform_dynamic_analysis')
+    async def test_run_analysis_saves_each_transition(self, mock_dynamic, mock_static):
+        """Test every state transition is stored and merged into the original record."""
+        from main import run_analysis, ContractAnalysisRequest
+        
+        mock_static.return_value = {"vulnerabilities": []}
+        mock_dynamic.return_value = {"simulation_id": "sim_123"}
+        
+        analysis_id = str(uuid.uuid4())
+        store_analysis(analysis_id, {
+            "status": "pending",
+            "results": {},
+            "contract_address": TEST_CONTRACT_ADDRESS,
+            "network": TEST_NETWORK,
+            "timestamp": "2024-01-01T00:00:00"
+        })
+        
+        saved = []
+        original_set = fake_redis.set
+        
+        async def recording_set(key, value, **kwargs):
+            if key == f"analysis:{analysis_id}":
+                saved.append(json.loads(value))
+            return await original_set(key, value, **kwargs)
+        
+        request = ContractAnalysisRequest(**TEST_CONTRACT_ANALYSIS_REQUEST)
+        with patch.object(fake_redis, 'set', recording_set):
+            await run_analysis(analysis_id, request)
+        
+        assert [state["status"] for state in saved] == [
+            "in_progress", "in_progress", "in_progress", "completed"
+        ]
+        assert len(saved[1]["results"]) == 1
+        
+        final = stored_analysis(analysis_id)
+        assert final["status"] == "completed"
+        assert set(final["results"]) == {"static", "dynamic"}
+        assert final["contract_address"] == TEST_CONTRACT_ADDRESS
+        assert final["network"] == TEST_NETWORK
+        assert final["timestamp"] == "2024-01-01T00:00:00"
+    
     @patch('main.fetch_contract_details')
     @patch('main.get_rag_pipeline')
     async def test_perform_static_analysis_verified_contract(self, mock_rag, mock_fetch):
@@ -172,16 +409,35 @@ class TestContractAnalysis:
         assert result["is_verified"] is False
         assert len(result["warnings"]) > 0
         assert "not verified" in result["warnings"][0]
-    
+
+    @patch('main.fetch_contract_details')
+    @patch('main.get_rag_pipeline')
+    async def test_perform_static_analysis_keyword_fallback(self, mock_rag, mock_fetch):
+        """Test keyword fallback when the RAG pipeline is unavailable."""
+        from main import perform_static_analysis
+
+        mock_fetch.return_value = {
+            "is_verified": True,
+            "source": "contract Proxy { function kill() public { SelfDestruct(owner); } }",
+            "contract_name": "Proxy",
+            "compiler_version": "0.8.19"
+        }
+        mock_rag.side_effect = Exception("RAG unavailable")
+
+        result = await perform_static_analysis(TEST_CONTRACT_ADDRESS, TEST_NETWORK)
+
+        assert [v["title"] for v in result["vulnerabilities"]] == ["Self-Destruct Function"]
+        assert result["security_score"] == 8.0
+
     @patch('main.tenderly_client')
     async def test_perform_dynamic_analysis_success(self, mock_client):
         """Test successful dynamic analysis."""
         from main import perform_dynamic_analysis
         
-        # Mock Tenderly client responses
-        mock_client.get_contract_metadata.return_value = {
-            "contract_name": "ERC20Token"
-        }
+        # Mock Tenderly client responses (bytecode exposing transfer + balanceOf)
+        mock_client.get_contract_bytecode = AsyncMock(return_value={
+            "deployed_bytecode": "0x6080604052...63a9059cbb...6370a08231..."
+        })
         mock_client.simulate_transaction.return_value = {
             "id": "sim_123",
             "gas_used": 21000,
@@ -202,7 +458,7 @@ class TestContractAnalysis:
         """Test dynamic analysis with simulation failure."""
         from main import perform_dynamic_analysis
         
-        mock_client.get_contract_metadata.return_value = {"contract_name": "TestContract"}
+        mock_client.get_contract_bytecode = AsyncMock(return_value={"deployed_bytecode": "0x6080604052"})
         mock_client.simulate_transaction.side_effect = SimulationFailedError("Transaction reverted")
         
         result = await perform_dynamic_analysis(TEST_CONTRACT_ADDRESS, TEST_NETWORK)
@@ -281,6 +537,28 @@ class TestUtilityFunctions:
         assert result["is_verified"] is True
         assert result["source"] == "contract VerifiedContract {}"
         assert result["contract_name"] == "VerifiedContract"
+    
+    @patch('main.tenderly_client')
+    async def test_is_erc20_contract_matches_push4_selectors(self, mock_client):
+        """Test that ERC-20 selectors only count as PUSH4 operands, not anywhere in the bytecode."""
+        from main import is_erc20_contract
+        
+        mock_client.get_contract_bytecode = AsyncMock(return_value={
+            "deployed_bytecode": "0x608060405263a9059cbb811460245780636370a0823114602957"
+        })
+        assert await is_erc20_contract(TEST_CONTRACT_ADDRESS, TEST_NETWORK) is True
+        
+        # Selector bytes inside other data, e.g. the metadata hash, do not count
+        mock_client.get_contract_bytecode = AsyncMock(return_value={
+            "deployed_bytecode": "0x6080604052a9059cbb70a08231a264697066735822"
+        })
+        assert await is_erc20_contract(TEST_CONTRACT_ADDRESS, TEST_NETWORK) is False
+
+        # PUSH4 + selector straddling byte boundaries (starting at an odd nibble) does not count
+        mock_client.get_contract_bytecode = AsyncMock(return_value={
+            "deployed_bytecode": "0x6080163a9059cbb016370a082310"
+        })
+        assert await is_erc20_contract(TEST_CONTRACT_ADDRESS, TEST_NETWORK) is False
 
 
 class TestErrorHandling:
@@ -301,9 +579,60 @@ class TestErrorHandling:
         
         await run_analysis(analysis_id, request)
         
-        assert analysis_results[analysis_id]["status"] == "failed"
-        assert "error" in analysis_results[analysis_id]
+        assert stored_analysis(analysis_id)["status"] == "failed"
+        assert "error" in stored_analysis(analysis_id)
+        
+        statuses = [json.loads(message)["status"] for _, message in fake_redis.published]
+        assert statuses == ["in_progress", "failed"]
     
+    @patch('main.perform_static_analysis')
+    @patch('main.perform_dynamic_analysis')
+    async def test_run_analysis_fails_on_cancelled_step(self, mock_dynamic, mock_static):
+        """Test a step ending in CancelledError fails the analysis instead of completing it."""
+        from main import run_analysis, ContractAnalysisRequest
+        
+        mock_static.return_value = {"vulnerabilities": []}
+        mock_dynamic.side_effect = asyncio.CancelledError()
+        
+        analysis_id = str(uuid.uuid4())
+        request = ContractAnalysisRequest(**TEST_CONTRACT_ANALYSIS_REQUEST)
+        
+        await run_analysis(analysis_id, request)
+        
+        assert stored_analysis(analysis_id)["status"] == "failed"
+
+    @patch('main.perform_static_analysis')
+    @patch('main.perform_dynamic_analysis')
+    async def test_worker_survives_failing_analysis(self, mock_dynamic, mock_static):
+        """Test a worker keeps processing jobs after an analysis raises out of run_analysis."""
+        import main
+        from main import analysis_worker, save_and_publish_analysis, ContractAnalysisRequest
+
+        mock_static.return_value = {"vulnerabilities": []}
+        mock_dynamic.return_value = {"simulation_id": "sim_123"}
+
+        failing_id, next_id = str(uuid.uuid4()), str(uuid.uuid4())
+
+        async def flaky_save(analysis_id, data):
+            if analysis_id == failing_id:
+                raise ConnectionError("Redis unavailable")
+            await save_and_publish_analysis(analysis_id, data)
+
+        request = ContractAnalysisRequest(**TEST_CONTRACT_ANALYSIS_REQUEST)
+        queue = asyncio.Queue()
+        queue.put_nowait((failing_id, request))
+        queue.put_nowait((next_id, request))
+
+        with patch.object(main, 'analysis_queue', queue), patch('main.save_and_publish_analysis', flaky_save):
+            worker = asyncio.create_task(analysis_worker())
+            try:
+                await asyncio.wait_for(queue.join(), timeout=5)
+            finally:
+                worker.cancel()
+
+        assert stored_analysis(failing_id) is None
+        assert stored_analysis(next_id)["status"] == "completed"
+
     def test_invalid_json_request(self):
         """Test handling of invalid JSON in requests."""
         response = client.post(
@@ -338,7 +667,50 @@ class TestConcurrency:
             assert response.status_code == 200
             data = response.json()
             assert data["status"] == "pending"
-            assert data["analysis_id"] in analysis_results
+            assert stored_analysis(data["analysis_id"]) is not None
+
+    def test_duplicate_analysis_requests_are_coalesced(self):
+        """Test identical in-flight requests share one analysis."""
+        first = client.post("/api/analyze/contract", json=TEST_CONTRACT_ANALYSIS_REQUEST)
+        second = client.post("/api/analyze/contract", json=TEST_CONTRACT_ANALYSIS_REQUEST)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json()["analysis_id"] == first.json()["analysis_id"]
+
+    def test_expired_in_flight_analysis_is_taken_over(self):
+        """Test a request replaces an in-flight ID whose analysis has expired."""
+        from main import _inflight_key, ContractAnalysisRequest
+
+        key = _inflight_key(ContractAnalysisRequest(**TEST_CONTRACT_ANALYSIS_REQUEST))
+        fake_redis.store[key] = "expired-analysis"
+
+        response = client.post("/api/analyze/contract", json=TEST_CONTRACT_ANALYSIS_REQUEST)
+
+        assert response.status_code == 200
+        assert response.json()["analysis_id"] != "expired-analysis"
+        assert fake_redis.store.get(key) in (response.json()["analysis_id"], None)
+
+    async def test_concurrent_takeover_joins_the_winner(self):
+        """Test a request losing the takeover race joins the analysis that won it."""
+        from main import claim_analysis, load_analysis, _inflight_key, ContractAnalysisRequest
+
+        request = ContractAnalysisRequest(**TEST_CONTRACT_ANALYSIS_REQUEST)
+        key = _inflight_key(request)
+        fake_redis.store[key] = "expired-analysis"
+
+        async def load_during_takeover(analysis_id):
+            # Another request takes the slot over between the read and the swap
+            if analysis_id == "expired-analysis":
+                fake_redis.store[key] = "winner"
+                store_analysis("winner", {"status": "in_progress", "results": {}})
+            return await load_analysis(analysis_id)
+
+        with patch('main.load_analysis', load_during_takeover):
+            claimed = await claim_analysis(request, "loser")
+
+        assert claimed == ("winner", {"status": "in_progress", "results": {}})
+        assert fake_redis.store[key] == "winner"
 
 
 class TestValidation:
@@ -472,7 +844,7 @@ class TestIntegration:
 # Cleanup after tests
 def teardown_module():
     """Clean up after all tests."""
-    analysis_results.clear()
+    fake_redis.store.clear()
 
 
 if __name__ == "__main__":
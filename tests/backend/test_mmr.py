@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+from src.rag.mmr import mmr_select
+
+
+def reference_mmr(query, candidates, k, lambda_mult):
+    """Straightforward MMR: rescore every remaining candidate against the selection at each step."""
+    relevance = [float(candidate @ query) for candidate in candidates]
+    selected = [int(np.argmax(relevance))]
+    while len(selected) < min(k, len(candidates)):
+        best, best_score = None, -np.inf
+        for index, candidate in enumerate(candidates):
+            if index in selected:
+                continue
+            redundancy = max(float(candidate @ candidates[chosen]) for chosen in selected)
+            score = lambda_mult * relevance[index] - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best, best_score = index, score
+        selected.append(best)
+    return selected
+
+
+def normalized(rows):
+    """L2-normalize the rows of a matrix."""
+    return rows / np.linalg.norm(rows, axis=-1, keepdims=True)
+
+
+class TestMMRSelect:
+    """Test the vectorized maximal marginal relevance selection."""
+
+    @pytest.mark.parametrize("seed", range(5))
+    @pytest.mark.parametrize("lambda_mult", [0.0, 0.25, 0.5, 0.9, 1.0])
+    def test_matches_reference(self, seed, lambda_mult):
+        """Test the selection equals the step-by-step reference implementation."""
+        rng = np.random.default_rng(seed)
+        candidates = normalized(rng.standard_normal((40, 16))).astype(np.float32)
+        query = normalized(rng.standard_normal(16)).astype(np.float32)
+
+        assert mmr_select(query, candidates, 8, lambda_mult) == reference_mmr(query, candidates, 8, lambda_mult)
+
+    def test_k_larger_than_candidates(self):
+        """Test every candidate is returned once when k exceeds their number."""
+        rng = np.random.default_rng(0)
+        candidates = normalized(rng.standard_normal((3, 4))).astype(np.float32)
+
+        assert sorted(mmr_select(candidates[0], candidates, 10, 0.5)) == [0, 1, 2]
+
+    def test_no_candidates(self):
+        """Test an empty candidate set selects nothing."""
+        assert mmr_select(np.ones(4, dtype=np.float32), np.empty((0, 4), dtype=np.float32), 5, 0.5) == []
@@ -0,0 +1,90 @@
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add the backend and scripts directories to the Python path
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend' / 'scripts'))
+
+import src.rag.rag_pipeline as rag_module
+from monitor_production import ProductionMonitor
+
+RAG_HEALTH_KEYS = ['rag_pipeline_health', 'vector_store_health']
+
+
+@pytest.fixture(autouse=True)
+def reset_rag_pipeline():
+    """Start every test without a shared RAG pipeline."""
+    rag_module.rag_pipeline = None
+    yield
+    rag_module.rag_pipeline = None
+
+
+def slow_pipeline_factory(builds, delay=0.2, failures=0):
+    """Stand in for _create_rag_pipeline with a build that takes ``delay`` seconds.
+
+    The first ``failures`` builds raise instead of returning a pipeline.
+    """
+    async def create():
+        builds.append(1)
+        await asyncio.sleep(delay)
+        if len(builds) <= failures:
+            raise RuntimeError("model unavailable")
+        pipeline = MagicMock()
+        pipeline.vector_store.similarity_search.return_value = []
+        return pipeline
+
+    return create
+
+
+async def probe_rag(monitor, timeout=0.05):
+    """Run one RAG health probe within ``timeout`` seconds."""
+    monitor.reset_health_metrics()
+    await monitor._bounded(monitor.check_rag_pipeline_health(), 'RAG pipeline', timeout, RAG_HEALTH_KEYS)
+    return monitor.health_metrics
+
+
+class TestRAGPipelineProbe:
+    """Test the RAG probe keeps the pipeline build out of its time budget."""
+
+    async def test_slow_build_survives_probe_timeout_and_is_reused(self):
+        """Test a build slower than the probe budget completes and serves later cycles."""
+        builds = []
+        with patch.object(rag_module, '_create_rag_pipeline', slow_pipeline_factory(builds)):
+            async with ProductionMonitor() as monitor:
+                first = await probe_rag(monitor)
+
+                assert first['rag_pipeline_status'] == 'initializing'
+                assert first['error_count'] == 0
+                assert monitor.calculate_health_score() == 60.0
+
+                await monitor.wait_for_rag_pipeline()
+                second = await probe_rag(monitor)
+                third = await probe_rag(monitor)
+
+        assert builds == [1]
+        assert second['rag_pipeline_status'] == third['rag_pipeline_status'] == 'healthy'
+        assert third['rag_pipeline_health'] and third['vector_store_health']
+        assert 'vector_query' in third['response_times']
+        assert rag_module.rag_pipeline is not None
+
+    async def test_failed_build_is_retried_next_cycle(self):
+        """Test a build that raised is reported unhealthy and started again on the next cycle."""
+        builds = []
+        with patch.object(rag_module, '_create_rag_pipeline', slow_pipeline_factory(builds, delay=0, failures=1)):
+            async with ProductionMonitor() as monitor:
+                await monitor.wait_for_rag_pipeline()
+                failed = await probe_rag(monitor)
+
+                assert failed['rag_pipeline_status'] == 'unhealthy'
+                assert failed['error_count'] == 1
+
+                assert (await probe_rag(monitor))['rag_pipeline_status'] == 'initializing'
+                await monitor.wait_for_rag_pipeline()
+                recovered = await probe_rag(monitor)
+
+        assert builds == [1, 1]
+        assert recovered['rag_pipeline_status'] == 'healthy'
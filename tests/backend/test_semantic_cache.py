@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+from src.rag.semantic_cache import SemanticCache
+
+
+def unit(*values):
+    """Return a normalized float32 embedding."""
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class TestSemanticCache:
+    """Test the similarity-keyed response cache."""
+
+    def test_hit_above_threshold_and_miss_below(self):
+        """Test only queries at least as similar as the threshold hit."""
+        cache = SemanticCache(3, threshold=0.95, ttl=60)
+        cache.put(unit(1, 0, 0), "answer", namespace="0xabc")
+
+        assert cache.get(unit(1, 0.1, 0), namespace="0xabc") == "answer"
+        assert cache.get(unit(0, 1, 0), namespace="0xabc") is None
+        assert cache.get(unit(1, 0, 0), namespace="0xdef") is None
+
+    def test_expired_nearest_entry_does_not_hide_fresher_match(self):
+        """Test expired entries are dropped before searching."""
+        cache = SemanticCache(3, threshold=0.9, ttl=60)
+        with patch("src.rag.semantic_cache.time.monotonic", return_value=0.0):
+            cache.put(unit(1, 0, 0), "stale")
+        with patch("src.rag.semantic_cache.time.monotonic", return_value=50.0):
+            cache.put(unit(1, 0.3, 0), "fresh")
+
+        with patch("src.rag.semantic_cache.time.monotonic", return_value=70.0):
+            assert cache.get(unit(1, 0, 0)) == "fresh"
+        with patch("src.rag.semantic_cache.time.monotonic", return_value=200.0):
+            assert cache.get(unit(1, 0, 0)) is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_namespace_is_evicted(self):
+        """Test the number of namespaces is bounded."""
+        cache = SemanticCache(3, threshold=0.95, ttl=60, max_namespaces=2)
+        cache.put(unit(1, 0, 0), "a", namespace="a")
+        cache.put(unit(1, 0, 0), "b", namespace="b")
+        cache.get(unit(1, 0, 0), namespace="a")
+        cache.put(unit(1, 0, 0), "c", namespace="c")
+
+        assert len(cache) == 2
+        assert cache.get(unit(1, 0, 0), namespace="a") == "a"
+        assert cache.get(unit(1, 0, 0), namespace="b") is None
+        assert cache.get(unit(1, 0, 0), namespace="c") == "c"
@@ -0,0 +1,446 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from cachetools import TTLCache
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+from src.simulation import tenderly_new
+from src.simulation.tenderly_new import (
+    CircuitBreaker, SimulationFailedError, TenderlyClient, TenderlyError
+)
+
+TEST_FROM = "0x9876543210987654321098765432109876543210"
+TEST_TO = "0x1234567890123456789012345678901234567890"
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers():
+    """Start every test with closed circuits; breaker state is shared per process."""
+    tenderly_new._circuit_breakers.clear()
+    yield
+    tenderly_new._circuit_breakers.clear()
+
+
+def make_client(handler):
+    """Build a Tenderly client whose requests are answered by ``handler``."""
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return TenderlyClient("key", "project", "account", http_client=http_client)
+
+
+def simulation_response(request, status=True, gas_used=21000):
+    """Answer a simulate request with a Tenderly-shaped simulation."""
+    body = json.loads(request.content)
+    return httpx.Response(200, json={
+        "id": body["to"],
+        "transaction": {"status": status, "gas_used": gas_used, "logs": []}
+    })
+
+
+class TestSingleFlight:
+    """Test coalescing of concurrent identical simulations."""
+
+    async def test_concurrent_identical_simulations_share_one_request(self):
+        """Test identical pinned simulations in flight together send one request."""
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            await asyncio.sleep(0.01)
+            return simulation_response(request)
+
+        client = make_client(handler)
+        results = await asyncio.gather(*(
+            client.simulate_transaction(TEST_FROM, TEST_TO, block_number=100)
+            for _ in range(5)
+        ))
+
+        assert len(calls) == 1
+        assert all(result["gas_used"] == 21000 for result in results)
+
+        # Every caller gets its own copy
+        results[0]["logs"].append("mutated")
+        assert results[1]["logs"] == []
+
+    async def test_leader_cancellation_fails_followers(self):
+        """Test cancelling the leader fails its followers with TenderlyError, not CancelledError."""
+        started = asyncio.Event()
+
+        async def handler(request):
+            started.set()
+            await asyncio.sleep(10)
+            return simulation_response(request)
+
+        client = make_client(handler)
+        leader = asyncio.create_task(client.simulate_transaction(TEST_FROM, TEST_TO, block_number=100))
+        await asyncio.wait_for(started.wait(), 1)
+        follower = asyncio.create_task(client.simulate_transaction(TEST_FROM, TEST_TO, block_number=100))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        with pytest.raises(TenderlyError):
+            await follower
+        assert len(client._inflight) == 0
+
+
+class TestSimulateTx:
+    """Test conversion of web3-style transactions to simulation payloads."""
+
+    async def test_contract_creation_without_to(self):
+        """Test a transaction with to=None is simulated instead of failing on the address."""
+        bodies = []
+
+        async def handler(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={"transaction": {"status": True, "gas_used": 53000, "logs": []}})
+
+        client = make_client(handler)
+        result = await client.simulate_tx({
+            "from": "0x98765432109876543210987654321098765432AB",
+            "to": None,
+            "data": "0x6080",
+            "gas": "0x5208",
+            "nonce": "010"
+        })
+
+        assert result["gas_used"] == 53000
+        assert bodies[0]["from"] == "0x98765432109876543210987654321098765432ab"
+        assert bodies[0]["to"] is None
+        assert bodies[0]["gas"] == 21000
+        assert bodies[0]["nonce"] == 10
+
+    def test_coerce_int_quantities(self):
+        """Test that tx quantities are accepted as hex strings, decimal strings and ints."""
+        assert tenderly_new._coerce_int("0x5208") == 21000
+        assert tenderly_new._coerce_int("21000") == 21000
+        assert tenderly_new._coerce_int("010") == 10
+        assert tenderly_new._coerce_int(21000) == 21000
+        assert tenderly_new._coerce_int(None) == 0
+        assert tenderly_new._coerce_int("", default=7) == 7
+
+
+class TestSimulationCache:
+    """Test the TTL caches of pinned-block and latest-block simulations."""
+
+    async def test_pinned_simulation_hit_and_miss(self):
+        """Test a repeated pinned simulation is cached and another block is not."""
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            return simulation_response(request)
+
+        client = make_client(handler)
+        first = await client.simulate_transaction(TEST_FROM, TEST_TO, block_number=100)
+        second = await client.simulate_transaction(TEST_FROM, TEST_TO, block_number=100, save=False)
+        await client.simulate_transaction(TEST_FROM, TEST_TO, block_number=101)
+
+        assert len(calls) == 2
+        assert second == first
+        assert client.cache_stats()["hits"] == 1
+        assert client.cache_stats()["misses"] == 2
+
+    async def test_latest_simulation_expires(self):
+        """Test an unsaved latest-block simulation is reused only within its TTL."""
+        calls = []
+        now = [0.0]
+
+        async def handler(request):
+            calls.append(request)
+            return simulation_response(request)
+
+        client = make_client(handler)
+        client._latest_simulations = TTLCache(
+            maxsize=8, ttl=tenderly_new.LATEST_SIMULATION_TTL, timer=lambda: now[0]
+        )
+        await client.simulate_transaction(TEST_FROM, TEST_TO, save=False)
+        await client.simulate_transaction(TEST_FROM, TEST_TO, save=False)
+        assert len(calls) == 1
+
+        now[0] += tenderly_new.LATEST_SIMULATION_TTL
+        await client.simulate_transaction(TEST_FROM, TEST_TO, save=False)
+        assert len(calls) == 2
+
+    async def test_saved_latest_simulation_is_not_cached(self):
+        """Test saved latest-block simulations always reach Tenderly."""
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            return simulation_response(request)
+
+        client = make_client(handler)
+        await client.simulate_transaction(TEST_FROM, TEST_TO)
+        await client.simulate_transaction(TEST_FROM, TEST_TO)
+
+        assert len(calls) == 2
+        assert client.cache_stats()["size"] == 0
+
+
+class TestRetries:
+    """Test which Tenderly responses are retried and how long the client waits."""
+
+    @staticmethod
+    def replay(responses, calls):
+        """Answer requests with the given responses in order."""
+        responses = iter(responses)
+
+        def handler(request):
+            calls.append(request)
+            return next(responses)
+
+        return handler
+
+    async def test_rate_limit_honours_retry_after(self):
+        """Test a 429 is retried after the delay in its Retry-After header."""
+        calls = []
+        client = make_client(self.replay([
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            httpx.Response(200, json={"ok": True})
+        ], calls))
+
+        with patch("asyncio.sleep", new=AsyncMock()) as sleep:
+            result = await client._make_api_request("GET", "/contracts")
+
+        assert result == {"ok": True}
+        assert len(calls) == 2
+        sleep.assert_awaited_once_with(2.0)
+
+    async def test_server_errors_retry_with_full_jitter(self):
+        """Test 5xx responses are retried with waits bounded by the exponential backoff."""
+        calls = []
+        client = make_client(self.replay([
+            httpx.Response(503),
+            httpx.Response(502),
+            httpx.Response(200, json={"ok": True})
+        ], calls))
+
+        with patch("asyncio.sleep", new=AsyncMock()) as sleep:
+            result = await client._make_api_request("GET", "/contracts", backoff_base=1.0)
+
+        assert result == {"ok": True}
+        assert len(calls) == 3
+        waits = [call.args[0] for call in sleep.await_args_list]
+        assert 0 <= waits[0] <= 1.0
+        assert 0 <= waits[1] <= 2.0
+
+    async def test_client_errors_are_not_retried(self):
+        """Test a 4xx other than 429 fails on the first attempt."""
+        calls = []
+        client = make_client(self.replay([httpx.Response(404)], calls))
+
+        with patch("asyncio.sleep", new=AsyncMock()) as sleep:
+            with pytest.raises(TenderlyError):
+                await client._make_api_request("GET", "/contracts")
+
+        assert len(calls) == 1
+        sleep.assert_not_awaited()
+
+    async def test_gives_up_after_all_attempts(self):
+        """Test persistent server errors raise TenderlyError after the last attempt."""
+        calls = []
+        client = make_client(self.replay([httpx.Response(500)] * 3, calls))
+
+        with patch("asyncio.sleep", new=AsyncMock()):
+            with pytest.raises(TenderlyError):
+                await client._make_api_request("GET", "/contracts", retries=3)
+
+        assert len(calls) == 3
+
+
+class TestCircuitBreaker:
+    """Test the per-host circuit breaker."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the circuit opens at the failure threshold and a success resets the count."""
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=30.0)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+    def test_half_open_lets_one_trial_through(self):
+        """Test one trial request per recovery period once the circuit is open."""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30.0)
+        with patch("src.simulation.tenderly_new.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+        with patch("src.simulation.tenderly_new.time.monotonic", return_value=129.0):
+            assert not breaker.allow_request()
+        with patch("src.simulation.tenderly_new.time.monotonic", return_value=130.0):
+            assert breaker.allow_request()
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            assert not breaker.allow_request()
+
+    def test_trial_outcome_closes_or_reopens(self):
+        """Test a successful trial closes the circuit and a failed one reopens it."""
+        breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=30.0)
+        breaker.state = CircuitBreaker.HALF_OPEN
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        breaker.state = CircuitBreaker.HALF_OPEN
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request()
+
+    async def test_open_circuit_fails_without_sending(self):
+        """Test the client stops calling a host whose circuit has opened."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503)
+
+        client = make_client(handler)
+        for _ in range(client._circuit_breaker.failure_threshold):
+            with pytest.raises(TenderlyError):
+                await client._make_api_request("GET", "/contracts", retries=1)
+        sent = len(calls)
+
+        with pytest.raises(TenderlyError, match="circuit open"):
+            await client._make_api_request("GET", "/contracts", retries=1)
+        assert len(calls) == sent
+
+
+def bundle_item(address, status=True):
+    """One entry of a simulate-bundle response."""
+    item = {"id": address, "transaction": {"status": status, "gas_used": 21000, "logs": []}}
+    if not status:
+        item["error"] = {"message": "execution reverted"}
+    return item
+
+
+class TestSimulateBatch:
+    """Test concurrent simulation of independent transactions."""
+
+    async def test_results_follow_input_order(self):
+        """Test results line up with the inputs even when responses arrive out of order."""
+        targets = [f"0x{index:040x}" for index in range(1, 5)]
+
+        async def handler(request):
+            to = json.loads(request.content)["to"]
+            # Later transactions answer first
+            await asyncio.sleep(0.01 * (len(targets) - targets.index(to)))
+            return simulation_response(request)
+
+        client = make_client(handler)
+        results = await client.simulate_batch([
+            {"from_address": TEST_FROM, "to_address": to, "block_number": 100} for to in targets
+        ])
+
+        assert [result["id"] for result in results] == targets
+
+    async def test_failed_transaction_does_not_fail_the_batch(self):
+        """Test a failed simulation is returned in its slot while the others succeed."""
+        failing = "0x" + "f" * 40
+
+        async def handler(request):
+            return simulation_response(request, status=json.loads(request.content)["to"] != failing)
+
+        client = make_client(handler)
+        results = await client.simulate_batch([
+            {"from_address": TEST_FROM, "to_address": TEST_TO},
+            {"from_address": TEST_FROM, "to_address": failing},
+            {"from_address": TEST_FROM, "to_address": TEST_TO, "value": 1},
+        ])
+
+        assert results[0]["status"] is True
+        assert isinstance(results[1], SimulationFailedError)
+        assert results[2]["status"] is True
+
+    async def test_invalid_arguments_raise(self):
+        """Test errors other than failed simulations propagate."""
+        client = make_client(simulation_response)
+
+        with pytest.raises(ValueError):
+            await client.simulate_batch([
+                {"from_address": TEST_FROM, "to_address": TEST_TO},
+                {"from_address": TEST_FROM, "to_address": TEST_TO, "network": "no-such-network"},
+            ])
+
+
+class TestSimulateBundle:
+    """Test simulation of several transactions in one simulate-bundle request."""
+
+    async def test_one_request_with_results_in_order(self):
+        """Test the bundle is sent once and its results map back in order."""
+        targets = [f"0x{index:040x}" for index in range(1, 4)]
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={
+                "simulation_results": [bundle_item(sim["to"]) for sim in bodies[-1]["simulations"]]
+            })
+
+        client = make_client(handler)
+        results = await client.simulate_bundle(
+            [{"from_address": TEST_FROM, "to_address": to} for to in targets],
+            block_number=100
+        )
+
+        assert len(bodies) == 1
+        assert [sim["block_number"] for sim in bodies[0]["simulations"]] == [100] * 3
+        assert [sim["network_id"] for sim in bodies[0]["simulations"]] == ["1"] * 3
+        assert [result["id"] for result in results] == targets
+
+    async def test_failed_transaction_is_returned_in_its_slot(self):
+        """Test a reverted transaction becomes a SimulationFailedError entry."""
+        def handler(request):
+            return httpx.Response(200, json={"simulation_results": [
+                bundle_item(TEST_TO), bundle_item(TEST_TO, status=False)
+            ]})
+
+        client = make_client(handler)
+        results = await client.simulate_bundle([
+            {"from_address": TEST_FROM, "to_address": TEST_TO},
+            {"from_address": TEST_FROM, "to_address": TEST_TO, "include_raw": True},
+        ])
+
+        assert results[0]["status"] is True
+        assert "raw_response" not in results[0]
+        assert isinstance(results[1], SimulationFailedError)
+
+    async def test_result_count_mismatch_fails(self):
+        """Test a response that does not cover every transaction is rejected."""
+        def handler(request):
+            return httpx.Response(200, json={"simulation_results": [bundle_item(TEST_TO)]})
+
+        client = make_client(handler)
+        with pytest.raises(SimulationFailedError):
+            await client.simulate_bundle([{"from_address": TEST_FROM, "to_address": TEST_TO}] * 2)
+
+    async def test_max_bundle_size(self):
+        """Test bundles up to MAX_BUNDLE_SIZE are sent and larger ones are refused."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            simulations = json.loads(request.content)["simulations"]
+            return httpx.Response(200, json={
+                "simulation_results": [bundle_item(sim["to"]) for sim in simulations]
+            })
+
+        client = make_client(handler)
+        simulation = {"from_address": TEST_FROM, "to_address": TEST_TO}
+
+        results = await client.simulate_bundle([simulation] * tenderly_new.MAX_BUNDLE_SIZE)
+        assert len(results) == tenderly_new.MAX_BUNDLE_SIZE
+
+        with pytest.raises(ValueError):
+            await client.simulate_bundle([simulation] * (tenderly_new.MAX_BUNDLE_SIZE + 1))
+        assert len(calls) == 1
@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent.parent / 'backend'))
+
+from src.utils.embedding_cache import EmbeddingCache
+from src.utils.knowledge_base import append_records, iter_indexed_records, read_index
+from src.utils.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test the shared single-flight helper."""
+
+    async def test_concurrent_calls_share_one_result(self):
+        """Test callers with the same key await one factory call."""
+        group = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(group.run("key", work) for _ in range(3)))
+
+        assert results == ["result"] * 3
+        assert len(calls) == 1
+        assert len(group) == 0
+
+    async def test_failure_reaches_every_caller(self):
+        """Test an exception of the leader is raised to all callers."""
+        group = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(group.run("key", work) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(group) == 0
+
+    async def test_leader_cancellation_raises_cancelled_error_type(self):
+        """Test followers of a cancelled leader get cancelled_error, not CancelledError."""
+        group = SingleFlight(cancelled_error=LookupError)
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(10)
+
+        leader = asyncio.create_task(group.run("key", work))
+        await asyncio.wait_for(started.wait(), 1)
+        follower = asyncio.create_task(group.run("key", work))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        with pytest.raises(LookupError):
+            await follower
+        assert len(group) == 0
+
+
+class TestKnowledgeBaseIndex:
+    """Test the append-only JSONL knowledge base file and its offset index."""
+
+    def test_append_and_read_index_round_trip(self, tmp_path):
+        """Test index entries point at the appended lines across several appends."""
+        kb_file = tmp_path / "updates.jsonl"
+        index_file = tmp_path / "updates.index"
+
+        assert append_records(kb_file, index_file, [
+            {"name": "cve_2024_0001", "content": "first"},
+            {"name": "blog_\u00e9t\u00e9", "content": "second"},
+        ]) == 2
+        assert append_records(kb_file, index_file, [{"name": "pattern_1", "content": "third"}]) == 1
+
+        entries = read_index(index_file)
+        assert [name for name, _, _ in entries] == ["cve_2024_0001", "blog_\u00e9t\u00e9", "pattern_1"]
+
+        data = kb_file.read_bytes()
+        for (name, offset, length), content in zip(entries, ["first", "second", "third"]):
+            line = data[offset:offset + length]
+            assert line.endswith(b"\n")
+            assert json.loads(line) == {"name": name, "content": content}
+        assert entries[-1][1] + entries[-1][2] == len(data)
+
+    def test_empty_append_and_missing_index(self, tmp_path):
+        """Test appending nothing writes nothing and a missing index reads as empty."""
+        kb_file = tmp_path / "updates.jsonl"
+        index_file = tmp_path / "updates.index"
+
+        assert append_records(kb_file, index_file, []) == 0
+        assert not kb_file.exists()
+        assert read_index(index_file) == []
+
+    def test_iter_indexed_records_round_trip(self, tmp_path):
+        """Test records come back from the memory-mapped file in index order."""
+        kb_file = tmp_path / "updates.jsonl"
+        index_file = tmp_path / "updates.index"
+        records = [{"name": f"doc_{i}", "content": "x" * i, "metadata": {"i": i}} for i in range(50)]
+        append_records(kb_file, index_file, records[:20])
+        append_records(kb_file, index_file, records[20:])
+
+        assert list(iter_indexed_records(kb_file, index_file)) == records
+
+    def test_iter_skips_entries_past_end_of_file(self, tmp_path):
+        """Test a truncated JSONL file yields only the records it still holds."""
+        kb_file = tmp_path / "updates.jsonl"
+        index_file = tmp_path / "updates.index"
+        append_records(kb_file, index_file, [{"name": "a"}, {"name": "b"}])
+        _, offset, _ = read_index(index_file)[1]
+        with open(kb_file, "r+b") as f:
+            f.truncate(offset + 3)
+
+        assert list(iter_indexed_records(kb_file, index_file)) == [{"name": "a"}]
+        assert list(iter_indexed_records(kb_file, tmp_path / "missing.index")) == []
+
+
+class TestEmbeddingCache:
+    """Test the SQLite embedding cache."""
+
+    @staticmethod
+    def digest(text):
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def test_hits_and_misses(self, tmp_path):
+        """Test stored embeddings are returned and unknown texts are missing."""
+        cache = EmbeddingCache(tmp_path / "embeddings.sqlite", "model-a")
+        cache.put_many([(self.digest("a"), [0.5, 0.25]), (self.digest("b"), np.array([1.0, 0.0]))])
+
+        found = cache.get_many([self.digest("a"), self.digest("c"), self.digest("a")])
+
+        assert set(found) == {self.digest("a")}
+        assert found[self.digest("a")].dtype == np.float32
+        np.testing.assert_array_equal(found[self.digest("a")], [0.5, 0.25])
+        cache.close()
+
+    def test_entries_are_per_model(self, tmp_path):
+        """Test a different model name never sees another model's vectors."""
+        path = tmp_path / "embeddings.sqlite"
+        cache_a = EmbeddingCache(path, "model-a")
+        cache_a.put_many([(self.digest("a"), [1.0, 2.0])])
+        cache_b = EmbeddingCache(path, "model-b")
+
+        assert cache_b.get_many([self.digest("a")]) == {}
+        cache_b.put_many([(self.digest("a"), [3.0, 4.0])])
+        np.testing.assert_array_equal(cache_a.get_many([self.digest("a")])[self.digest("a")], [1.0, 2.0])
+        np.testing.assert_array_equal(cache_b.get_many([self.digest("a")])[self.digest("a")], [3.0, 4.0])
+        cache_a.close()
+        cache_b.close()
+
+    def test_persists_and_replaces(self, tmp_path):
+        """Test entries survive reopening, a put replaces the old vector and large lookups are batched."""
+        path = tmp_path / "cache" / "embeddings.sqlite"
+        cache = EmbeddingCache(path, "model-a")
+        cache.put_many([(self.digest(str(i)), [float(i)]) for i in range(1200)])
+        cache.put_many([(self.digest("7"), [-1.0])])
+        cache.close()
+
+        reopened = EmbeddingCache(path, "model-a")
+        found = reopened.get_many(self.digest(str(i)) for i in range(1200))
+
+        assert len(found) == 1200
+        assert found[self.digest("7")][0] == -1.0
+        assert found[self.digest("1199")][0] == 1199.0
+        reopened.close()
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the async Redis client."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+        return True
+
+
+class TestContractCache:
+    """Test the in-process LRU and Redis layers of contract_cache."""
+
+    @staticmethod
+    def make_lookup(calls):
+        """Build a cached lookup that records its calls and returns JSON-unfriendly values."""
+        from src.utils.cache import contract_cache
+
+        @contract_cache("test", ttl=60)
+        async def lookup(contract_address, network="mainnet"):
+            calls.append((contract_address, network))
+            return {"name": "Token", "verified_at": datetime(2024, 1, 1, tzinfo=timezone.utc), "tags": []}
+
+        return lookup
+
+    async def test_lru_then_redis_layers(self):
+        """Test the LRU serves repeats, Redis serves LRU misses and the function runs once."""
+        calls = []
+        lookup = self.make_lookup(calls)
+        redis = FakeRedis()
+
+        with patch('src.utils.cache.redis_client', redis):
+            first = await lookup("0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48", network="Mainnet")
+
+            # Stored once in Redis as JSON under the normalized key
+            key = "cache:test:mainnet:0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+            assert json.loads(redis.store[key]) == first
+
+            second = await lookup("0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48")
+            lookup.cache_clear()
+            third = await lookup("0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48")
+
+        assert len(calls) == 1
+        assert first == second == third
+        # Non-JSON values are stored through str()
+        assert first["verified_at"] == "2024-01-01 00:00:00+00:00"
+
+    async def test_callers_get_independent_copies(self):
+        """Test mutating a cached result does not change what the next caller gets."""
+        calls = []
+        lookup = self.make_lookup(calls)
+        redis = FakeRedis()
+
+        with patch('src.utils.cache.redis_client', redis):
+            first = await lookup("0x1234567890123456789012345678901234567890")
+            first["tags"].append("mutated")
+            second = await lookup("0x1234567890123456789012345678901234567890")
+
+        assert second["tags"] == []
+        assert len(calls) == 1